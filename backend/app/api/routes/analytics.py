@@ -11,6 +11,7 @@ from datetime import date, datetime, timedelta
 from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
 from sqlalchemy import and_, asc, case, desc, func
 from sqlalchemy.orm import Session
 
@@ -26,15 +27,16 @@ from app.api.schemas import (
 from app.core.config import settings
 from app.core.security import verify_webhook_api_key
 from app.db import get_db
-from app.models.enums import MediaType, PlaybackMethod, ServiceType, SessionStatus
+from app.models.enums import MediaType, PlaybackMethod, SessionStatus
 from app.models.models import (
     DailyAnalytic,
     LibraryItem,
     PlaybackSession,
     ServerMetric,
-    ServiceConfiguration,
 )
 from app.services.analytics_service import AnalyticsService
+from app.services.jellyfin_stream_queue import STREAM_ITEM_TYPES, jellyfin_stream_queue
+from app.services.playback_event_queue import PlaybackEvent, playback_event_queue, process_playback_event
 
 logger = logging.getLogger(__name__)
 
@@ -45,19 +47,28 @@ public_router = APIRouter(prefix="/analytics", tags=["Analytics"])
 _JELLYFIN_ID_PATTERN = re.compile(r"^[a-fA-F0-9]{1,64}$")
 
 
-def _truncate(value: str | None, max_length: int = 255) -> str | None:
-    """Tronque une chaîne à une longueur maximale"""
-    if value is None:
-        return None
-    return value[:max_length]
+async def _read_webhook_payload(request: Request) -> dict:
+    """Vérifier le secret webhook (si configuré) et la taille du corps, puis décoder le JSON"""
+    webhook_secret = settings.WEBHOOK_SECRET
+    if webhook_secret:
+        request_secret = request.headers.get("X-Webhook-Secret", "")
+        if not hmac.compare_digest(request_secret, webhook_secret):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Secret webhook invalide")
+
+    # Valider la taille du payload (max 1 Mo)
+    body = await request.body()
+    if len(body) > 1_048_576:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload trop volumineux")
+
+    return json.loads(body)
 
 
 # ============================================
-# WEBHOOK ENDPOINT (PUBLIC)
+# WEBHOOK ENDPOINTS (PUBLIC)
 # ============================================
 
 
-@public_router.post("/webhook/playback", status_code=status.HTTP_200_OK)
+@public_router.post("/webhook/playback", status_code=status.HTTP_202_ACCEPTED)
 async def receive_playback_webhook(
     request: Request,
     db: Session = Depends(get_db),
@@ -71,29 +82,18 @@ async def receive_playback_webhook(
     - Stop : Fin de lecture
     - Pause : Mise en pause
     - Resume : Reprise de lecture
+
+    L'événement est validé puis mis en file (202) ; le worker de playback_event_queue
+    l'applique en base. File pleine : 503 + Retry-After. PLAYBACK_WEBHOOK_ASYNC=false
+    rétablit le traitement inline (200 + résultat).
     """
     try:
-        # Vérifier le secret webhook si configuré
-        webhook_secret = settings.WEBHOOK_SECRET
-        if webhook_secret:
-            request_secret = request.headers.get("X-Webhook-Secret", "")
-            if not hmac.compare_digest(request_secret, webhook_secret):
-                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Secret webhook invalide")
-
-        # Valider la taille du payload (max 1 Mo)
-        body = await request.body()
-        if len(body) > 1_048_576:
-            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Payload trop volumineux")
-
-        # Récupérer le payload
-        payload = json.loads(body)
+        payload = await _read_webhook_payload(request)
 
         # Extraire les données principales
         event_type_raw = payload.get("Event")
         item = payload.get("Item", {})
         user = payload.get("User", {})
-        session_info = payload.get("Session", {})
-        play_state = session_info.get("PlayState", {})
 
         # Mapping des événements
         event_mapping = {
@@ -121,198 +121,18 @@ async def receive_playback_webhook(
         if not _JELLYFIN_ID_PATTERN.match(str(media_id)) or not _JELLYFIN_ID_PATTERN.match(str(user_id)):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Format d'ID invalide")
 
-        # Traitement selon le type d'événement
-        if event_type == "playback.start":
-            # Déterminer le type de média
-            item_type = item.get("Type", "Movie")
-            media_type = "tv" if item_type == "Episode" else "movie"
-
-            # Info épisode si série
-            episode_info = None
-            if item_type == "Episode":
-                season = item.get("ParentIndexNumber", 0)
-                episode = item.get("IndexNumber", 0)
-                episode_info = f"S{season:02d}E{episode:02d}"
-
-            # Extraire la qualité vidéo depuis les MediaStreams
-            media_streams = item.get("MediaStreams", [])
-            video_stream = next((s for s in media_streams if s.get("Type") == "Video"), {})
-            video_height = video_stream.get("Height", 0)
-
-            # Mapper la qualité (vérifier HDR pour 2160p)
-            video_range = video_stream.get("VideoRange", "")
-            if video_height >= 2160:
-                video_quality = "FOUR_K_HDR" if video_range and video_range.upper() == "HDR" else "FOUR_K"
-            else:
-                quality_map = {1080: "FULL_HD", 720: "HD", 480: "SD"}
-                video_quality = quality_map.get(video_height, "UNKNOWN")
-
-            # Codec vidéo source
-            video_codec_source = video_stream.get("Codec", "unknown")
-
-            # Déterminer si c'est du transcodage
-            play_method = play_state.get("PlayMethod", "DirectPlay")
-            is_transcoding = play_method == "Transcode"
-            is_direct_playing = play_method == "DirectPlay"
-
-            # Codec cible si transcodage
-            video_codec_target = None
-            if is_transcoding:
-                video_codec_target = "h264"  # Par défaut pour le transcodage
-
-            # Durée en secondes
-            run_time_ticks = item.get("RunTimeTicks", 0)
-            duration_seconds = run_time_ticks // 10000000 if run_time_ticks else None
-
-            # Déterminer le type d'appareil
-            device_name = session_info.get("DeviceName", "Unknown")
-            client_name = session_info.get("Client", "Unknown")
-
-            # URL du poster : Utiliser l'URL de Jellyfin depuis la base de données
-            poster_url = None
-            jellyfin_service = (
-                db.query(ServiceConfiguration).filter(ServiceConfiguration.service_name == ServiceType.JELLYFIN).first()
+        event = PlaybackEvent(event_type=event_type, payload=payload)
+        if not settings.PLAYBACK_WEBHOOK_ASYNC:
+            return JSONResponse(content=process_playback_event(db, event), status_code=status.HTTP_200_OK)
+
+        if not playback_event_queue.submit(event):
+            logger.warning(f"⚠️  File des webhooks de lecture pleine, événement {event_type} refusé")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="File des événements pleine",
+                headers={"Retry-After": str(settings.PLAYBACK_WEBHOOK_RETRY_AFTER_SECONDS)},
             )
-            if jellyfin_service:
-                _jf_base = jellyfin_service.url.rstrip("/")
-                _jf_port = jellyfin_service.port
-                if _jf_port and f":{_jf_port}" not in _jf_base:
-                    _jf_base = f"{_jf_base}:{_jf_port}"
-                jellyfin_url = _jf_base
-            else:
-                jellyfin_url = None
-            if item.get("ImageTags", {}).get("Primary") and jellyfin_url:
-                poster_url = f"{jellyfin_url}/Items/{media_id}/Images/Primary"
-
-            session_data = {
-                "media_id": media_id,
-                "media_title": _truncate(item.get("Name", "Unknown")),
-                "media_type": media_type,
-                "media_year": item.get("ProductionYear"),
-                "episode_info": _truncate(episode_info, 20),
-                "poster_url": _truncate(poster_url, 500),
-                "user_id": user_id,
-                "user_name": _truncate(user.get("Name", "Unknown")),
-                "device_name": _truncate(device_name),
-                "client_name": _truncate(client_name),
-                "video_quality": video_quality,
-                "is_transcoding": is_transcoding,
-                "is_direct_playing": is_direct_playing,
-                "transcoding_progress": 0,
-                "transcoding_speed": None,
-                "video_codec_source": _truncate(video_codec_source, 50),
-                "video_codec_target": _truncate(video_codec_target, 50),
-                "duration_seconds": duration_seconds,
-            }
-
-            # Recherche du LibraryItem correspondant
-            library_item = None
-            if media_type == "movie":
-                # Primary: match by stored Jellyfin ID
-                library_item = (
-                    db.query(LibraryItem)
-                    .filter(
-                        LibraryItem.jellyfin_id == media_id,
-                        LibraryItem.media_type == MediaType.MOVIE,
-                    )
-                    .first()
-                )
-                if not library_item:
-                    # Fallback: case-insensitive title + year
-                    movie_name = item.get("Name", "")
-                    movie_year = item.get("ProductionYear")
-                    library_item = (
-                        db.query(LibraryItem)
-                        .filter(
-                            func.lower(LibraryItem.title) == movie_name.lower(),
-                            LibraryItem.media_type == MediaType.MOVIE,
-                            LibraryItem.year == movie_year,
-                        )
-                        .first()
-                    )
-                if not library_item:
-                    # Year-relaxed fallback: case-insensitive title only
-                    library_item = (
-                        db.query(LibraryItem)
-                        .filter(
-                            func.lower(LibraryItem.title) == movie_name.lower(),
-                            LibraryItem.media_type == MediaType.MOVIE,
-                        )
-                        .first()
-                    )
-            elif media_type == "tv":
-                series_id = item.get("SeriesId")
-                series_name = item.get("SeriesName")
-                # Primary: match by stored Jellyfin series ID
-                if series_id:
-                    library_item = (
-                        db.query(LibraryItem)
-                        .filter(
-                            LibraryItem.jellyfin_id == series_id,
-                            LibraryItem.media_type == MediaType.TV,
-                        )
-                        .first()
-                    )
-                if not library_item and series_name:
-                    # Fallback: case-insensitive series name
-                    library_item = (
-                        db.query(LibraryItem)
-                        .filter(
-                            func.lower(LibraryItem.title) == series_name.lower(),
-                            LibraryItem.media_type == MediaType.TV,
-                        )
-                        .first()
-                    )
-
-            if library_item:
-                session_data["library_item_id"] = library_item.id
-                # Learn Jellyfin ID from webhook so future matches use the fast path
-                if not library_item.jellyfin_id:
-                    if media_type == "movie":
-                        library_item.jellyfin_id = media_id
-                    elif media_type == "tv":
-                        jf_series_id = item.get("SeriesId")
-                        if jf_series_id:
-                            library_item.jellyfin_id = jf_series_id
-                    db.flush()
-
-            playback_session = AnalyticsService.start_session(db, session_data)
-            logger.info(f"✅ Session créée : {playback_session.id} - {playback_session.media_title}")
-            return {"status": "success", "session_id": playback_session.id, "event": event_type}
-
-        elif event_type == "playback.stop":
-            # Position de lecture en secondes
-            playback_position_ticks = play_state.get("PositionTicks", 0)
-            watched_seconds = playback_position_ticks // 10000000 if playback_position_ticks else 0
-
-            playback_session = AnalyticsService.stop_session(db, media_id, user_id, watched_seconds)
-
-            if playback_session:
-                logger.info(
-                    f"✅ Session arrêtée : {playback_session.id} - {playback_session.media_title} ({watched_seconds}s)"
-                )
-                return {"status": "success", "session_id": playback_session.id, "event": event_type}
-            else:
-                logger.warning(f"⚠️  Aucune session active trouvée pour media_id={media_id}, user_id={user_id}")
-                return {"status": "no_active_session", "event": event_type}
-
-        elif event_type == "playback.pause":
-            playback_session = AnalyticsService.pause_session(db, media_id, user_id)
-            if playback_session:
-                logger.info(f"⏸️  Session mise en pause : {playback_session.id}")
-                return {"status": "success", "session_id": playback_session.id, "event": event_type}
-            return {"status": "no_active_session", "event": event_type}
-
-        elif event_type == "playback.unpause":
-            playback_session = AnalyticsService.resume_session(db, media_id, user_id)
-            if playback_session:
-                logger.info(f"▶️  Session reprise : {playback_session.id}")
-                return {"status": "success", "session_id": playback_session.id, "event": event_type}
-            return {"status": "no_active_session", "event": event_type}
-
-        else:
-            logger.warning(f"⚠️  Événement non supporté : {event_type}")
-            return {"status": "ignored", "event": event_type}
+        return {"status": "queued", "event": event_type}
 
     except HTTPException:
         raise
@@ -324,6 +144,46 @@ async def receive_playback_webhook(
         ) from e
 
 
+@public_router.post("/webhook/library", status_code=status.HTTP_202_ACCEPTED)
+async def receive_library_webhook(
+    request: Request,
+    _: str = Depends(verify_webhook_api_key),
+):
+    """
+    Endpoint pour recevoir les événements de bibliothèque depuis Jellyfin
+
+    Événements supportés : ItemAdded, ItemUpdated (films, épisodes, séries).
+    L'item est mis en file ; ses MediaStreams sont rafraîchis par lots par le scheduler.
+    """
+    try:
+        payload = await _read_webhook_payload(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Payload JSON invalide") from e
+
+    # Plugin Webhook : propriétés à plat (NotificationType, ItemId...) ou objet Item
+    item = payload.get("Item") or {}
+    event = payload.get("NotificationType") or payload.get("Event")
+    item_id = payload.get("ItemId") or item.get("Id")
+    item_type = payload.get("ItemType") or item.get("Type")
+
+    if event not in ("ItemAdded", "ItemUpdated") or item_type not in STREAM_ITEM_TYPES:
+        return {"status": "ignored", "event": event}
+    if not settings.JELLYFIN_STREAMS_INCREMENTAL:
+        return {"status": "ignored", "event": event, "reason": "incremental streams sync disabled"}
+
+    if not item_id or not _JELLYFIN_ID_PATTERN.match(str(item_id)):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Format d'ID invalide")
+
+    if not jellyfin_stream_queue.enqueue(str(item_id)):
+        logger.warning(f"⚠️  File des streams pleine, item {item_id} laissé au scan nocturne")
+        return {"status": "dropped", "event": event}
+
+    logger.info(f"📥 Webhook bibliothèque : {event} - {item_type} {item_id} ({len(jellyfin_stream_queue)} en file)")
+    return {"status": "queued", "event": event, "pending": len(jellyfin_stream_queue)}
+
+
 # ============================================
 # ANALYTICS ENDPOINTS (PROTÉGÉS PAR API KEY)
 # ============================================
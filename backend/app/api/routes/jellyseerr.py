@@ -26,7 +26,7 @@ async def approve_request(request_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Requête non trouvée")
 
     # Appeler l'API Jellyseerr avec l'ID externe
-    connector = JellyseerrConnector(base_url=service.url, api_key=service.api_key)
+    connector = JellyseerrConnector(base_url=service.url, api_key=service.api_key, shared_client=True)
 
     try:
         await connector.approve_request(request.jellyseerr_id)
@@ -59,7 +59,7 @@ async def decline_request(request_id: str, db: Session = Depends(get_db)):
     if not request:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Requête non trouvée")
 
-    connector = JellyseerrConnector(base_url=service.url, api_key=service.api_key)
+    connector = JellyseerrConnector(base_url=service.url, api_key=service.api_key, shared_client=True)
 
     try:
         await connector.decline_request(request.jellyseerr_id)
@@ -188,8 +188,8 @@ async def get_library_item(
             or 0
         )
 
-    sonarr_series_id = None
-    if item.media_type == MediaType.TV:
+    sonarr_series_id = item.sonarr_series_id
+    if item.media_type == MediaType.TV and sonarr_series_id is None:
         first_season = db.query(Season).filter(Season.library_item_id == id).first()
         if first_season:
             sonarr_series_id = first_season.sonarr_series_id
@@ -22,7 +22,7 @@ def _get_connector(db: Session) -> ProwlarrConnector:
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Prowlarr is not configured or inactive",
         )
-    return ProwlarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+    return ProwlarrConnector(base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True)
 
 
 @router.get("/indexers", response_model=list[ProwlarrIndexerResponse])
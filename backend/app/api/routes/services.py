@@ -14,6 +14,12 @@ from app.services import (
     RadarrConnector,
     SonarrConnector,
 )
+from app.services.endpoint import service_base_url
+from app.services.http_client_registry import http_client_registry
+from app.services.qbittorrent_maindata import maindata_registry
+from app.services.qbittorrent_sessions import qbittorrent_session_registry
+from app.services.response_cache import response_cache
+from app.services.torrent_snapshot import torrent_snapshot_poller
 
 router = APIRouter(prefix="/services", tags=["Services"])
 
@@ -69,6 +75,7 @@ async def update_service(
     """Créer ou mettre à jour une configuration de service (upsert)"""
     service = db.query(ServiceConfiguration).filter(ServiceConfiguration.service_name == service_name).first()
     updates = service_data.model_dump(exclude_unset=True)
+    previous_base_url = service_base_url(service) if service else None
 
     if not service:
         # Fresh install: create the record
@@ -87,6 +94,19 @@ async def update_service(
     db.commit()
     db.refresh(service)
 
+    # Les connexions keep-alive partagées pointent peut-être vers l'ancien endpoint / anciens credentials
+    if previous_base_url:
+        await http_client_registry.invalidate(previous_base_url)
+        response_cache.invalidate(previous_base_url)
+        maindata_registry.invalidate(previous_base_url)
+        await qbittorrent_session_registry.invalidate(previous_base_url)
+    await http_client_registry.invalidate(service_base_url(service))
+    response_cache.invalidate(service_base_url(service))
+    maindata_registry.invalidate(service_base_url(service))
+    await qbittorrent_session_registry.invalidate(service_base_url(service))
+    if service_name == ServiceType.QBITTORRENT:
+        torrent_snapshot_poller.clear()
+
     return service
 
 
@@ -98,8 +118,15 @@ async def delete_service(service_name: ServiceType, db: Session = Depends(get_db
     if not service:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Service {service_name} non trouvé")
 
+    base_url = service_base_url(service)
     db.delete(service)
     db.commit()
+    await http_client_registry.invalidate(base_url)
+    response_cache.invalidate(base_url)
+    maindata_registry.invalidate(base_url)
+    await qbittorrent_session_registry.invalidate(base_url)
+    if service_name == ServiceType.QBITTORRENT:
+        torrent_snapshot_poller.clear()
 
     return None
 
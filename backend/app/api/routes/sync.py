@@ -1,6 +1,6 @@
 import inspect
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.schemas import SyncMetadataResponse
@@ -8,6 +8,7 @@ from app.db import SessionLocal, get_db
 from app.models import SyncMetadata
 from app.schedulers.sync_service import SyncService
 from app.services.jellyfin_streams_service import JellyfinStreamsService
+from app.services.response_cache import response_cache
 from app.services.torrent_enrichment_service import TorrentEnrichmentService
 
 router = APIRouter(prefix="/sync", tags=["Synchronization"])
@@ -38,8 +39,11 @@ async def trigger_sync(background_tasks: BackgroundTasks):
 
             # 2. Torrent enrichment from qBittorrent
             torrent_service = TorrentEnrichmentService(db)
-            stats = await torrent_service.enrich_all_items(limit=50)
-            print(f"✅ Torrents enrichis : {stats.get('success')}/{stats.get('total')}")
+            stats = await torrent_service.enrich_all_items()
+            print(
+                f"✅ Torrents enrichis : {stats.get('success')}/{stats.get('total')} "
+                f"({stats.get('rows_written', 0)} écrits, {stats.get('rows_skipped', 0)} inchangés)"
+            )
 
             # 3. Sonarr episodes (all series, batched)
             await sync_service.sync_sonarr_episodes(full_sync=True, batch_size=20)
@@ -64,11 +68,18 @@ async def trigger_sync(background_tasks: BackgroundTasks):
 async def trigger_sonarr_episodes_sync(
     background_tasks: BackgroundTasks,
     full_sync: bool = False,
-    batch_size: int = 5,
+    batch_size: int = Query(default=5, ge=1),
+    concurrency: int = Query(default=5, ge=1, le=20),
+    incremental: bool = False,
 ):
     """Déclencher la synchronisation des épisodes Sonarr"""
 
-    task_kwargs = {"full_sync": full_sync, "batch_size": batch_size}
+    task_kwargs = {
+        "full_sync": full_sync,
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "incremental": incremental,
+    }
     _validate_background_task_call(
         "sync_sonarr_episodes",
         SyncService.sync_sonarr_episodes,
@@ -81,7 +92,10 @@ async def trigger_sonarr_episodes_sync(
         try:
             print("=" * 80)
             print("🚀 EPISODES SYNC STARTED (Background)")
-            print(f"🚀 Parameters: full_sync={full_sync}, batch_size={batch_size}")
+            print(
+                f"🚀 Parameters: full_sync={full_sync}, batch_size={batch_size}, "
+                f"concurrency={concurrency}, incremental={incremental}"
+            )
             print("=" * 80)
 
             sync_service = SyncService(db)
@@ -98,7 +112,10 @@ async def trigger_sonarr_episodes_sync(
     background_tasks.add_task(run_episodes_sync)
 
     return {
-        "message": f"Synchronisation épisodes lancée (full_sync={full_sync}, batch_size={batch_size})",
+        "message": (
+            f"Synchronisation épisodes lancée (full_sync={full_sync}, batch_size={batch_size}, "
+            f"concurrency={concurrency}, incremental={incremental})"
+        ),
         "status": "started",
     }
 
@@ -142,7 +159,7 @@ async def trigger_jellyfin_streams_sync(background_tasks: BackgroundTasks):
 
 
 @router.post("/trigger/torrents")
-async def trigger_torrents_sync(background_tasks: BackgroundTasks, limit: int = 50):
+async def trigger_torrents_sync(background_tasks: BackgroundTasks, limit: int | None = None):
     """Déclencher l'enrichissement des torrents depuis qBittorrent"""
 
     async def run_torrents_sync():
@@ -157,7 +174,8 @@ async def trigger_torrents_sync(background_tasks: BackgroundTasks, limit: int =
             db.close()
 
     background_tasks.add_task(run_torrents_sync)
-    return {"message": f"Enrichissement torrents lancé (limit={limit})", "status": "started"}
+    suffix = f" (limit={limit})" if limit else ""
+    return {"message": f"Enrichissement torrents lancé{suffix}", "status": "started"}
 
 
 @router.post("/trigger/monitored-items")
@@ -285,7 +303,7 @@ async def trigger_service_sync(service_name: str, background_tasks: BackgroundTa
                 await sync_service.sync_sonarr_seasons()
             elif service_name == "qbittorrent":
                 torrent_service = TorrentEnrichmentService(db)
-                await torrent_service.enrich_all_items(limit=50)
+                await torrent_service.enrich_all_items()
         except Exception as e:
             print(f"❌ Error in {service_name} sync: {e}")
         finally:
@@ -300,3 +318,16 @@ async def get_sync_status(db: Session = Depends(get_db)):
     """Récupérer le statut des dernières synchronisations"""
     sync_metadata = db.query(SyncMetadata).all()
     return sync_metadata
+
+
+@router.get("/response-cache")
+async def get_response_cache_stats():
+    """Compteurs hit/miss du cache de réponses des connecteurs"""
+    return response_cache.snapshot()
+
+
+@router.delete("/response-cache")
+async def clear_response_cache():
+    """Vider le cache de réponses des connecteurs"""
+    cleared = response_cache.invalidate()
+    return {"cleared": cleared}
@@ -2,16 +2,18 @@
 Routes pour gérer les torrents (qBittorrent)
 """
 
-import asyncio
 import logging
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db import get_db
 from app.models.models import LibraryItemTorrent, ServiceConfiguration
 from app.services.connector_factory import create_connector
+from app.services.torrent_snapshot import TorrentClientUnavailableError, etag_matches, torrent_snapshot_poller
 
 logger = logging.getLogger(__name__)
 
@@ -19,50 +21,40 @@ router = APIRouter(prefix="/api/torrents", tags=["torrents"])
 
 
 @router.get("/all")
-async def list_all_torrents(db: Session = Depends(get_db)) -> dict[str, Any]:
+async def list_all_torrents(request: Request, db: Session = Depends(get_db)):
     """
     Returns all torrents from the active torrent client plus global transfer stats.
 
+    Served from the server-side snapshot refreshed by the scheduler
+    (TORRENT_SNAPSHOT_INTERVAL_SECONDS); an unchanged snapshot answers
+    If-None-Match with 304 Not Modified.
+
     Response shape:
         {
             "client": "qbittorrent",
             "transfer": { "dl_speed": int, "ul_speed": int, "connection_status": str },
-            "torrents": [ { ...client-agnostic schema... } ]
+            "torrents": [ { ...client-agnostic schema... } ],
+            "generated_at": str (ISO 8601, when this snapshot content was produced)
         }
     """
-    qbt_service = (
-        db.query(ServiceConfiguration)
-        .filter(ServiceConfiguration.service_name == "qbittorrent", ServiceConfiguration.is_active.is_(True))
-        .first()
-    )
-
-    if not qbt_service:
-        raise HTTPException(status_code=404, detail="qBittorrent service not configured")
-
-    connector = create_connector(qbt_service)
     try:
-        authenticated = await connector.login()
-        if not authenticated:
-            raise HTTPException(status_code=503, detail="Could not authenticate with qBittorrent")
-
-        torrents, transfer = await asyncio.gather(
-            connector.get_all_torrents(),
-            connector.get_transfer_info(),
-        )
-
-        return {
-            "client": "qbittorrent",
-            "transfer": transfer,
-            "torrents": torrents,
-        }
-
-    except HTTPException:
-        raise
+        if settings.TORRENT_SNAPSHOT_ENABLED:
+            snapshot = await torrent_snapshot_poller.get_or_refresh(db)
+        else:
+            snapshot = await torrent_snapshot_poller.refresh(db)
+    except TorrentClientUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         logger.error(f"Error fetching all torrents: {e}")
         raise HTTPException(status_code=503, detail=f"qBittorrent unreachable: {e}") from e
-    finally:
-        await connector.close()
+
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="qBittorrent service not configured")
+
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=snapshot.payload, headers=headers)
 
 
 @router.get("/{torrent_hash}")
@@ -26,10 +26,45 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     API_KEY: str
     WEBHOOK_SECRET: str = ""
+    PLAYBACK_WEBHOOK_ASYNC: bool = True
+    PLAYBACK_WEBHOOK_QUEUE_MAX_SIZE: int = 1000
+    PLAYBACK_WEBHOOK_BATCH_SIZE: int = 50
+    PLAYBACK_WEBHOOK_RETRY_AFTER_SECONDS: int = 5
     ACCESS_TOKEN_EXPIRE_HOURS: int = 24
     BOOTSTRAP_ADMIN_USERNAME: str | None = None
     BOOTSTRAP_ADMIN_PASSWORD: str | None = None
 
+    # Sync
+    SYNC_CONCURRENT: bool = True
+    SYNC_MAX_CONCURRENCY: int = 4
+    JELLYSEERR_DETAILS_CACHE_HOURS: int = 168
+    JELLYSEERR_DETAILS_CONCURRENCY: int = 8
+    ARR_HISTORY_PAGE_SIZE: int = 250
+    QBITTORRENT_HASH_CHUNK_SIZE: int = 100
+    QBITTORRENT_HASH_CONCURRENCY: int = 4
+    QBITTORRENT_MAINDATA_ENABLED: bool = True
+    QBITTORRENT_MAINDATA_MAX_AGE_SECONDS: float = 2.0
+    TORRENT_SNAPSHOT_ENABLED: bool = True
+    TORRENT_SNAPSHOT_INTERVAL_SECONDS: int = 5
+    JELLYFIN_STREAMS_BULK: bool = True
+    JELLYFIN_EPISODES_PAGE_SIZE: int = 500
+    JELLYFIN_STREAMS_INCREMENTAL: bool = False
+    JELLYFIN_STREAMS_QUEUE_INTERVAL_SECONDS: int = 30
+    JELLYFIN_STREAMS_BATCH_SIZE: int = 100
+    JELLYFIN_STREAMS_QUEUE_MAX_SIZE: int = 10000
+    JELLYFIN_STREAMS_FULL_SYNC_HOUR: int = 3
+
+    # Shared HTTP clients (connectors)
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 10
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = True
+
+    # Response cache (near-static upstream GETs)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+
     # App Info
     APP_NAME: str = "Pilotarr"
     APP_VERSION: str = "1.0.0"
@@ -31,8 +31,12 @@ def create_analytics_tables():
         "playback_sessions",
         "device_statistics",
         "daily_analytics",
+        "daily_analytic_members",
         "server_metrics",
         "library_item_torrents",
+        "sonarr_series_sync_state",
+        "media_details_cache",
+        "arr_history_state",
     ]
 
     tables_to_create = [t for t in new_tables if t not in existing_tables]
@@ -84,6 +88,14 @@ def create_analytics_tables():
             print(f"❌ Erreur lors de l'ajout de jellyfin_id sur library_items : {e}")
             return False
 
+    # Add sonarr_series_id column to library_items
+    if "library_items" in get_existing_tables():
+        try:
+            migrate_add_sonarr_series_id_to_library_items()
+        except Exception as e:
+            print(f"❌ Erreur lors de l'ajout de sonarr_series_id sur library_items : {e}")
+            return False
+
     # Add media_path column to library_items
     if "library_items" in get_existing_tables():
         try:
@@ -319,6 +331,32 @@ def migrate_add_jellyfin_id_to_library_items():
         db.close()
 
 
+def migrate_add_sonarr_series_id_to_library_items():
+    """Add sonarr_series_id INT column to library_items if it doesn't exist."""
+    from sqlalchemy import text
+
+    from app.db import SessionLocal
+
+    inspector = inspect(engine)
+    columns = {col["name"] for col in inspector.get_columns("library_items")}
+    if "sonarr_series_id" in columns:
+        print("✅ sonarr_series_id already exists on library_items, skipping")
+        return
+
+    print("🔄 Adding sonarr_series_id column to library_items...")
+    db = SessionLocal()
+    try:
+        db.execute(text("ALTER TABLE library_items ADD COLUMN sonarr_series_id INT NULL"))
+        db.execute(text("CREATE INDEX idx_library_items_sonarr_series_id ON library_items (sonarr_series_id)"))
+        db.commit()
+        print("✅ sonarr_series_id column added to library_items")
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
 def migrate_add_media_path_to_library_items():
     """Add media_path TEXT column to library_items if it doesn't exist."""
     from sqlalchemy import text
@@ -21,6 +21,9 @@ from app.db import SessionLocal, check_db_connection, init_db
 from app.db_migrations import create_analytics_tables
 from app.schedulers.analytics_scheduler import analytics_scheduler
 from app.schedulers.scheduler import app_scheduler
+from app.services.http_client_registry import http_client_registry
+from app.services.playback_event_queue import playback_event_queue
+from app.services.qbittorrent_sessions import qbittorrent_session_registry
 
 
 @asynccontextmanager
@@ -50,6 +53,7 @@ async def lifespan(app: FastAPI):
     # Start scheduler (sync every 15 minutes)
     app_scheduler.start(interval_minutes=15)
     analytics_scheduler.start()
+    playback_event_queue.start()
 
     yield
 
@@ -57,6 +61,9 @@ async def lifespan(app: FastAPI):
     print("🛑 Arrêt de l'application...")
     app_scheduler.stop()
     analytics_scheduler.stop()
+    await playback_event_queue.stop()
+    await http_client_registry.aclose()
+    await qbittorrent_session_registry.aclose()
 
 
 # Start FastAPI
@@ -109,4 +116,5 @@ async def health_check():
         "database": "connected" if db_status else "disconnected",
         "scheduler": "running" if app_scheduler.is_running else "stopped",
         "analytics_scheduler": "running" if analytics_scheduler.running else "stopped",
+        "playback_webhook_queue": playback_event_queue.stats(),
     }
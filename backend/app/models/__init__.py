@@ -8,14 +8,17 @@ from app.models.enums import (
     SyncStatus,
 )
 from app.models.models import (
+    ArrHistoryState,
     CalendarEvent,
     DashboardStatistic,
     Episode,
     JellyseerrRequest,
     LibraryItem,
     LibraryItemTorrent,
+    MediaDetailsCache,
     Season,
     ServiceConfiguration,
+    SonarrSeriesSyncState,
     SyncMetadata,
 )
 
@@ -34,6 +37,9 @@ __all__ = [
     "LibraryItemTorrent",
     "Season",
     "Episode",
+    "SonarrSeriesSyncState",
+    "ArrHistoryState",
     "CalendarEvent",
     "JellyseerrRequest",
+    "MediaDetailsCache",
 ]
@@ -116,6 +116,7 @@ class LibraryItem(Base):
     added_date = Column(DateTime(timezone=True), nullable=True)
     size = Column(Text, nullable=False)
     jellyfin_id = Column(String(255), nullable=True, index=True)  # Jellyfin item/series UUID
+    sonarr_series_id = Column(Integer, nullable=True, index=True)  # Sonarr series id (TV only)
     media_path = Column(Text, nullable=True)  # Filesystem path for path-based Jellyfin matching
     torrent_hash = Column(String(255), nullable=True, index=True)
     torrent_info = Column(JSON, nullable=True)
@@ -165,7 +166,7 @@ class Season(Base):
     episode_file_count = Column(Integer, default=0)  # Downloaded episodes
     total_episode_count = Column(Integer, default=0)
     size_on_disk = Column(BigInteger, default=0)
-    statistics = Column(JSON, nullable=True)  # Full Sonarr statistics
+    statistics = Column(JSON, nullable=True)  # Sonarr statistics counters (ArrStatistics.as_json)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -214,7 +215,7 @@ class Episode(Base):
     file_size = Column(BigInteger, nullable=True)
     quality_profile = Column(String(100), nullable=True)
     relative_path = Column(Text, nullable=True)
-    episode_file_info = Column(JSON, nullable=True)  # Full episodeFile object
+    episode_file_info = Column(JSON, nullable=True)  # Subset of the episodeFile object (EpisodeFileRecord.as_json)
     media_streams = Column(JSON, nullable=True)  # Subtitle + audio tracks from Jellyfin
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -231,6 +232,38 @@ class Episode(Base):
     )
 
 
+# Table 4e: Sonarr series sync watermarks (incremental episode sync)
+class SonarrSeriesSyncState(Base):
+    __tablename__ = "sonarr_series_sync_state"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    sonarr_series_id = Column(Integer, unique=True, nullable=False, index=True)
+    library_item_id = Column(String(36), ForeignKey("library_items.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Empreinte des statistiques Sonarr (compteurs, sizeOnDisk, monitoring) lors du dernier fetch
+    fingerprint = Column(String(64), nullable=False)
+    last_synced_at = Column(DateTime(timezone=True), nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# High-water mark du parcours de l'historique Radarr / Sonarr (hash de torrents)
+class ArrHistoryState(Base):
+    __tablename__ = "arr_history_state"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    service_name = Column(String(50), unique=True, nullable=False, index=True)
+
+    # Dernier événement d'historique traité : les runs suivants ne lisent que les plus récents
+    last_history_id = Column(Integer, nullable=False)
+    last_history_date = Column(DateTime(timezone=True))
+    records_harvested = Column(Integer, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 # Table 5: Calendar Events
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
@@ -270,6 +303,20 @@ class JellyseerrRequest(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+# Table 6b: Cache persistant des détails TMDB (via Jellyseerr)
+class MediaDetailsCache(Base):
+    __tablename__ = "media_details_cache"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    tmdb_id = Column(Integer, nullable=False, index=True)
+    media_type = Column(String(10), nullable=False)  # "movie" | "tv" (type Jellyseerr)
+    details = Column(JSON, nullable=False)  # Sous-ensemble utile : titre, dates, poster, synopsis
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (UniqueConstraint("tmdb_id", "media_type", name="uq_media_details_tmdb_type"),)
+
+
 # Table 7: Playback Sessions
 class PlaybackSession(Base):
     """Sessions de lecture des médias"""
@@ -390,6 +437,24 @@ class DailyAnalytic(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+# Table 10b: Daily Analytics members (utilisateurs / médias déjà comptés dans la journée)
+class DailyAnalyticMember(Base):
+    """Ensemble des utilisateurs et médias distincts d'une journée (compteurs unique_* de DailyAnalytic)"""
+
+    __tablename__ = "daily_analytic_members"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+
+    date = Column(Date, nullable=False)
+    kind = Column(String(10), nullable=False)  # "user" ou "media"
+    member_id = Column(String(255), nullable=False)  # user_id ou media_id Jellyfin
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Contrainte d'unicité : un membre compté une seule fois par jour
+    __table_args__ = (Index("idx_daily_member", "date", "kind", "member_id", unique=True),)
+
+
 # Table 11: Server Metrics (Métriques serveur en temps réel)
 class ServerMetric(Base):
     """Métriques du serveur (CPU, RAM, etc.) - Snapshots réguliers"""
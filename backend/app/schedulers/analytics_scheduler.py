@@ -75,7 +75,11 @@ class AnalyticsScheduler:
                     yesterday = (datetime.utcnow() - timedelta(days=1)).date()
                     AnalyticsService.update_device_statistics(db, yesterday)
 
-                    # 3. Nettoyer les vieilles métriques (garder 7 jours)
+                    # 3. Réconcilier les compteurs uniques quotidiens (hier et aujourd'hui)
+                    AnalyticsService.reconcile_daily_analytics(db, yesterday)
+                    AnalyticsService.reconcile_daily_analytics(db, datetime.utcnow().date())
+
+                    # 4. Nettoyer les vieilles métriques (garder 7 jours)
                     MetricsService.cleanup_old_metrics(db, keep_days=7)
 
                 finally:
@@ -1,10 +1,14 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
+from app.core.config import settings
 from app.db import SessionLocal
 from app.schedulers.sync_service import SyncService
+from app.services.jellyfin_stream_queue import jellyfin_stream_queue
 from app.services.jellyfin_streams_service import JellyfinStreamsService
 from app.services.torrent_enrichment_service import TorrentEnrichmentService
+from app.services.torrent_snapshot import torrent_snapshot_poller
 
 
 class AppScheduler:
@@ -25,15 +29,20 @@ class AppScheduler:
             # 2. Enrichissement des torrents
             print("\n🔄 Enrichissement des torrents...")
             torrent_service = TorrentEnrichmentService(db)
-            stats = await torrent_service.enrich_all_items(limit=50)  # Limiter à 50 par run
-            print(f"✅ Torrents enrichis : {stats.get('success')}/{stats.get('total')}")
+            stats = await torrent_service.enrich_all_items()
+            print(
+                f"✅ Torrents enrichis : {stats.get('success')}/{stats.get('total')} "
+                f"({stats.get('rows_written', 0)} écrits, {stats.get('rows_skipped', 0)} inchangés)"
+            )
 
-            # 3. Synchronisation des épisodes Sonarr (toutes les séries, par batch de 20)
-            await sync_service.sync_sonarr_episodes(full_sync=True, batch_size=20)
+            # 3. Synchronisation des épisodes Sonarr (séries modifiées depuis le dernier run, par batch de 20)
+            await sync_service.sync_sonarr_episodes(full_sync=True, batch_size=20, incremental=True)
 
             # 4. Synchronisation des MediaStreams Jellyfin (sous-titres, audio)
-            streams_service = JellyfinStreamsService(db)
-            await streams_service.sync_all()
+            #    En mode incrémental, les webhooks s'en chargent et le scan complet tourne la nuit
+            if not settings.JELLYFIN_STREAMS_INCREMENTAL:
+                streams_service = JellyfinStreamsService(db)
+                await streams_service.sync_all()
 
         except Exception as e:
             import traceback
@@ -43,6 +52,16 @@ class AppScheduler:
         finally:
             db.close()
 
+    async def run_streams_full_sync_job(self):
+        """Scan complet des MediaStreams Jellyfin (réconciliation nocturne du mode incrémental)"""
+        db = SessionLocal()
+        try:
+            await JellyfinStreamsService(db).sync_all()
+        except Exception as e:
+            print(f"❌ Erreur lors du scan complet des streams Jellyfin: {e}")
+        finally:
+            db.close()
+
     def start(self, interval_minutes: int = 15):
         """
         Démarrer le scheduler
@@ -63,6 +82,39 @@ class AppScheduler:
             replace_existing=True,
         )
 
+        # Instantané torrents servi par /api/torrents/all
+        if settings.TORRENT_SNAPSHOT_ENABLED:
+            self.scheduler.add_job(
+                torrent_snapshot_poller.run_job,
+                trigger=IntervalTrigger(seconds=settings.TORRENT_SNAPSHOT_INTERVAL_SECONDS),
+                id="torrent_snapshot_job",
+                name="Instantané des torrents",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+            )
+
+        # MediaStreams Jellyfin : file des webhooks + réconciliation nocturne
+        if settings.JELLYFIN_STREAMS_INCREMENTAL:
+            self.scheduler.add_job(
+                jellyfin_stream_queue.run_job,
+                trigger=IntervalTrigger(seconds=settings.JELLYFIN_STREAMS_QUEUE_INTERVAL_SECONDS),
+                id="jellyfin_streams_queue_job",
+                name="Streams Jellyfin (webhooks)",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+            )
+            self.scheduler.add_job(
+                self.run_streams_full_sync_job,
+                trigger=CronTrigger(hour=settings.JELLYFIN_STREAMS_FULL_SYNC_HOUR),
+                id="jellyfin_streams_full_sync_job",
+                name="Streams Jellyfin (scan complet)",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+            )
+
         # Démarrer le scheduler
         self.scheduler.start()
         self.is_running = True
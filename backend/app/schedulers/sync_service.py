@@ -1,11 +1,19 @@
+import asyncio
+import hashlib
+import json
 import time
+from collections.abc import Callable
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.db import SessionLocal
 from app.models import (
+    ArrHistoryState,
     CalendarEvent,
     CalendarStatus,
     DashboardStatistic,
@@ -13,24 +21,107 @@ from app.models import (
     JellyseerrRequest,
     LibraryItem,
     LibraryItemTorrent,
+    MediaDetailsCache,
     MediaType,
     RequestPriority,
     RequestStatus,
     Season,
     ServiceConfiguration,
     ServiceType,
+    SonarrSeriesSyncState,
     StatType,
     SyncMetadata,
     SyncStatus,
 )
+from app.models.models import generate_uuid
 from app.services import JellyfinConnector, JellyseerrConnector, RadarrConnector, SonarrConnector
+from app.services.arr_history import HistoryCursor
+from app.services.arr_records import EpisodeFileRecord, EpisodeRecord, SeriesRecord
+from app.services.library_resolver import library_item_resolver
+
+
+def _library_key(title: str | None, year: int | None) -> tuple[str, int | None]:
+    """Clé de correspondance (titre normalisé, année), insensible à la casse comme la collation MySQL"""
+    return ((title or "").strip().lower(), year)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    """Rendre une date timezone-aware (SQLite renvoie des datetimes naïfs)"""
+    return dt if dt.tzinfo else dt.replace(tzinfo=UTC)
+
+
+class SonarrSeriesIndex:
+    """
+    Index O(1) des séries Sonarr, par id Sonarr et par (titre, année).
+
+    Le titre principal est prioritaire ; les titres alternatifs ne sont indexés
+    que s'ils ne masquent pas la clé d'une autre série.
+    """
+
+    def __init__(self, series_list: list[SeriesRecord]):
+        self.by_id: dict[int, SeriesRecord] = {}
+        self.by_key: dict[tuple[str, int | None], SeriesRecord] = {}
+
+        for series in series_list:
+            if series.id is not None:
+                self.by_id.setdefault(series.id, series)
+            self.by_key.setdefault(_library_key(series.title, series.year), series)
+
+        for series in series_list:
+            for alt_title in series.alternate_titles:
+                self.by_key.setdefault(_library_key(alt_title, series.year), series)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def match(self, item: LibraryItem) -> SeriesRecord | None:
+        """
+        Trouver la série Sonarr d'un LibraryItem : id persisté d'abord, puis (titre, année)
+
+        Un id persisté absent de Sonarr (série supprimée puis rajoutée sous un nouvel id)
+        n'empêche pas le repli sur (titre, année) ; l'appelant met l'id à jour.
+        """
+        if item.sonarr_series_id is not None and item.sonarr_series_id in self.by_id:
+            return self.by_id[item.sonarr_series_id]
+        return self.by_key.get(_library_key(item.title, item.year))
 
 
 class SyncService:
     """Service de synchronisation des données depuis les APIs externes"""
 
-    def __init__(self, db: Session):
+    # Colonnes d'Episode alimentées par Sonarr (comparées avant chaque mise à jour)
+    EPISODE_SYNC_FIELDS: tuple[str, ...] = (
+        "title",
+        "overview",
+        "air_date",
+        "monitored",
+        "has_file",
+        "downloaded",
+        "sonarr_episode_file_id",
+        "file_size",
+        "quality_profile",
+        "relative_path",
+        "episode_file_info",
+    )
+
+    # Nombre de sonarr_episode_id par requête IN lors du préchargement des épisodes
+    EPISODE_LOOKUP_CHUNK_SIZE = 500
+
+    # Champs des détails TMDB conservés dans media_details_cache
+    MEDIA_DETAILS_FIELDS: tuple[str, ...] = ("title", "name", "releaseDate", "firstAirDate", "posterPath", "overview")
+
+    # Étapes indépendantes exécutées par sync_all (clé du résultat, méthode)
+    SYNC_ALL_STEPS: tuple[tuple[str, str], ...] = (
+        ("radarr", "sync_radarr"),
+        ("sonarr", "sync_sonarr"),
+        ("jellyfin", "sync_jellyfin"),
+        ("jellyseerr", "sync_jellyseerr"),
+        ("monitored_items", "sync_monitored_items"),
+    )
+
+    def __init__(self, db: Session, session_factory: Callable[[], Session] = SessionLocal):
         self.db = db
+        self.session_factory = session_factory
 
     def get_active_service(self, service_type: ServiceType) -> ServiceConfiguration:
         """Récupérer la configuration d'un service actif"""
@@ -68,6 +159,83 @@ class SyncService:
                 )
             )
 
+    @staticmethod
+    def _parse_iso_datetime(raw: str | None) -> datetime | None:
+        """Parser une date ISO 8601 des *arr (suffixe Z accepté), None si invalide"""
+        if not raw:
+            return None
+        try:
+            return datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        except (ValueError, TypeError):
+            return None
+
+    def _load_library_index(self, media_type: MediaType) -> dict[tuple[str, int | None], dict[str, Any]]:
+        """Charger en une requête les LibraryItems d'un type, indexés par (titre, année)"""
+        rows = (
+            self.db.query(
+                LibraryItem.id,
+                LibraryItem.title,
+                LibraryItem.year,
+                LibraryItem.torrent_hash,
+                LibraryItem.nb_media,
+                LibraryItem.media_path,
+                LibraryItem.size,
+                LibraryItem.quality,
+                LibraryItem.added_date,
+            )
+            .filter(LibraryItem.media_type == media_type)
+            .all()
+        )
+        index: dict[tuple[str, int | None], dict[str, Any]] = {}
+        for row in rows:
+            # Premier arrivé conservé, comme le .first() de la recherche unitaire
+            index.setdefault(_library_key(row.title, row.year), dict(row._mapping))
+        return index
+
+    def _load_torrent_pairs(self, media_type: MediaType) -> set[tuple[str, str]]:
+        """Charger en une requête les paires (library_item_id, torrent_hash) existantes pour un type de média"""
+        rows = (
+            self.db.query(LibraryItemTorrent.library_item_id, LibraryItemTorrent.torrent_hash)
+            .join(LibraryItem, LibraryItem.id == LibraryItemTorrent.library_item_id)
+            .filter(LibraryItem.media_type == media_type)
+            .all()
+        )
+        return {(row.library_item_id, row.torrent_hash) for row in rows}
+
+    def _load_history_watermark(self, service_type: ServiceType) -> ArrHistoryState | None:
+        """High-water mark de l'historique d'un service *arr (None = jamais parcouru)"""
+        return self.db.query(ArrHistoryState).filter(ArrHistoryState.service_name == service_type.value).first()
+
+    def _record_history_watermark(
+        self, service_type: ServiceType, state: ArrHistoryState | None, cursor: HistoryCursor
+    ) -> None:
+        """
+        Avancer le high-water mark après un parcours complet de l'historique
+
+        Écrit dans la même transaction que les hash : un run en échec est annulé avec
+        son watermark. Un parcours interrompu ne l'avance pas, pour ne perdre aucune page.
+        """
+        if not cursor.complete or cursor.last_id is None:
+            return
+        if state is None:
+            state = ArrHistoryState(service_name=service_type.value, records_harvested=0)
+            self.db.add(state)
+        state.last_history_id = cursor.last_id
+        state.last_history_date = self._parse_iso_datetime(cursor.last_date)
+        state.records_harvested = (state.records_harvested or 0) + cursor.records
+
+    def _bulk_write(
+        self,
+        model: type,
+        inserts: list[dict[str, Any]] | None = None,
+        updates: list[dict[str, Any]] | None = None,
+    ):
+        """Insertions et mises à jour (par clé primaire) groupées en executemany"""
+        if inserts:
+            self.db.execute(insert(model), inserts)
+        if updates:
+            self.db.execute(update(model), updates)
+
     def update_sync_metadata(
         self, service_type: ServiceType, status: SyncStatus, records: int = 0, duration_ms: int = 0, error: str = None
     ):
@@ -114,7 +282,10 @@ class SyncService:
             radarr_service = self.get_active_service(ServiceType.RADARR)
             if radarr_service:
                 radarr_connector = RadarrConnector(
-                    base_url=radarr_service.url, api_key=radarr_service.api_key, port=radarr_service.port
+                    base_url=radarr_service.url,
+                    api_key=radarr_service.api_key,
+                    port=radarr_service.port,
+                    shared_client=True,
                 )
 
                 try:
@@ -136,7 +307,10 @@ class SyncService:
             sonarr_service = self.get_active_service(ServiceType.SONARR)
             if sonarr_service:
                 sonarr_connector = SonarrConnector(
-                    base_url=sonarr_service.url, api_key=sonarr_service.api_key, port=sonarr_service.port
+                    base_url=sonarr_service.url,
+                    api_key=sonarr_service.api_key,
+                    port=sonarr_service.port,
+                    shared_client=True,
                 )
 
                 try:
@@ -202,130 +376,140 @@ class SyncService:
             print("⚠️ Service Radarr non configuré")
             return {"success": False, "message": "Service non configuré"}
 
-        connector = RadarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        connector = RadarrConnector(
+            base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True
+        )
 
         try:
             # Récupérer tous les films
-            all_movies = await connector.get_movies()
+            all_movies = await connector.get_movie_records()
 
             # Profils de qualité {id: name}
             quality_profiles = await connector.get_quality_profiles()
 
-            # Récupérer la map movieId -> torrent_hash
-            movie_hash_map = await connector.get_movie_history_map()
-            print(f"📥 {len(movie_hash_map)} hash de torrents récupérés depuis Radarr")
+            # Récupérer la map movieId -> torrent_hash (historique complet au premier run, puis nouvelles pages)
+            history_state = self._load_history_watermark(ServiceType.RADARR)
+            history_cursor = HistoryCursor()
+            movie_hash_map = await connector.get_movie_history_map(
+                after_id=history_state.last_history_id if history_state else None, cursor=history_cursor
+            )
+            print(
+                f"📥 {len(movie_hash_map)} hash de torrents récupérés depuis Radarr "
+                f"({history_cursor.records} événements d'historique lus)"
+            )
             print(f"📽️  {len(all_movies)} films trouvés dans Radarr")
 
-            # Ajouter à la DB (éviter les doublons)
+            # Index en mémoire des films et des paires (item, hash) déjà en base : 2 requêtes au total
+            movie_index = self._load_library_index(MediaType.MOVIE)
+            torrent_pairs = self._load_torrent_pairs(MediaType.MOVIE)
+
+            item_inserts: list[dict[str, Any]] = []
+            item_updates: list[dict[str, Any]] = []
+            torrent_inserts: list[dict[str, Any]] = []
+
             added_count = 0
             updated_count = 0
 
             for movie in all_movies:
                 # Vérifier si existe déjà (par titre + année)
-                existing = (
-                    self.db.query(LibraryItem)
-                    .filter(
-                        LibraryItem.title == movie.get("title"),
-                        LibraryItem.year == movie.get("year"),
-                        LibraryItem.media_type == MediaType.MOVIE,
-                    )
-                    .first()
-                )
+                key = _library_key(movie.title, movie.year)
+                existing = movie_index.get(key)
 
                 # Récupérer le torrent_hash depuis la map
-                movie_id = movie.get("id")
-                torrent_hash = movie_hash_map.get(movie_id) if movie_id else None
+                torrent_hash = movie_hash_map.get(movie.id) if movie.id else None
 
-                nb_media = 1 if movie.get("hasFile") else 0
+                nb_media = 1 if movie.has_file else 0
 
                 # Résoudre la qualité: fichier téléchargé > profil
-                file_quality = movie.get("movieFile", {}).get("quality", {}).get("quality", {}).get("name")
-                profile_id = movie.get("qualityProfileId")
+                profile_id = movie.quality_profile_id
                 profile_name = quality_profiles.get(profile_id, "") if profile_id else ""
-                resolved_quality = file_quality or profile_name or "Unknown"
+                resolved_quality = movie.file_quality or profile_name or "Unknown"
 
                 # Extract media_path: parent folder of the movie file
-                movie_file_path = movie.get("movieFile", {}).get("path")
-                media_path = str(Path(movie_file_path).parent) if movie_file_path else None
+                media_path = str(Path(movie.file_path).parent) if movie.file_path else None
 
                 if existing:
+                    changes: dict[str, Any] = {}
                     # Mettre à jour le hash si on en a un et qu'il n'existe pas encore
-                    if torrent_hash and not existing.torrent_hash:
-                        existing.torrent_hash = torrent_hash
-                        existing.updated_at = datetime.now(UTC)
+                    if torrent_hash and not existing["torrent_hash"]:
+                        changes["torrent_hash"] = torrent_hash
+                        changes["updated_at"] = datetime.now(UTC)
                         updated_count += 1
-                        print(f"  🔄 Mise à jour hash pour: {movie.get('title')} - {torrent_hash[:8]}...")
-                    # Write to junction table
-                    if torrent_hash:
-                        self._upsert_torrent(existing.id, torrent_hash)
+                        print(f"  🔄 Mise à jour hash pour: {movie.title} - {torrent_hash[:8]}...")
                     # Toujours mettre à jour nb_media
-                    existing.nb_media = nb_media
+                    if existing["nb_media"] != nb_media:
+                        changes["nb_media"] = nb_media
                     # Update media_path
-                    if media_path:
-                        existing.media_path = media_path
+                    if media_path and existing["media_path"] != media_path:
+                        changes["media_path"] = media_path
                     # Mettre à jour la taille si elle était à 0
-                    size_bytes = movie.get("sizeOnDisk", 0)
+                    size_bytes = movie.size_on_disk
                     if size_bytes > 0:
                         size_gb = round(size_bytes / (1024**3), 1)
-                        existing.size = f"{size_gb} GB"
+                        if existing["size"] != f"{size_gb} GB":
+                            changes["size"] = f"{size_gb} GB"
                     # Mettre à jour la qualité si elle était un chiffre (ancien format)
-                    if existing.quality and existing.quality.isdigit():
-                        existing.quality = resolved_quality
+                    if existing["quality"] and existing["quality"].isdigit():
+                        changes["quality"] = resolved_quality
                     # Repopulate added_date if missing (e.g. after migration from TEXT)
-                    if existing.added_date is None:
-                        raw = movie.get("added", "")
-                        if raw:
-                            try:
-                                existing.added_date = datetime.fromisoformat(raw.replace("Z", "+00:00"))
-                            except (ValueError, TypeError):
-                                pass
+                    if existing["added_date"] is None:
+                        added_dt = self._parse_iso_datetime(movie.added)
+                        if added_dt:
+                            changes["added_date"] = added_dt
+
+                    if changes:
+                        existing.update(changes)
+                        item_updates.append({"id": existing["id"], **changes})
+                    item_id = existing["id"]
                 else:
                     # Calculer la taille
-                    size_bytes = movie.get("sizeOnDisk", 0)
-                    size_gb = round(size_bytes / (1024**3), 1)
-
-                    # Date d'ajout
-                    added_date = movie.get("added", "")
-                    added_dt = None
-                    if added_date:
-                        try:
-                            added_dt = datetime.fromisoformat(added_date.replace("Z", "+00:00"))
-                        except (ValueError, TypeError):
-                            pass
-
-                    # Récupérer l'image
-                    image_url = ""
-                    for img in movie.get("images", []):
-                        if img.get("coverType") == "poster":
-                            image_url = img.get("remoteUrl", "")
-                            break
-
-                    if not image_url and movie.get("images"):
-                        image_url = movie.get("images", [{}])[0].get("remoteUrl", "")
-
-                    item = LibraryItem(
-                        title=movie.get("title", "Unknown"),
-                        year=movie.get("year", 0),
-                        media_type=MediaType.MOVIE,
-                        image_url=image_url,
-                        image_alt=f"{movie.get('title')} poster",
-                        quality=resolved_quality,
-                        rating=str(movie.get("ratings", {}).get("imdb", {}).get("value", "")),
-                        description=movie.get("overview", ""),
-                        added_date=added_dt,
-                        size=f"{size_gb} GB",
-                        torrent_hash=torrent_hash,
-                        nb_media=nb_media,
-                        media_path=media_path,
-                    )
-
-                    self.db.add(item)
-                    self.db.flush()  # Ensure item.id is available
+                    size_gb = round(movie.size_on_disk / (1024**3), 1)
+
+                    item_id = generate_uuid()
+                    row = {
+                        "id": item_id,
+                        "title": movie.title or "Unknown",
+                        "year": movie.year or 0,
+                        "media_type": MediaType.MOVIE,
+                        "image_url": movie.poster_url,
+                        "image_alt": f"{movie.title} poster",
+                        "quality": resolved_quality,
+                        "rating": movie.rating,
+                        "description": movie.overview,
+                        "added_date": self._parse_iso_datetime(movie.added),
+                        "size": f"{size_gb} GB",
+                        "torrent_hash": torrent_hash,
+                        "nb_media": nb_media,
+                        "media_path": media_path,
+                    }
+                    item_inserts.append(row)
+                    movie_index[key] = row
                     added_count += 1
 
                     if torrent_hash:
-                        self._upsert_torrent(item.id, torrent_hash)
-                        print(f"  ✅ {movie.get('title')} - hash: {torrent_hash[:8]}...")
+                        print(f"  ✅ {movie.title} - hash: {torrent_hash[:8]}...")
+
+                # Write to junction table
+                if torrent_hash and (item_id, torrent_hash) not in torrent_pairs:
+                    torrent_pairs.add((item_id, torrent_hash))
+                    torrent_inserts.append(
+                        {
+                            "id": generate_uuid(),
+                            "library_item_id": item_id,
+                            "torrent_hash": torrent_hash,
+                            "episode_id": None,
+                            "season_number": None,
+                            "is_season_pack": False,
+                        }
+                    )
+
+            # Écritures groupées (executemany) au lieu d'un aller-retour par film
+            self._bulk_write(LibraryItem, inserts=item_inserts, updates=item_updates)
+            self._bulk_write(LibraryItemTorrent, inserts=torrent_inserts)
+            print(
+                f"  💾 Écriture groupée: {len(item_inserts)} insertions, {len(item_updates)} mises à jour, "
+                f"{len(torrent_inserts)} torrents"
+            )
 
             # Récupérer le calendrier (passé + futur)
             calendar = await connector.get_calendar(days_ahead=30, days_behind=30)
@@ -377,7 +561,10 @@ class SyncService:
 
                 calendar_count += 1
 
+            self._record_history_watermark(ServiceType.RADARR, history_state, history_cursor)
             self.db.commit()
+            # Index Jellyfin → LibraryItem des webhooks de lecture
+            library_item_resolver.warm(self.db, MediaType.MOVIE)
 
             duration_ms = int((time.time() - start_time) * 1000)
             self.update_sync_metadata(ServiceType.RADARR, SyncStatus.SUCCESS, added_count + calendar_count, duration_ms)
@@ -402,34 +589,38 @@ class SyncService:
         if not service:
             return {"success": False, "message": "Service non configuré"}
 
-        connector = SonarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        connector = SonarrConnector(
+            base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True
+        )
 
         try:
             # Get all TV show items
             series_items = self.db.query(LibraryItem).filter(LibraryItem.media_type == MediaType.TV).all()
 
             # Get all series from Sonarr (with embedded seasons)
-            series_list = await connector.get_series()
+            series_list = await connector.get_series_records()
 
             seasons_synced = 0
             seasons_updated = 0
 
+            series_index = SonarrSeriesIndex(series_list)
+
             for item in series_items:
-                # Find Sonarr series by title + year
-                series_data = next(
-                    (s for s in series_list if s.get("title") == item.title and s.get("year") == item.year), None
-                )
+                series_data = series_index.match(item)
 
-                if not series_data or "seasons" not in series_data:
+                if not series_data or not series_data.seasons:
                     continue
 
+                if item.sonarr_series_id != series_data.id:
+                    item.sonarr_series_id = series_data.id
+
                 # Upsert seasons from embedded data
-                for season_data in series_data["seasons"]:
-                    season_num = season_data.get("seasonNumber")
+                for season_data in series_data.seasons:
+                    season_num = season_data.season_number
                     if season_num is None:
                         continue
 
-                    stats = season_data.get("statistics", {})
+                    stats = season_data.statistics
 
                     existing = (
                         self.db.query(Season)
@@ -439,25 +630,25 @@ class SyncService:
 
                     if existing:
                         # Update existing season
-                        existing.monitored = season_data.get("monitored", True)
-                        existing.episode_count = stats.get("episodeCount", 0)
-                        existing.episode_file_count = stats.get("episodeFileCount", 0)
-                        existing.total_episode_count = stats.get("totalEpisodeCount", 0)
-                        existing.size_on_disk = stats.get("sizeOnDisk", 0)
-                        existing.statistics = stats
+                        existing.monitored = season_data.monitored
+                        existing.episode_count = stats.episode_count or 0
+                        existing.episode_file_count = stats.episode_file_count or 0
+                        existing.total_episode_count = stats.total_episode_count or 0
+                        existing.size_on_disk = stats.size_on_disk or 0
+                        existing.statistics = stats.as_json()
                         seasons_updated += 1
                     else:
                         # Create new season
                         new_season = Season(
                             library_item_id=item.id,
-                            sonarr_series_id=series_data["id"],
+                            sonarr_series_id=series_data.id,
                             season_number=season_num,
-                            monitored=season_data.get("monitored", True),
-                            episode_count=stats.get("episodeCount", 0),
-                            episode_file_count=stats.get("episodeFileCount", 0),
-                            total_episode_count=stats.get("totalEpisodeCount", 0),
-                            size_on_disk=stats.get("sizeOnDisk", 0),
-                            statistics=stats,
+                            monitored=season_data.monitored,
+                            episode_count=stats.episode_count or 0,
+                            episode_file_count=stats.episode_file_count or 0,
+                            total_episode_count=stats.total_episode_count or 0,
+                            size_on_disk=stats.size_on_disk or 0,
+                            statistics=stats.as_json(),
                         )
                         self.db.add(new_season)
                         seasons_synced += 1
@@ -483,56 +674,83 @@ class SyncService:
             print("⚠️ Service Sonarr non configuré")
             return {"success": False, "message": "Service non configuré"}
 
-        connector = SonarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        connector = SonarrConnector(
+            base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True
+        )
 
         try:
             # Récupérer toutes les séries
-            all_series = await connector.get_series()
+            all_series = await connector.get_series_records()
 
             # Profils de qualité {id: name}
             quality_profiles = await connector.get_quality_profiles()
 
             # Récupérer la map seriesId -> [{hash, episode_id, season_number, is_season_pack}, ...]
-            series_torrents_map = await connector.get_series_torrents_map()
+            # (historique complet au premier run, puis seulement les nouvelles pages)
+            history_state = self._load_history_watermark(ServiceType.SONARR)
+            history_cursor = HistoryCursor()
+            series_torrents_map = await connector.get_series_torrents_map(
+                after_id=history_state.last_history_id if history_state else None, cursor=history_cursor
+            )
             total_hashes = sum(len(v) for v in series_torrents_map.values())
-            print(f"📥 {total_hashes} hash de torrents récupérés depuis Sonarr ({len(series_torrents_map)} séries)")
+            print(
+                f"📥 {total_hashes} hash de torrents récupérés depuis Sonarr ({len(series_torrents_map)} séries, "
+                f"{history_cursor.records} événements d'historique lus)"
+            )
             print(f"📺 {len(all_series)} séries trouvées dans Sonarr")
 
             added_count = 0
             updated_count = 0
 
+            # Index des séries déjà en base : par id Sonarr persisté, puis par (titre, année)
+            tv_items = self.db.query(LibraryItem).filter(LibraryItem.media_type == MediaType.TV).all()
+            items_by_series_id: dict[int, LibraryItem] = {}
+            items_by_key: dict[tuple[str, int | None], LibraryItem] = {}
+            for tv_item in tv_items:
+                if tv_item.sonarr_series_id is not None:
+                    items_by_series_id.setdefault(tv_item.sonarr_series_id, tv_item)
+                items_by_key.setdefault(_library_key(tv_item.title, tv_item.year), tv_item)
+
+            # Un id persisté absent de cette liste (série supprimée puis rajoutée dans Sonarr)
+            # ne protège plus l'item : il est rapproché par (titre, année) et son id mis à jour
+            live_series_ids = {series.id for series in all_series if series.id is not None}
+
             for series in all_series:
-                existing = (
-                    self.db.query(LibraryItem)
-                    .filter(
-                        LibraryItem.title == series.get("title"),
-                        LibraryItem.year == series.get("year"),
-                        LibraryItem.media_type == MediaType.TV,
-                    )
-                    .first()
-                )
+                series_id = series.id
+                existing = items_by_series_id.get(series_id) if series_id is not None else None
+                if existing is None:
+                    candidate = items_by_key.get(_library_key(series.title, series.year))
+                    if candidate is not None and (
+                        candidate.sonarr_series_id in (None, series_id)
+                        or candidate.sonarr_series_id not in live_series_ids
+                    ):
+                        existing = candidate
 
                 # Récupérer les torrents depuis la map
-                series_id = series.get("id")
                 torrent_entries = series_torrents_map.get(series_id, []) if series_id else []
                 first_hash = torrent_entries[0]["hash"] if torrent_entries else None
 
-                nb_media = series.get("statistics", {}).get("episodeFileCount", 0)
+                nb_media = series.statistics.episode_file_count or 0
+                size_bytes = series.statistics.size_on_disk or 0
 
                 # Résoudre la qualité depuis le profil (les séries n'ont pas de fichier unique)
-                profile_id = series.get("qualityProfileId")
+                profile_id = series.quality_profile_id
                 resolved_quality = quality_profiles.get(profile_id, "Unknown") if profile_id else "Unknown"
 
                 # Extract media_path: Sonarr provides series.path directly
-                media_path = series.get("path")
+                media_path = series.path
 
                 if existing:
+                    if series_id is not None and existing.sonarr_series_id != series_id:
+                        items_by_series_id.pop(existing.sonarr_series_id, None)
+                        existing.sonarr_series_id = series_id
+                        items_by_series_id[series_id] = existing
                     # Mettre à jour le hash si on en a un et qu'il n'existe pas encore
                     if first_hash and not existing.torrent_hash:
                         existing.torrent_hash = first_hash
                         existing.updated_at = datetime.now(UTC)
                         updated_count += 1
-                        print(f"  🔄 Mise à jour hash pour: {series.get('title')} - {first_hash[:8]}...")
+                        print(f"  🔄 Mise à jour hash pour: {series.title} - {first_hash[:8]}...")
                     # Upsert all torrents into junction table
                     for entry in torrent_entries:
                         self._upsert_torrent(
@@ -548,7 +766,6 @@ class SyncService:
                     if media_path:
                         existing.media_path = media_path
                     # Mettre à jour la taille si elle était à 0
-                    size_bytes = series.get("statistics", {}).get("sizeOnDisk", 0)
                     if size_bytes > 0:
                         size_gb = round(size_bytes / (1024**3), 1)
                         existing.size = f"{size_gb} GB"
@@ -557,53 +774,33 @@ class SyncService:
                         existing.quality = resolved_quality
                     # Repopulate added_date if missing (e.g. after migration from TEXT)
                     if existing.added_date is None:
-                        raw = series.get("added", "")
-                        if raw:
-                            try:
-                                existing.added_date = datetime.fromisoformat(raw.replace("Z", "+00:00"))
-                            except (ValueError, TypeError):
-                                pass
+                        existing.added_date = self._parse_iso_datetime(series.added)
                 else:
-                    size_bytes = series.get("statistics", {}).get("sizeOnDisk", 0)
                     size_gb = round(size_bytes / (1024**3), 1)
 
-                    added_date = series.get("added", "")
-                    added_dt = None
-                    if added_date:
-                        try:
-                            added_dt = datetime.fromisoformat(added_date.replace("Z", "+00:00"))
-                        except (ValueError, TypeError):
-                            pass
-
-                    # Récupérer l'image
-                    image_url = ""
-                    for img in series.get("images", []):
-                        if img.get("coverType") == "poster":
-                            image_url = img.get("remoteUrl", "")
-                            break
-
-                    if not image_url and series.get("images"):
-                        image_url = series.get("images", [{}])[0].get("remoteUrl", "")
-
                     item = LibraryItem(
-                        title=series.get("title", "Unknown"),
-                        year=series.get("year", 0),
+                        title=series.title or "Unknown",
+                        year=series.year or 0,
                         media_type=MediaType.TV,
-                        image_url=image_url,
-                        image_alt=f"{series.get('title')} poster",
+                        image_url=series.poster_url,
+                        image_alt=f"{series.title} poster",
                         quality=resolved_quality,
-                        rating=str(series.get("ratings", {}).get("value", "")),
-                        description=series.get("overview", ""),
-                        added_date=added_dt,
+                        rating=series.rating,
+                        description=series.overview,
+                        added_date=self._parse_iso_datetime(series.added),
                         size=f"{size_gb} GB",
                         torrent_hash=first_hash,
                         nb_media=nb_media,
                         media_path=media_path,
+                        sonarr_series_id=series_id,
                     )
 
                     self.db.add(item)
                     self.db.flush()  # Ensure item.id is available
                     added_count += 1
+                    if series_id is not None:
+                        items_by_series_id[series_id] = item
+                    items_by_key.setdefault(_library_key(item.title, item.year), item)
 
                     # Write all torrents to junction table
                     for entry in torrent_entries:
@@ -616,10 +813,7 @@ class SyncService:
                         )
 
                     if first_hash:
-                        print(
-                            f"  ✅ {series.get('title')} - {len(torrent_entries)} torrent(s), "
-                            f"first: {first_hash[:8]}..."
-                        )
+                        print(f"  ✅ {series.title} - {len(torrent_entries)} torrent(s), first: {first_hash[:8]}...")
 
             # Récupérer le calendrier (passé + futur, includeSeries=true dans le connector)
             calendar = await connector.get_calendar(days_ahead=30, days_behind=30)
@@ -690,7 +884,9 @@ class SyncService:
 
                 calendar_count += 1
 
+            self._record_history_watermark(ServiceType.SONARR, history_state, history_cursor)
             self.db.commit()
+            library_item_resolver.warm(self.db, MediaType.TV)
 
             # Sync seasons after syncing series
             seasons_result = await self.sync_sonarr_seasons()
@@ -715,13 +911,97 @@ class SyncService:
         finally:
             await connector.close()
 
-    async def sync_sonarr_episodes(self, full_sync: bool = True, batch_size: int = 20) -> dict[str, Any]:
+    @staticmethod
+    def _series_fingerprint(series: SeriesRecord) -> str:
+        """Empreinte des champs Sonarr qui bougent quand les épisodes d'une série changent"""
+        stats = series.statistics
+        payload = {
+            "monitored": series.monitored,
+            "episodeCount": stats.episode_count,
+            "episodeFileCount": stats.episode_file_count,
+            "totalEpisodeCount": stats.total_episode_count,
+            "sizeOnDisk": stats.size_on_disk,
+            "previousAiring": series.previous_airing,
+            "seasons": [
+                (
+                    season.season_number,
+                    season.monitored,
+                    season.statistics.episode_file_count,
+                    season.statistics.total_episode_count,
+                    season.statistics.size_on_disk,
+                )
+                for season in series.seasons
+            ],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def _load_series_history_changes(
+        self, connector: SonarrConnector, sync_states: dict[int, SonarrSeriesSyncState]
+    ) -> dict[int, datetime] | None:
+        """
+        {seriesId: date du dernier événement d'historique} depuis le plus ancien watermark connu
+
+        None si l'historique Sonarr est indisponible : sans lui, une série à
+        l'empreinte inchangée ne peut pas être sautée sans risque.
+        """
+        if not sync_states:
+            return {}
+
+        since = min(_as_utc(state.last_synced_at) for state in sync_states.values())
+        records = await connector.get_history_since(since)
+        if records is None:
+            return None
+
+        changes: dict[int, datetime] = {}
+        for record in records:
+            series_id = record.get("seriesId")
+            event_date = self._parse_iso_datetime(record.get("date"))
+            if series_id is None or event_date is None:
+                continue
+            if series_id not in changes or event_date > changes[series_id]:
+                changes[series_id] = event_date
+        return changes
+
+    def _record_series_sync_state(
+        self,
+        sync_states: dict[int, SonarrSeriesSyncState],
+        item: LibraryItem,
+        series_id: int,
+        fingerprint: str,
+        synced_at: datetime,
+    ) -> None:
+        """Enregistrer le watermark d'une série après un fetch complet"""
+        state = sync_states.get(series_id)
+        if state is None:
+            state = SonarrSeriesSyncState(sonarr_series_id=series_id, library_item_id=item.id)
+            self.db.add(state)
+            sync_states[series_id] = state
+        state.library_item_id = item.id
+        state.fingerprint = fingerprint
+        state.last_synced_at = synced_at
+
+    async def sync_sonarr_episodes(
+        self, full_sync: bool = True, batch_size: int = 20, concurrency: int = 5, incremental: bool = False
+    ) -> dict[str, Any]:
         """
         Sync episodes for all TV shows in batches.
 
+        Episodes and episode files are fetched through a sliding window (at most
+        ``concurrency`` series in flight, independently of ``batch_size``): series
+        are read from the DB ``batch_size`` at a time, and every ``batch_size``
+        fetched series are written and committed while the next fetches run.
+
+        A per-series watermark (SonarrSeriesSyncState) is recorded after every fetch.
+        In incremental mode, series whose Sonarr statistics are unchanged and that
+        have no history event since their watermark are skipped (their watermark
+        still moves to this run). If the Sonarr history cannot be fetched, every
+        series is re-fetched.
+
         Args:
             full_sync: If True, sync all series. If False, only monitored.
-            batch_size: Number of series processed per batch (default 20).
+            batch_size: Number of series read and written per batch (default 20).
+            concurrency: Max number of series fetched from Sonarr in parallel (default 5).
+            incremental: If True, only re-fetch series changed since the last run.
         """
         print("📺 Synchronisation des épisodes Sonarr...")
         start_time = time.time()
@@ -731,7 +1011,9 @@ class SyncService:
             print("⚠️ Service Sonarr non configuré")
             return {"success": False, "message": "Service non configuré"}
 
-        connector = SonarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        connector = SonarrConnector(
+            base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True
+        )
 
         try:
             # Count total series to process
@@ -746,156 +1028,144 @@ class SyncService:
 
             if total_series == 0:
                 print("  ⚠️  No series found to sync")
-                return {"success": True, "series_processed": 0, "episodes_synced": 0, "episodes_updated": 0}
+                return {
+                    "success": True,
+                    "series_processed": 0,
+                    "series_skipped": 0,
+                    "series_failed": 0,
+                    "episodes_synced": 0,
+                    "episodes_updated": 0,
+                }
 
             print(f"  📊 {total_series} series to sync in batches of {batch_size} (full_sync={full_sync})")
 
             # Fetch Sonarr series list once for all batches
-            series_list = await connector.get_series()
-            print(f"  📡 Fetched {len(series_list)} series from Sonarr")
+            # Watermark posé au début du run : un événement survenu pendant le fetch sera revu au prochain
+            run_started_at = datetime.now(UTC)
+            series_index = SonarrSeriesIndex(await connector.get_series_records())
+            print(f"  📡 Fetched {len(series_index)} series from Sonarr")
+
+            # Watermarks des séries encore présentes dans Sonarr : celui d'une série supprimée
+            # (ou rajoutée sous un nouvel id) bloquerait /history/since à sa date
+            sync_states = {
+                state.sonarr_series_id: state
+                for state in self.db.query(SonarrSeriesSyncState).all()
+                if state.sonarr_series_id in series_index.by_id
+            }
+            history_changes = await self._load_series_history_changes(connector, sync_states) if incremental else {}
+            if history_changes is None:
+                print("  ⚠️  Historique Sonarr indisponible : récupération de toutes les séries")
+                incremental = False
+                history_changes = {}
 
             episodes_synced = 0
             episodes_updated = 0
             series_processed = 0
-            offset = 0
-
-            while offset < total_series:
-                batch = base_query.order_by(LibraryItem.id).offset(offset).limit(batch_size).all()
-                if not batch:
-                    break
-
-                print(
-                    f"  🔄 Batch {offset // batch_size + 1}: séries {offset + 1}–{offset + len(batch)}/{total_series}"
-                )
-
-                for idx, item in enumerate(batch, offset + 1):
-                    print(f"  📺 [{idx}/{total_series}] Processing: {item.title} ({item.year})")
-
-                    # Find matching Sonarr series
-                    series_data = next(
-                        (s for s in series_list if s.get("title") == item.title and s.get("year") == item.year), None
+            series_skipped = 0
+            series_failed = 0
+            fingerprints: dict[int, str] = {}
+
+            def iter_series_to_fetch():
+                """Séries à récupérer, lues en base par pages de batch_size (séries inchangées sautées)"""
+                nonlocal series_skipped
+                offset = 0
+                while offset < total_series:
+                    batch = base_query.order_by(LibraryItem.id).offset(offset).limit(batch_size).all()
+                    if not batch:
+                        return
+
+                    print(
+                        f"  🔄 Batch {offset // batch_size + 1}: séries {offset + 1}–{offset + len(batch)}/{total_series}"
                     )
+                    for idx, item in enumerate(batch, offset + 1):
+                        series_data = series_index.match(item)
 
-                    if not series_data:
-                        print("    ⚠️  Not found in Sonarr")
-                        continue
-
-                    series_id = series_data["id"]
-                    print(f"    🔍 Sonarr series ID: {series_id}")
-
-                    # Fetch episodes + files
-                    episodes = await connector.get_episodes_by_series(series_id)
-                    episode_files = await connector.get_episode_files_by_series(series_id)
-                    file_map = {f["id"]: f for f in episode_files}
-
-                    print(f"    📥 Fetched {len(episodes)} episodes, {len(episode_files)} files")
+                        if not series_data:
+                            print(f"  📺 [{idx}/{total_series}] {item.title} ({item.year}) ⚠️  Not found in Sonarr")
+                            continue
 
-                    # Upsert episodes
-                    series_episodes_synced = 0
-                    series_episodes_updated = 0
+                        if item.sonarr_series_id != series_data.id:
+                            item.sonarr_series_id = series_data.id
+
+                        fingerprints[series_data.id] = self._series_fingerprint(series_data)
+                        state = sync_states.get(series_data.id)
+                        if incremental and state and state.fingerprint == fingerprints[series_data.id]:
+                            last_event = history_changes.get(series_data.id)
+                            if last_event is None or last_event <= _as_utc(state.last_synced_at):
+                                # Vérifiée inchangée : avancer le watermark pour que le prochain
+                                # /history/since reparte de ce run et non du plus ancien watermark
+                                state.last_synced_at = run_started_at
+                                series_skipped += 1
+                                continue
+
+                        yield item, series_data.id
+                    offset += batch_size
+
+            # Fenêtre glissante : le sémaphore est la seule limite de parallélisme. Quelques séries
+            # d'avance attendent un slot, qui est repris dès qu'il se libère, y compris pendant
+            # l'écriture d'un lot ou la lecture de la page suivante.
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            max_in_flight = 2 * max(1, concurrency)
+            candidates = iter_series_to_fetch()
+            exhausted = False
+            in_flight: set[asyncio.Task] = set()
+            done: set[asyncio.Task] = set()
+            fetched: list[tuple[LibraryItem, int, list[EpisodeRecord] | None, list[EpisodeFileRecord] | None]] = []
+
+            try:
+                while True:
+                    while not exhausted and len(in_flight) < max_in_flight:
+                        candidate = next(candidates, None)
+                        if candidate is None:
+                            exhausted = True
+                            break
+                        item, series_id = candidate
+                        in_flight.add(
+                            asyncio.create_task(self._fetch_series_episodes(connector, item, series_id, semaphore))
+                        )
 
-                    for ep_data in episodes:
-                        season_num = ep_data.get("seasonNumber")
-                        episode_num = ep_data.get("episodeNumber")
+                    if not in_flight:
+                        break
 
-                        if season_num is None or episode_num is None:
-                            continue
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        fetched.append(task.result())
+                    done = set()
 
-                        # Find or create season
-                        season = (
-                            self.db.query(Season)
-                            .filter(Season.library_item_id == item.id, Season.season_number == season_num)
-                            .first()
+                    # Écriture groupée + commit tous les batch_size séries (transactions courtes)
+                    if len(fetched) >= batch_size:
+                        synced, updated, failed = self._write_fetched_series(
+                            fetched, sync_states, fingerprints, run_started_at
                         )
-
-                        if not season:
-                            season = Season(
-                                library_item_id=item.id,
-                                sonarr_series_id=series_id,
-                                season_number=season_num,
-                            )
-                            self.db.add(season)
-                            self.db.flush()
-
-                        # Extract file info
-                        has_file = ep_data.get("hasFile", False)
-                        episode_file_id = ep_data.get("episodeFileId")
-                        file_info = file_map.get(episode_file_id) if episode_file_id else None
-
-                        # Parse air date
-                        air_date = None
-                        if ep_data.get("airDate"):
-                            try:
-                                air_date = datetime.fromisoformat(ep_data["airDate"]).date()
-                            except (ValueError, TypeError):
-                                pass
-
-                        # Upsert episode
-                        existing = self.db.query(Episode).filter(Episode.sonarr_episode_id == ep_data["id"]).first()
-
-                        if existing:
-                            existing.title = ep_data.get("title")
-                            existing.overview = ep_data.get("overview")
-                            existing.air_date = air_date
-                            existing.monitored = ep_data.get("monitored", True)
-                            existing.has_file = has_file
-                            existing.downloaded = has_file
-                            existing.sonarr_episode_file_id = episode_file_id
-
-                            if file_info:
-                                existing.file_size = file_info.get("size")
-                                existing.quality_profile = file_info.get("quality", {}).get("quality", {}).get("name")
-                                existing.relative_path = file_info.get("relativePath")
-                                existing.episode_file_info = file_info
-
-                            episodes_updated += 1
-                            series_episodes_updated += 1
-                        else:
-                            new_episode = Episode(
-                                season_id=season.id,
-                                library_item_id=item.id,
-                                sonarr_episode_id=ep_data["id"],
-                                sonarr_series_id=series_id,
-                                season_number=season_num,
-                                episode_number=episode_num,
-                                absolute_episode_number=ep_data.get("absoluteEpisodeNumber"),
-                                title=ep_data.get("title"),
-                                overview=ep_data.get("overview"),
-                                air_date=air_date,
-                                monitored=ep_data.get("monitored", True),
-                                has_file=has_file,
-                                downloaded=has_file,
-                                sonarr_episode_file_id=episode_file_id,
-                            )
-
-                            if file_info:
-                                new_episode.file_size = file_info.get("size")
-                                new_episode.quality_profile = (
-                                    file_info.get("quality", {}).get("quality", {}).get("name")
-                                )
-                                new_episode.relative_path = file_info.get("relativePath")
-                                new_episode.episode_file_info = file_info
-
-                            self.db.add(new_episode)
-                            episodes_synced += 1
-                            series_episodes_synced += 1
-
-                    print(f"    ✅ {series_episodes_synced} created, {series_episodes_updated} updated")
-                    series_processed += 1
-
-                # Commit after each batch to avoid large transactions
-                self.db.commit()
-                offset += batch_size
+                        episodes_synced += synced
+                        episodes_updated += updated
+                        series_processed += len(fetched) - failed
+                        series_failed += failed
+                        fetched = []
+
+                # Dernier lot (et watermarks des séries sautées)
+                synced, updated, failed = self._write_fetched_series(fetched, sync_states, fingerprints, run_started_at)
+                episodes_synced += synced
+                episodes_updated += updated
+                series_processed += len(fetched) - failed
+                series_failed += failed
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                # Récupérer les exceptions des tâches restantes (évite "Task exception was never retrieved")
+                await asyncio.gather(*in_flight, *done, return_exceptions=True)
 
             duration_ms = int((time.time() - start_time) * 1000)
 
             print(
                 f"✅ Épisodes: {episodes_synced} créés, {episodes_updated} mis à jour "
-                f"({series_processed} séries, {duration_ms}ms)"
+                f"({series_processed} séries, {series_skipped} inchangées, {series_failed} en échec, {duration_ms}ms)"
             )
             return {
                 "success": True,
                 "series_processed": series_processed,
+                "series_skipped": series_skipped,
+                "series_failed": series_failed,
                 "episodes_synced": episodes_synced,
                 "episodes_updated": episodes_updated,
                 "duration_ms": duration_ms,
@@ -907,6 +1177,212 @@ class SyncService:
         finally:
             await connector.close()
 
+    def _write_fetched_series(
+        self,
+        fetched: list[tuple[LibraryItem, int, list[EpisodeRecord] | None, list[EpisodeFileRecord] | None]],
+        sync_states: dict[int, SonarrSeriesSyncState],
+        fingerprints: dict[int, str],
+        synced_at: datetime,
+    ) -> tuple[int, int, int]:
+        """
+        Écrire un lot de séries récupérées : maps préchargées, écriture groupée puis commit
+
+        Une série dont les épisodes ou fichiers n'ont pas pu être récupérés n'est ni
+        écrite ni marquée synchronisée : le prochain run incrémental la récupère à nouveau.
+
+        Returns:
+            (épisodes créés, épisodes mis à jour, séries en échec)
+        """
+        complete = []
+        for item, series_id, episodes, episode_files in fetched:
+            if episodes is None or episode_files is None:
+                print(f"  ⚠️  {item.title} ({item.year}) [Sonarr ID {series_id}]: récupération échouée, série ignorée")
+                continue
+            complete.append((item, series_id, episodes, episode_files))
+
+        # Précharger saisons + épisodes du lot (quelques requêtes au lieu de 2 par épisode)
+        season_ids, episode_rows = self._load_episode_maps(
+            [item.id for item, *_ in complete],
+            [episode.id for _, _, episodes, _ in complete for episode in episodes if episode.id is not None],
+        )
+        pending: dict[str, list[dict[str, Any]]] = {
+            "season_inserts": [],
+            "episode_inserts": [],
+            "episode_updates": [],
+        }
+
+        episodes_synced = 0
+        episodes_updated = 0
+        for item, series_id, episodes, episode_files in complete:
+            print(
+                f"  📺 {item.title} ({item.year}) [Sonarr ID {series_id}]: "
+                f"{len(episodes)} episodes, {len(episode_files)} files"
+            )
+
+            series_episodes_synced, series_episodes_updated = self._write_series_episodes(
+                item, series_id, episodes, episode_files, season_ids, episode_rows, pending
+            )
+            episodes_synced += series_episodes_synced
+            episodes_updated += series_episodes_updated
+            self._record_series_sync_state(sync_states, item, series_id, fingerprints[series_id], synced_at)
+
+            print(f"    ✅ {series_episodes_synced} created, {series_episodes_updated} updated")
+
+        self._bulk_write(Season, inserts=pending["season_inserts"])
+        self._bulk_write(Episode, inserts=pending["episode_inserts"], updates=pending["episode_updates"])
+        self.db.commit()
+        return episodes_synced, episodes_updated, len(fetched) - len(complete)
+
+    async def _fetch_series_episodes(
+        self, connector: SonarrConnector, item: LibraryItem, series_id: int, semaphore: asyncio.Semaphore
+    ) -> tuple[LibraryItem, int, list[EpisodeRecord] | None, list[EpisodeFileRecord] | None]:
+        """Récupérer épisodes + fichiers d'une série (les deux appels en parallèle, sous le sémaphore)"""
+        async with semaphore:
+            episodes, episode_files = await asyncio.gather(
+                connector.get_episode_records(series_id),
+                connector.get_episode_file_records(series_id),
+            )
+        return item, series_id, episodes, episode_files
+
+    def _load_episode_maps(
+        self, library_item_ids: list[str], sonarr_episode_ids: list[int]
+    ) -> tuple[dict[tuple[str, int], str], dict[int, dict[str, Any]]]:
+        """
+        Précharger les saisons d'un lot de séries et les épisodes déjà connus.
+
+        Les épisodes sont cherchés par sonarr_episode_id seul (unique globalement) : un
+        épisode rattaché à un autre LibraryItem est mis à jour au lieu d'être réinséré.
+
+        Returns:
+            ({(library_item_id, season_number): season_id}, {sonarr_episode_id: colonnes de l'épisode})
+        """
+        if not library_item_ids:
+            return {}, {}
+
+        season_ids = {
+            (row.library_item_id, row.season_number): row.id
+            for row in self.db.query(Season.id, Season.library_item_id, Season.season_number)
+            .filter(Season.library_item_id.in_(library_item_ids))
+            .all()
+        }
+
+        episode_columns = [getattr(Episode, field) for field in self.EPISODE_SYNC_FIELDS]
+        episode_rows: dict[int, dict[str, Any]] = {}
+        # IN découpé : un lot de séries peut compter plusieurs milliers d'épisodes
+        for start in range(0, len(sonarr_episode_ids), self.EPISODE_LOOKUP_CHUNK_SIZE):
+            chunk = sonarr_episode_ids[start : start + self.EPISODE_LOOKUP_CHUNK_SIZE]
+            for row in (
+                self.db.query(Episode.id, Episode.sonarr_episode_id, *episode_columns)
+                .filter(Episode.sonarr_episode_id.in_(chunk))
+                .all()
+            ):
+                episode_rows[row.sonarr_episode_id] = dict(row._mapping)
+        return season_ids, episode_rows
+
+    def _write_series_episodes(
+        self,
+        item: LibraryItem,
+        series_id: int,
+        episodes: list[EpisodeRecord],
+        episode_files: list[EpisodeFileRecord],
+        season_ids: dict[tuple[str, int], str],
+        episode_rows: dict[int, dict[str, Any]],
+        pending: dict[str, list[dict[str, Any]]],
+    ) -> tuple[int, int]:
+        """
+        Préparer l'upsert des épisodes Sonarr d'une série à partir des maps préchargées.
+
+        Rien n'est écrit ici : les lignes à insérer / modifier sont ajoutées à ``pending``
+        (season_inserts, episode_inserts, episode_updates) et écrites en fin de batch.
+        Seuls les champs réellement modifiés sont mis à jour.
+
+        Returns:
+            (episodes created, episodes updated)
+        """
+        file_map = {episode_file.id: episode_file for episode_file in episode_files}
+        series_episodes_synced = 0
+        series_episodes_updated = 0
+
+        for ep_data in episodes:
+            season_num = ep_data.season_number
+            episode_num = ep_data.episode_number
+
+            if season_num is None or episode_num is None:
+                continue
+
+            # Find or create season
+            season_id = season_ids.get((item.id, season_num))
+            if season_id is None:
+                season_id = generate_uuid()
+                season_ids[(item.id, season_num)] = season_id
+                pending["season_inserts"].append(
+                    {
+                        "id": season_id,
+                        "library_item_id": item.id,
+                        "sonarr_series_id": series_id,
+                        "season_number": season_num,
+                    }
+                )
+
+            # Extract file info
+            has_file = ep_data.has_file
+            episode_file_id = ep_data.episode_file_id
+            file_info = file_map.get(episode_file_id) if episode_file_id else None
+
+            # Parse air date
+            air_date = None
+            if ep_data.air_date:
+                try:
+                    air_date = datetime.fromisoformat(ep_data.air_date).date()
+                except (ValueError, TypeError):
+                    pass
+
+            fields = {
+                "title": ep_data.title,
+                "overview": ep_data.overview,
+                "air_date": air_date,
+                "monitored": ep_data.monitored,
+                "has_file": has_file,
+                "downloaded": has_file,
+                "sonarr_episode_file_id": episode_file_id,
+            }
+            if file_info:
+                fields["file_size"] = file_info.size
+                fields["quality_profile"] = file_info.quality_name
+                fields["relative_path"] = file_info.relative_path
+                fields["episode_file_info"] = file_info.as_json()
+
+            # Upsert episode
+            existing = episode_rows.get(ep_data.id)
+
+            if existing:
+                changes = {key: value for key, value in fields.items() if existing.get(key) != value}
+                if changes:
+                    existing.update(changes)
+                    pending["episode_updates"].append({"id": existing["id"], **changes})
+                    series_episodes_updated += 1
+            else:
+                new_episode = {
+                    "id": generate_uuid(),
+                    "season_id": season_id,
+                    "library_item_id": item.id,
+                    "sonarr_episode_id": ep_data.id,
+                    "sonarr_series_id": series_id,
+                    "season_number": season_num,
+                    "episode_number": episode_num,
+                    "absolute_episode_number": ep_data.absolute_episode_number,
+                    "file_size": None,
+                    "quality_profile": None,
+                    "relative_path": None,
+                    "episode_file_info": None,
+                    **fields,
+                }
+                pending["episode_inserts"].append(new_episode)
+                episode_rows[ep_data.id] = new_episode
+                series_episodes_synced += 1
+
+        return series_episodes_synced, series_episodes_updated
+
     async def sync_jellyfin(self) -> dict[str, Any]:
         """Synchroniser les données Jellyfin"""
         print("🎥 Synchronisation Jellyfin...")
@@ -917,7 +1393,9 @@ class SyncService:
             print("⚠️  Service Jellyfin non configuré")
             return {"success": False, "message": "Service non configuré"}
 
-        connector = JellyfinConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        connector = JellyfinConnector(
+            base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True
+        )
 
         try:
             # Récupérer les stats
@@ -1007,6 +1485,57 @@ class SyncService:
         finally:
             await connector.close()
 
+    async def _resolve_media_details(
+        self, connector: JellyseerrConnector, keys: set[tuple[int, str]]
+    ) -> dict[tuple[int, str], dict[str, Any]]:
+        """
+        Détails TMDB pour chaque (tmdbId, type), depuis media_details_cache quand l'entrée n'a pas expiré.
+
+        Les entrées manquantes ou expirées sont récupérées en parallèle (sémaphore
+        JELLYSEERR_DETAILS_CONCURRENCY) puis enregistrées en base avec leur expiration.
+        """
+        if not keys:
+            return {}
+
+        now = datetime.now(UTC)
+        rows = {
+            (row.tmdb_id, row.media_type): row
+            for row in self.db.query(MediaDetailsCache)
+            .filter(MediaDetailsCache.tmdb_id.in_({tmdb_id for tmdb_id, _ in keys}))
+            .all()
+        }
+        details = {key: rows[key].details for key in keys if key in rows and _as_utc(rows[key].expires_at) > now}
+        missing = sorted(keys - details.keys())
+        if not missing:
+            print(f"  💾 Détails média: {len(details)} en cache, 0 à récupérer")
+            return details
+
+        semaphore = asyncio.Semaphore(max(1, settings.JELLYSEERR_DETAILS_CONCURRENCY))
+
+        async def fetch(tmdb_id: int, media_type: str) -> dict[str, Any]:
+            async with semaphore:
+                return await connector.get_media_details(tmdb_id, media_type)
+
+        fetched = await asyncio.gather(*(fetch(tmdb_id, media_type) for tmdb_id, media_type in missing))
+        expires_at = now + timedelta(hours=settings.JELLYSEERR_DETAILS_CACHE_HOURS)
+
+        for key, raw in zip(missing, fetched, strict=True):
+            trimmed = {field: raw[field] for field in self.MEDIA_DETAILS_FIELDS if raw and raw.get(field) is not None}
+            details[key] = trimmed
+            if not raw:
+                # Échec de récupération : ne pas mettre en cache, on réessaiera au prochain run
+                continue
+            row = rows.get(key)
+            if row is None:
+                row = MediaDetailsCache(tmdb_id=key[0], media_type=key[1])
+                self.db.add(row)
+            row.details = trimmed
+            row.fetched_at = now
+            row.expires_at = expires_at
+
+        print(f"  💾 Détails média: {len(keys) - len(missing)} en cache, {len(missing)} récupérés")
+        return details
+
     async def sync_jellyseerr(self) -> dict[str, Any]:
         """Synchroniser les données Jellyseerr (upsert par jellyseerr_id)"""
         print("📝 Synchronisation Jellyseerr...")
@@ -1017,7 +1546,9 @@ class SyncService:
             print("⚠️  Service Jellyseerr non configuré")
             return {"success": False, "message": "Service non configuré"}
 
-        connector = JellyseerrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        connector = JellyseerrConnector(
+            base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True
+        )
 
         try:
             # Tester d'abord la connexion
@@ -1037,8 +1568,15 @@ class SyncService:
 
             # Construire un set des IDs Jellyseerr reçus depuis l'API
             api_jellyseerr_ids = set()
-            # Cache des détails média pour éviter les appels dupliqués
-            media_details_cache: dict[tuple[int, str], dict[str, Any]] = {}
+            # Détails média : cache persistant + récupération parallèle des manquants
+            media_details_by_key = await self._resolve_media_details(
+                connector,
+                {
+                    (req["media"]["tmdbId"], req.get("type", "movie"))
+                    for req in requests
+                    if (req.get("media") or {}).get("tmdbId")
+                },
+            )
 
             added_count = 0
             updated_count = 0
@@ -1056,13 +1594,8 @@ class SyncService:
                     media_type_str = req.get("type", "movie")
                     tmdb_id = media.get("tmdbId")
 
-                    # Récupérer les détails du média via TMDB ID (avec cache)
-                    media_details = {}
-                    if tmdb_id:
-                        cache_key = (tmdb_id, media_type_str)
-                        if cache_key not in media_details_cache:
-                            media_details_cache[cache_key] = await connector.get_media_details(tmdb_id, media_type_str)
-                        media_details = media_details_cache[cache_key]
+                    # Détails du média via TMDB ID (résolus en amont)
+                    media_details = media_details_by_key.get((tmdb_id, media_type_str), {}) if tmdb_id else {}
 
                     # Titre : depuis les détails TMDB
                     title = media_details.get("title") or media_details.get("name") or "Unknown"
@@ -1170,22 +1703,56 @@ class SyncService:
         finally:
             await connector.close()
 
-    async def sync_all(self) -> dict[str, Any]:
-        """Synchroniser tous les services"""
+    async def _run_isolated_step(self, method_name: str, semaphore: asyncio.Semaphore) -> dict[str, Any]:
+        """Exécuter une étape de sync dans sa propre session DB (mode concurrent)"""
+        async with semaphore:
+            db = self.session_factory()
+            try:
+                step_service = SyncService(db, session_factory=self.session_factory)
+                return await getattr(step_service, method_name)()
+            except Exception as e:
+                print(f"❌ Erreur {method_name}: {e}")
+                return {"success": False, "error": str(e)}
+            finally:
+                db.close()
+
+    async def sync_all(self, concurrent: bool | None = None, max_concurrency: int | None = None) -> dict[str, Any]:
+        """
+        Synchroniser tous les services
+
+        Args:
+            concurrent: Exécuter les services en parallèle, chacun avec sa propre session DB
+                (défaut: settings.SYNC_CONCURRENT)
+            max_concurrency: Nombre maximum de services synchronisés simultanément
+                (défaut: settings.SYNC_MAX_CONCURRENCY)
+        """
+        if concurrent is None:
+            concurrent = settings.SYNC_CONCURRENT
+        if max_concurrency is None:
+            max_concurrency = settings.SYNC_MAX_CONCURRENCY
+
         print("\n" + "=" * 50)
-        print("🔄 DÉBUT DE LA SYNCHRONISATION GLOBALE")
+        print(f"🔄 DÉBUT DE LA SYNCHRONISATION GLOBALE ({'concurrente' if concurrent else 'séquentielle'})")
         print("=" * 50 + "\n")
 
+        start_time = time.time()
         results = {}
 
-        results["radarr"] = await self.sync_radarr()
-        results["sonarr"] = await self.sync_sonarr()
-        results["jellyfin"] = await self.sync_jellyfin()
-        results["jellyseerr"] = await self.sync_jellyseerr()
-        results["monitored_items"] = await self.sync_monitored_items()
+        if concurrent:
+            semaphore = asyncio.Semaphore(max(1, max_concurrency))
+            outcomes = await asyncio.gather(
+                *(self._run_isolated_step(method_name, semaphore) for _, method_name in self.SYNC_ALL_STEPS)
+            )
+            for (key, _), outcome in zip(self.SYNC_ALL_STEPS, outcomes, strict=True):
+                results[key] = outcome
+        else:
+            for key, method_name in self.SYNC_ALL_STEPS:
+                results[key] = await getattr(self, method_name)()
+
+        duration_ms = int((time.time() - start_time) * 1000)
 
         print("\n" + "=" * 50)
-        print("✅ SYNCHRONISATION TERMINÉE")
+        print(f"✅ SYNCHRONISATION TERMINÉE ({duration_ms}ms)")
         print("=" * 50 + "\n")
 
         return results
@@ -4,14 +4,15 @@ Service de gestion des analytics et des sessions de lecture
 
 import logging
 import re
-from datetime import UTC, date, datetime, timedelta
+from datetime import UTC, date, datetime, time, timedelta
 from typing import Any
 
 from sqlalchemy import desc, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.enums import DeviceType, MediaType, PlaybackMethod, SessionStatus, VideoQuality
-from app.models.models import DailyAnalytic, DeviceStatistic, Episode, LibraryItem, PlaybackSession
+from app.models.models import DailyAnalytic, DailyAnalyticMember, DeviceStatistic, Episode, LibraryItem, PlaybackSession
 
 logger = logging.getLogger(__name__)
 
@@ -128,7 +129,7 @@ class AnalyticsService:
                 transcoding_speed=session_data.get("transcoding_speed"),
                 video_codec_source=session_data.get("video_codec_source"),
                 video_codec_target=session_data.get("video_codec_target"),
-                start_time=datetime.now(UTC),
+                start_time=session_data.get("start_time") or datetime.now(UTC),
                 duration_seconds=session_data.get("duration_seconds"),
                 watched_seconds=0,
                 status=SessionStatus.ACTIVE,
@@ -149,7 +150,11 @@ class AnalyticsService:
 
     @staticmethod
     def stop_session(
-        db: Session, media_id: str, user_id: str, watched_seconds: int | None = None
+        db: Session,
+        media_id: str,
+        user_id: str,
+        watched_seconds: int | None = None,
+        ended_at: datetime | None = None,
     ) -> PlaybackSession | None:
         """
         Arrête une session de lecture active
@@ -159,6 +164,7 @@ class AnalyticsService:
             media_id: ID du média
             user_id: ID de l'utilisateur
             watched_seconds: Durée regardée (optionnel)
+            ended_at: Heure de fin (défaut: maintenant ; réception du webhook si mis en file)
         """
         try:
             # Trouver la session active
@@ -178,7 +184,7 @@ class AnalyticsService:
                 return None
 
             # Mettre à jour la session
-            session.end_time = datetime.now(UTC)
+            session.end_time = ended_at or datetime.now(UTC)
             session.status = SessionStatus.STOPPED
             session.is_active = False
 
@@ -330,20 +336,12 @@ class AnalyticsService:
             elif session.playback_method == PlaybackMethod.TRANSCODED:
                 daily_stat.transcoded_count += 1
 
-            # Calculer les utilisateurs et médias uniques du jour
-            unique_users = (
-                db.query(func.count(func.distinct(PlaybackSession.user_id)))
-                .filter(func.date(PlaybackSession.start_time) == session_date)
-                .scalar()
-            )
-            daily_stat.unique_users = unique_users
-
-            unique_media = (
-                db.query(func.count(func.distinct(PlaybackSession.media_id)))
-                .filter(func.date(PlaybackSession.start_time) == session_date)
-                .scalar()
-            )
-            daily_stat.unique_media = unique_media
+            # Utilisateurs et médias uniques : +1 seulement si le membre est nouveau
+            # pour la journée (recherche par clé unique, pas de COUNT DISTINCT)
+            if AnalyticsService._add_daily_member(db, session_date, "user", session.user_id):
+                daily_stat.unique_users = (daily_stat.unique_users or 0) + 1
+            if AnalyticsService._add_daily_member(db, session_date, "media", session.media_id):
+                daily_stat.unique_media = (daily_stat.unique_media or 0) + 1
 
             db.commit()
             logger.info(f"📅 Analytics quotidiennes mises à jour : {session_date}")
@@ -352,6 +350,86 @@ class AnalyticsService:
             db.rollback()
             logger.error(f"❌ Erreur lors de la mise à jour des analytics quotidiennes : {e}")
 
+    @staticmethod
+    def _add_daily_member(db: Session, day: date, kind: str, member_id: str | None) -> bool:
+        """Ajoute un utilisateur / média à l'ensemble du jour ; True s'il n'y était pas encore"""
+        if not member_id:
+            return False
+        exists = (
+            db.query(DailyAnalyticMember.id)
+            .filter(
+                DailyAnalyticMember.date == day,
+                DailyAnalyticMember.kind == kind,
+                DailyAnalyticMember.member_id == member_id,
+            )
+            .first()
+        )
+        if exists:
+            return False
+        # Savepoint : un doublon inséré entre-temps (webhooks concurrents, réconciliation)
+        # n'annule que cette insertion, pas les autres compteurs de la session
+        try:
+            with db.begin_nested():
+                db.add(DailyAnalyticMember(date=day, kind=kind, member_id=member_id))
+        except IntegrityError:
+            return False
+        return True
+
+    @staticmethod
+    def reconcile_daily_analytics(db: Session, target_date: date | None = None) -> dict[str, int] | None:
+        """
+        Reconstruit les ensembles et compteurs unique_users / unique_media d'une
+        journée depuis les sessions brutes (rattrape les écarts des mises à jour
+        incrémentales : sessions encore actives, erreurs, corrections manuelles...)
+
+        Args:
+            db: Session DB
+            target_date: Date cible (par défaut : aujourd'hui)
+
+        Returns:
+            Compteurs reconstruits, ou None en cas d'erreur
+        """
+        try:
+            if not target_date:
+                target_date = datetime.now(UTC).date()
+
+            # Intervalle [jour, jour + 1) : utilise l'index sur start_time, contrairement à date(start_time)
+            day_start = datetime.combine(target_date, time.min)
+            day_end = day_start + timedelta(days=1)
+            in_day = (PlaybackSession.start_time >= day_start, PlaybackSession.start_time < day_end)
+
+            user_ids = {row[0] for row in db.query(PlaybackSession.user_id).filter(*in_day).distinct()}
+            media_ids = {row[0] for row in db.query(PlaybackSession.media_id).filter(*in_day).distinct()}
+            expected = {("user", user_id) for user_id in user_ids} | {("media", media_id) for media_id in media_ids}
+
+            # Ajuster l'ensemble au lieu de le vider : le worker des webhooks peut insérer en même temps
+            members = db.query(DailyAnalyticMember).filter(DailyAnalyticMember.date == target_date).all()
+            existing = set()
+            for member in members:
+                if (member.kind, member.member_id) in expected:
+                    existing.add((member.kind, member.member_id))
+                else:
+                    db.delete(member)
+            for kind, member_id in expected - existing:
+                AnalyticsService._add_daily_member(db, target_date, kind, member_id)
+
+            daily_stat = db.query(DailyAnalytic).filter(DailyAnalytic.date == target_date).first()
+            if daily_stat:
+                daily_stat.unique_users = len(user_ids)
+                daily_stat.unique_media = len(media_ids)
+
+            db.commit()
+            logger.info(
+                f"🔁 Analytics quotidiennes réconciliées : {target_date} "
+                f"({len(user_ids)} utilisateurs, {len(media_ids)} médias)"
+            )
+            return {"unique_users": len(user_ids), "unique_media": len(media_ids)}
+
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Erreur lors de la réconciliation des analytics quotidiennes : {e}")
+            return None
+
     @staticmethod
     def get_active_sessions(db: Session) -> list[PlaybackSession]:
         """Récupère toutes les sessions actives"""
@@ -0,0 +1,50 @@
+"""
+Parcours paginé de l'historique Radarr / Sonarr (/api/v3/history)
+
+L'historique est lu page par page, du plus récent au plus ancien, et
+s'arrête au high-water mark (dernier id d'historique déjà traité) : le
+premier run parcourt tout l'historique, les suivants seulement les
+nouvelles pages.
+"""
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class HistoryCursor:
+    """Position la plus récente atteinte lors d'un parcours de l'historique"""
+
+    last_id: int | None = None
+    last_date: str | None = None
+    records: int = 0
+    # Vrai seulement si le parcours est allé jusqu'au bout (ou jusqu'au high-water mark)
+    complete: bool = False
+
+    def observe(self, record: dict[str, Any]):
+        self.records += 1
+        record_id = record.get("id")
+        if isinstance(record_id, int) and (self.last_id is None or record_id > self.last_id):
+            self.last_id = record_id
+            self.last_date = record.get("date")
+
+
+async def stop_at_watermark(
+    pages: AsyncIterator[list[dict[str, Any]]], after_id: int | None
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """
+    Ne garder que les enregistrements plus récents que ``after_id``
+
+    Les pages arrivent triées par date décroissante : dès qu'une page contient
+    un id déjà vu, les suivantes sont forcément plus anciennes et ne sont pas demandées.
+    """
+    async for records in pages:
+        if after_id is None:
+            yield records
+            continue
+        fresh = [record for record in records if (record.get("id") or 0) > after_id]
+        if fresh:
+            yield fresh
+        if len(fresh) < len(records):
+            return
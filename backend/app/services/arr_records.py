@@ -0,0 +1,215 @@
+"""
+Enregistrements compacts des payloads Radarr / Sonarr utilisés par la synchronisation
+
+Les connecteurs convertissent chaque élément JSON en dataclass à ``__slots__``
+dès qu'il est décodé (lecture en streaming) : seuls les champs lus par
+SyncService sont conservés, et les colonnes JSON (``Season.statistics``,
+``Episode.episode_file_info``) ne reçoivent plus que le sous-ensemble utile
+au lieu de l'objet complet.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+
+def _poster_url(images: list[dict[str, Any]] | None) -> str:
+    """remoteUrl du poster, sinon de la première image"""
+    images = images or []
+    for image in images:
+        if image.get("coverType") == "poster":
+            return image.get("remoteUrl", "")
+    return images[0].get("remoteUrl", "") if images else ""
+
+
+def _quality_name(quality: dict[str, Any] | None) -> str | None:
+    """Nom de qualité d'un fichier *arr ({"quality": {"name": ...}})"""
+    return ((quality or {}).get("quality") or {}).get("name")
+
+
+@dataclass(slots=True)
+class ArrStatistics:
+    """Compteurs Sonarr d'une série ou d'une saison (None si absents du payload)"""
+
+    episode_count: int | None = None
+    episode_file_count: int | None = None
+    total_episode_count: int | None = None
+    size_on_disk: int | None = None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any] | None) -> "ArrStatistics":
+        data = data or {}
+        return cls(
+            episode_count=data.get("episodeCount"),
+            episode_file_count=data.get("episodeFileCount"),
+            total_episode_count=data.get("totalEpisodeCount"),
+            size_on_disk=data.get("sizeOnDisk"),
+        )
+
+    def as_json(self) -> dict[str, int]:
+        """Sous-ensemble stocké dans Season.statistics (clés Sonarr)"""
+        values = {
+            "episodeCount": self.episode_count,
+            "episodeFileCount": self.episode_file_count,
+            "totalEpisodeCount": self.total_episode_count,
+            "sizeOnDisk": self.size_on_disk,
+        }
+        return {key: value for key, value in values.items() if value is not None}
+
+
+@dataclass(slots=True)
+class MovieRecord:
+    """Film Radarr (/api/v3/movie)"""
+
+    id: int | None
+    title: str | None
+    year: int | None
+    monitored: bool
+    has_file: bool
+    quality_profile_id: int | None
+    size_on_disk: int
+    added: str
+    overview: str
+    file_path: str | None
+    file_quality: str | None
+    poster_url: str
+    rating: str
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "MovieRecord":
+        movie_file = data.get("movieFile") or {}
+        return cls(
+            id=data.get("id"),
+            title=data.get("title"),
+            year=data.get("year"),
+            monitored=bool(data.get("monitored")),
+            has_file=bool(data.get("hasFile")),
+            quality_profile_id=data.get("qualityProfileId"),
+            size_on_disk=data.get("sizeOnDisk") or 0,
+            added=data.get("added") or "",
+            overview=data.get("overview") or "",
+            file_path=movie_file.get("path"),
+            file_quality=_quality_name(movie_file.get("quality")),
+            poster_url=_poster_url(data.get("images")),
+            rating=str(((data.get("ratings") or {}).get("imdb") or {}).get("value", "")),
+        )
+
+
+@dataclass(slots=True)
+class SeasonRecord:
+    """Saison embarquée dans une série Sonarr"""
+
+    season_number: int | None
+    monitored: bool
+    statistics: ArrStatistics
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "SeasonRecord":
+        return cls(
+            season_number=data.get("seasonNumber"),
+            monitored=data.get("monitored", True),
+            statistics=ArrStatistics.from_api(data.get("statistics")),
+        )
+
+
+@dataclass(slots=True)
+class SeriesRecord:
+    """Série Sonarr (/api/v3/series), saisons comprises"""
+
+    id: int | None
+    title: str | None
+    year: int | None
+    alternate_titles: tuple[str, ...]
+    added: str
+    overview: str
+    path: str | None
+    quality_profile_id: int | None
+    monitored: bool | None
+    previous_airing: str | None
+    statistics: ArrStatistics
+    poster_url: str
+    rating: str
+    seasons: tuple[SeasonRecord, ...]
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "SeriesRecord":
+        return cls(
+            id=data.get("id"),
+            title=data.get("title"),
+            year=data.get("year"),
+            alternate_titles=tuple(alt["title"] for alt in data.get("alternateTitles") or [] if alt.get("title")),
+            added=data.get("added") or "",
+            overview=data.get("overview") or "",
+            path=data.get("path"),
+            quality_profile_id=data.get("qualityProfileId"),
+            monitored=data.get("monitored"),
+            previous_airing=data.get("previousAiring"),
+            statistics=ArrStatistics.from_api(data.get("statistics")),
+            poster_url=_poster_url(data.get("images")),
+            rating=str((data.get("ratings") or {}).get("value", "")),
+            seasons=tuple(SeasonRecord.from_api(season) for season in data.get("seasons") or []),
+        )
+
+
+@dataclass(slots=True)
+class EpisodeRecord:
+    """Épisode Sonarr (/api/v3/episode)"""
+
+    id: int
+    season_number: int | None
+    episode_number: int | None
+    absolute_episode_number: int | None
+    title: str | None
+    overview: str | None
+    air_date: str | None
+    monitored: bool
+    has_file: bool
+    episode_file_id: int | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "EpisodeRecord":
+        return cls(
+            id=data["id"],
+            season_number=data.get("seasonNumber"),
+            episode_number=data.get("episodeNumber"),
+            absolute_episode_number=data.get("absoluteEpisodeNumber"),
+            title=data.get("title"),
+            overview=data.get("overview"),
+            air_date=data.get("airDate"),
+            monitored=data.get("monitored", True),
+            has_file=data.get("hasFile", False),
+            episode_file_id=data.get("episodeFileId"),
+        )
+
+
+@dataclass(slots=True)
+class EpisodeFileRecord:
+    """Fichier d'épisode Sonarr (/api/v3/episodefile)"""
+
+    id: int
+    size: int | None
+    relative_path: str | None
+    date_added: str | None
+    quality_name: str | None
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "EpisodeFileRecord":
+        return cls(
+            id=data["id"],
+            size=data.get("size"),
+            relative_path=data.get("relativePath"),
+            date_added=data.get("dateAdded"),
+            quality_name=_quality_name(data.get("quality")),
+        )
+
+    def as_json(self) -> dict[str, Any]:
+        """Sous-ensemble stocké dans Episode.episode_file_info (même forme que l'objet Sonarr)"""
+        info: dict[str, Any] = {"id": self.id}
+        if self.size is not None:
+            info["size"] = self.size
+        if self.relative_path:
+            info["relativePath"] = self.relative_path
+        if self.date_added:
+            info["dateAdded"] = self.date_added
+        if self.quality_name:
+            info["quality"] = {"quality": {"name": self.quality_name}}
+        return info
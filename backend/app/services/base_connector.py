@@ -1,28 +1,38 @@
+import copy
+import re
+import time
+from collections.abc import AsyncIterator
 from typing import Any
 
 import httpx
 
+from app.core.config import settings
+from app.services.endpoint import normalize_base_url
+from app.services.http_client_registry import http_client_registry
+from app.services.json_stream import iter_json_array
+from app.services.response_cache import response_cache
+
 
 class BaseConnector:
     """Classe de base pour tous les connecteurs API"""
 
-    def __init__(self, base_url: str, api_key: str, port: int | None = None, timeout: int = 30):
-        # Si un port est fourni et pas déjà dans l'URL, l'ajouter
-        if port and f":{port}" not in base_url:
-            # Supprimer le / final si présent
-            base_url = base_url.rstrip("/")
-            # Vérifier si l'URL a déjà un port
-            if not any(f":{p}" in base_url for p in range(1, 65536)):
-                base_url = f"{base_url}:{port}"
-
-        self.base_url = base_url.rstrip("/")
+    def __init__(
+        self, base_url: str, api_key: str, port: int | None = None, timeout: int = 30, shared_client: bool = False
+    ):
+        self.base_url = normalize_base_url(base_url, port)
         self.api_key = api_key
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=timeout)
+        # shared_client=True : client keep-alive du registre, réutilisé entre connecteurs (non fermé par close())
+        self._owns_client = not shared_client
+        if shared_client:
+            self.client = http_client_registry.get_client(self.base_url, timeout)
+        else:
+            self.client = httpx.AsyncClient(timeout=timeout)
 
     async def close(self):
-        """Fermer la connexion HTTP"""
-        await self.client.aclose()
+        """Fermer la connexion HTTP (le client partagé reste ouvert dans le registre)"""
+        if self._owns_client:
+            await self.client.aclose()
 
     async def _get(self, endpoint: str, params: dict[str, Any] | None = None) -> dict[str, Any]:
         """
@@ -49,6 +59,121 @@ class BaseConnector:
             print(f"❌ Erreur HTTP {endpoint}: {e}")
             raise
 
+    async def _stream_array(self, endpoint: str, params: dict[str, Any] | None = None) -> AsyncIterator[Any]:
+        """
+        GET d'un endpoint renvoyant un tableau JSON, décodé élément par élément
+
+        Le corps n'est jamais chargé en entier : chaque élément est produit dès
+        qu'il est complet, ce qui borne la mémoire aux éléments conservés par l'appelant.
+
+        Args:
+            endpoint: Chemin de l'endpoint (ex: '/api/v3/movie')
+            params: Paramètres query string optionnels
+
+        Yields:
+            Les éléments du tableau
+
+        Raises:
+            httpx.HTTPError: En cas d'erreur HTTP
+            ValueError: Corps qui n'est pas un tableau JSON valide
+        """
+        url = f"{self.base_url}{endpoint}"
+        headers = self._get_headers()
+
+        try:
+            async with self.client.stream("GET", url, headers=headers, params=params) as response:
+                response.raise_for_status()
+                async for element in iter_json_array(response.aiter_text()):
+                    yield element
+        except httpx.HTTPError as e:
+            print(f"❌ Erreur HTTP {endpoint}: {e}")
+            raise
+
+    async def _iter_paged(
+        self, endpoint: str, params: dict[str, Any] | None = None, page_size: int = 250
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Parcourir une ressource paginée *arr (page / pageSize / totalRecords / records)
+
+        Args:
+            endpoint: Chemin de l'endpoint (ex: '/api/v3/history')
+            params: Filtres et tri, répétés pour chaque page
+            page_size: Nombre d'enregistrements par page
+
+        Yields:
+            Les enregistrements de chaque page, une page à la fois
+        """
+        page = 1
+        while True:
+            response = await self._get(endpoint, params={**(params or {}), "page": page, "pageSize": page_size})
+            records = response.get("records") or []
+            if not records:
+                return
+            yield records
+            total = response.get("totalRecords")
+            if len(records) < page_size or (isinstance(total, int) and page * page_size >= total):
+                return
+            page += 1
+
+    async def _get_cached(self, endpoint: str, params: dict[str, Any] | None = None, ttl: float | None = None) -> Any:
+        """
+        GET servi par le cache de réponses partagé (TTL + LRU)
+
+        Une entrée expirée portant un ETag / Last-Modified est revalidée par une
+        requête conditionnelle ; un 304 prolonge l'entrée sans retélécharger le corps.
+
+        Args:
+            endpoint: Chemin de l'endpoint
+            params: Paramètres query string optionnels (font partie de la clé)
+            ttl: Durée de vie en secondes (défaut: RESPONSE_CACHE_TTL_SECONDS)
+
+        Returns:
+            Réponse JSON (copie, modifiable par l'appelant)
+        """
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return await self._get(endpoint, params=params)
+
+        ttl = settings.RESPONSE_CACHE_TTL_SECONDS if ttl is None else ttl
+        stats_key = re.sub(r"/\d+", "/{id}", endpoint)
+        key = response_cache.make_key(self.base_url, endpoint, params)
+        entry = response_cache.get(key)
+
+        if entry is not None and entry.is_fresh(time.monotonic()):
+            response_cache.stats.record(stats_key, "hits")
+            return copy.deepcopy(entry.value)
+
+        url = f"{self.base_url}{endpoint}"
+        headers = self._get_headers()
+        if entry is not None:
+            headers = {**headers, **entry.validators()}
+
+        try:
+            response = await self.client.get(url, headers=headers, params=params)
+            if entry is not None and response.status_code == 304:
+                response_cache.touch(entry, ttl)
+                response_cache.stats.record(stats_key, "revalidated")
+                return copy.deepcopy(entry.value)
+            response.raise_for_status()
+            value = response.json()
+        except httpx.HTTPError as e:
+            print(f"❌ Erreur HTTP {endpoint}: {e}")
+            raise
+
+        response_cache.stats.record(stats_key, "misses")
+        response_cache.set(
+            key,
+            value,
+            ttl,
+            etag=self._response_header(response, "ETag"),
+            last_modified=self._response_header(response, "Last-Modified"),
+        )
+        return copy.deepcopy(value)
+
+    @staticmethod
+    def _response_header(response: httpx.Response, name: str) -> str | None:
+        value = response.headers.get(name)
+        return value if isinstance(value, str) and value else None
+
     async def _post(
         self, endpoint: str, data: dict[str, Any] | None = None, json: dict[str, Any] | None = None
     ) -> dict[str, Any]:
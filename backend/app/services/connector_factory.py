@@ -15,6 +15,9 @@ def create_connector(service: ServiceConfiguration):
     """
     Crée le bon connector selon le type de service
 
+    Les connecteurs HTTP (httpx) utilisent le client partagé du registre, et
+    qBittorrent sa session authentifiée partagée : close() ne ferme pas le pool keep-alive.
+
     Args:
         service: Configuration du service
 
@@ -27,27 +30,31 @@ def create_connector(service: ServiceConfiguration):
     service_type = service.service_name.lower()
 
     if service_type == "jellyfin":
-        return JellyfinConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        return JellyfinConnector(base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True)
 
     elif service_type == "jellyseerr":
-        return JellyseerrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        return JellyseerrConnector(base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True)
 
     elif service_type == "sonarr":
-        return SonarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        return SonarrConnector(base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True)
 
     elif service_type == "radarr":
-        return RadarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        return RadarrConnector(base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True)
 
     elif service_type == "qbittorrent":
         if not service.username or not service.password:
             raise ValueError("qBittorrent nécessite username et password")
 
         return QBittorrentConnector(
-            base_url=service.url, username=service.username, password=service.password, port=service.port
+            base_url=service.url,
+            username=service.username,
+            password=service.password,
+            port=service.port,
+            shared_session=True,
         )
 
     elif service_type == "prowlarr":
-        return ProwlarrConnector(base_url=service.url, api_key=service.api_key, port=service.port)
+        return ProwlarrConnector(base_url=service.url, api_key=service.api_key, port=service.port, shared_client=True)
 
     else:
         raise ValueError(f"Type de service non supporté : {service_type}")
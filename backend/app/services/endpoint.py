@@ -0,0 +1,52 @@
+"""
+Normalisation des URLs de base des services (URL + port de la ServiceConfiguration)
+
+Partagé par les connecteurs (BaseConnector, QBittorrentConnector), le registre
+de clients HTTP et le webhook Jellyfin pour construire les URLs de posters.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit, urlunsplit
+
+if TYPE_CHECKING:
+    from app.models import ServiceConfiguration
+
+
+@lru_cache(maxsize=256)
+def normalize_base_url(base_url: str, port: int | None = None) -> str:
+    """
+    URL de base normalisée : sans / final, port ajouté à l'hôte s'il n'y en a pas déjà un.
+
+    Un port déjà présent dans l'URL est prioritaire sur ``port``. Le chemin éventuel
+    (reverse proxy, ex: http://host/jellyfin) est conservé après host:port.
+
+    Args:
+        base_url: URL saisie dans la configuration (schéma optionnel)
+        port: Port de la configuration
+
+    Returns:
+        URL normalisée
+    """
+    url = (base_url or "").strip().rstrip("/")
+    if not port or not url:
+        return url
+
+    has_scheme = "://" in url
+    parts = urlsplit(url if has_scheme else f"//{url}")
+    try:
+        if parts.port is not None:
+            return url
+    except ValueError:
+        # Port invalide dans l'URL : on la laisse telle quelle
+        return url
+
+    netloc = f"{parts.netloc}:{port}"
+    if not has_scheme:
+        return f"{netloc}{parts.path}"
+    return urlunsplit((parts.scheme, netloc, parts.path, parts.query, parts.fragment))
+
+
+def service_base_url(service: "ServiceConfiguration") -> str:
+    """URL de base d'une ServiceConfiguration (mise en cache par couple url/port)"""
+    return normalize_base_url(service.url, service.port)
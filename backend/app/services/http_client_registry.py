@@ -0,0 +1,84 @@
+"""
+Registre process-wide des clients HTTP partagés par les connecteurs
+
+Un httpx.AsyncClient (pool keep-alive, HTTP/2 si disponible) par endpoint de
+service, réutilisé d'un connecteur à l'autre au lieu de refaire la poignée de
+main TCP/TLS à chaque requête. Invalidé quand la configuration du service change.
+"""
+
+import asyncio
+import importlib.util
+import logging
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientRegistry:
+    """Clients httpx partagés, indexés par (base_url, timeout)"""
+
+    def __init__(self):
+        self._clients: dict[tuple[str, float], httpx.AsyncClient] = {}
+        # Boucle d'événements de création : un pool httpx n'est pas réutilisable d'une boucle à l'autre
+        self._loops: dict[tuple[str, float], asyncio.AbstractEventLoop | None] = {}
+
+    @staticmethod
+    def http2_available() -> bool:
+        """HTTP/2 activé par la config et supporté (paquet h2 installé)"""
+        return settings.HTTP_CLIENT_HTTP2 and importlib.util.find_spec("h2") is not None
+
+    def _build_client(self, timeout: float) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(timeout=timeout, limits=limits, http2=self.http2_available())
+
+    def get_client(self, base_url: str, timeout: float = 30) -> httpx.AsyncClient:
+        """Retourner le client partagé d'un endpoint, en le (re)créant si besoin"""
+        key = (base_url.rstrip("/"), timeout)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        client = self._clients.get(key)
+        if client is None or client.is_closed or self._loops.get(key) is not loop:
+            client = self._build_client(timeout)
+            self._clients[key] = client
+            self._loops[key] = loop
+            logger.debug("🔌 Nouveau client HTTP partagé pour %s", key[0])
+        return client
+
+    async def invalidate(self, base_url: str | None = None) -> int:
+        """
+        Fermer et oublier les clients d'un endpoint (ou tous si base_url est None)
+
+        Returns:
+            Nombre de clients fermés
+        """
+        prefix = base_url.rstrip("/") if base_url else None
+        keys = [key for key in self._clients if prefix is None or key[0] == prefix]
+        for key in keys:
+            client = self._clients.pop(key)
+            self._loops.pop(key, None)
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("⚠️ Fermeture du client HTTP %s impossible: %s", key[0], e)
+        return len(keys)
+
+    async def aclose(self):
+        """Fermer tous les clients (arrêt de l'application)"""
+        await self.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+# Instance globale du registre
+http_client_registry = HttpClientRegistry()
@@ -1,6 +1,8 @@
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta
 from typing import Any
 
+from app.core.config import settings
 from app.services.base_connector import BaseConnector
 
 
@@ -282,6 +284,74 @@ class JellyfinConnector(BaseConnector):
             print(f"❌ Erreur récupération épisodes avec streams (series {series_jellyfin_id}): {e}")
             return []
 
+    async def iter_episodes_with_streams(self, page_size: int | None = None) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Parcourir tous les épisodes de la bibliothèque avec leurs MediaStreams, page par page.
+
+        Une poignée de requêtes StartIndex / Limit remplace un appel par série ;
+        chaque épisode porte son SeriesId pour être rattaché à sa série.
+
+        Args:
+            page_size: Nombre d'épisodes par page (défaut: JELLYFIN_EPISODES_PAGE_SIZE)
+
+        Yields:
+            Les épisodes de chaque page, une page à la fois
+        """
+        page_size = page_size or settings.JELLYFIN_EPISODES_PAGE_SIZE
+        start_index = 0
+        while True:
+            params = {
+                "Recursive": True,
+                "IncludeItemTypes": "Episode",
+                "Fields": "MediaStreams",
+                "EnableImages": False,
+                "EnableUserData": False,
+                "EnableTotalRecordCount": False,
+                # Ordre stable entre les pages (sinon des épisodes peuvent être sautés ou dupliqués)
+                "SortBy": "SeriesSortName,ParentIndexNumber,IndexNumber,SortName",
+                "StartIndex": start_index,
+                "Limit": page_size,
+            }
+            try:
+                response = await self._get("/Items", params=params)
+            except Exception as e:
+                print(f"❌ Erreur récupération épisodes avec streams (StartIndex {start_index}): {e}")
+                return
+            items = response.get("Items", [])
+            if items:
+                yield items
+            if len(items) < page_size:
+                return
+            start_index += page_size
+
+    async def get_items_with_streams(self, item_ids: list[str]) -> list[dict[str, Any]]:
+        """
+        Récupérer des items précis (films, épisodes, séries) avec leurs MediaStreams.
+
+        Contrairement aux autres méthodes, les erreurs sont propagées : l'appelant
+        (file des webhooks) remet alors les items en attente.
+
+        Args:
+            item_ids: IDs Jellyfin des items
+
+        Returns:
+            Liste des items trouvés avec leurs MediaStreams
+
+        Raises:
+            httpx.HTTPError: En cas d'erreur HTTP
+        """
+        if not item_ids:
+            return []
+        params = {
+            "Ids": ",".join(item_ids),
+            "Fields": "MediaStreams,ProductionYear,Path",
+            "EnableImages": False,
+            "EnableUserData": False,
+            "EnableTotalRecordCount": False,
+        }
+        response = await self._get("/Items", params=params)
+        return response.get("Items", [])
+
     async def get_movies_with_streams(self) -> list[dict[str, Any]]:
         """
         Récupérer tous les films avec leurs MediaStreams (sous-titres, audio).
@@ -0,0 +1,94 @@
+"""
+File des items Jellyfin dont les MediaStreams doivent être rafraîchis
+
+Alimentée par les webhooks ItemAdded / ItemUpdated, vidée par un job planifié
+qui rafraîchit les items par lots (JellyfinStreamsService.sync_items). Un item
+notifié plusieurs fois avant le passage du job n'est traité qu'une fois.
+"""
+
+import logging
+from itertools import islice
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.services.jellyfin_streams_service import JellyfinStreamsService
+
+logger = logging.getLogger(__name__)
+
+# Types d'items dont les MediaStreams nous intéressent (une série rafraîchit ses épisodes)
+STREAM_ITEM_TYPES = frozenset({"Movie", "Episode", "Series"})
+
+
+class JellyfinStreamQueue:
+    """IDs Jellyfin en attente, dédupliqués et dans l'ordre d'arrivée"""
+
+    def __init__(self):
+        self._pending: dict[str, None] = {}
+        self.dropped = 0
+        self.processed = 0
+
+    def enqueue(self, item_id: str) -> bool:
+        """
+        Ajouter un item à la file
+
+        Returns:
+            False si la file est pleine (l'item sera rattrapé par le scan nocturne)
+        """
+        if item_id in self._pending:
+            return True
+        if len(self._pending) >= settings.JELLYFIN_STREAMS_QUEUE_MAX_SIZE:
+            self.dropped += 1
+            return False
+        self._pending[item_id] = None
+        return True
+
+    def take(self, limit: int) -> list[str]:
+        """Retirer jusqu'à limit items, les plus anciens d'abord"""
+        batch = list(islice(self._pending, limit))
+        for item_id in batch:
+            del self._pending[item_id]
+        return batch
+
+    async def process(self) -> dict[str, int]:
+        """
+        Vider la file par lots de JELLYFIN_STREAMS_BATCH_SIZE items
+
+        Un lot en échec (Jellyfin injoignable) est remis en file pour le prochain passage.
+        """
+        stats = {"batches": 0, "total": 0, "updated": 0, "skipped": 0}
+        while self._pending:
+            batch = self.take(settings.JELLYFIN_STREAMS_BATCH_SIZE)
+            db = SessionLocal()
+            try:
+                result = await JellyfinStreamsService(db).sync_items(batch)
+            except Exception as e:
+                db.rollback()
+                for item_id in batch:
+                    self.enqueue(item_id)
+                logger.warning(f"⚠️ Streams Jellyfin non rafraîchis ({len(batch)} items remis en file) : {e}")
+                break
+            finally:
+                db.close()
+            stats["batches"] += 1
+            for key in ("total", "updated", "skipped"):
+                stats[key] += result[key]
+            self.processed += len(batch)
+        return stats
+
+    async def run_job(self):
+        """Job planifié : traiter les items en attente"""
+        if self._pending:
+            await self.process()
+
+    def clear(self):
+        """Vider la file (tests)"""
+        self._pending.clear()
+        self.dropped = 0
+        self.processed = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+# Instance globale de la file
+jellyfin_stream_queue = JellyfinStreamQueue()
@@ -3,16 +3,34 @@ Service de synchronisation des MediaStreams (sous-titres, audio) depuis Jellyfin
 
 - TV Shows : info au niveau épisode (Episode.media_streams)
 - Movies   : info au niveau item (LibraryItem.media_streams)
+
+Les épisodes sont récupérés en mode bulk (JELLYFIN_STREAMS_BULK) : tous les
+épisodes de la bibliothèque par pages StartIndex / Limit, indexés par série,
+plutôt qu'une requête par série.
+
+Les webhooks ItemAdded / ItemUpdated alimentent une file (jellyfin_stream_queue) :
+seuls les items concernés sont rafraîchis (sync_items), le scan complet
+ne sert plus que de réconciliation nocturne.
 """
 
+import re
+import unicodedata
+from collections import defaultdict
 from pathlib import Path
 from typing import Any
 
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.models import Episode, LibraryItem, MediaType, Season, ServiceConfiguration, ServiceType
+from app.core.config import settings
+from app.models import Episode, LibraryItem, MediaType, ServiceConfiguration, ServiceType
 from app.services.jellyfin_connector import JellyfinConnector
 
+# (streams, jellyfin_id) d'un film Jellyfin
+MovieEntry = tuple[dict[str, Any], str | None]
+
+_LEADING_ARTICLES = frozenset({"the", "a", "an", "le", "la", "les", "l", "un", "une"})
+
 
 def _parse_streams(media_streams: list[dict[str, Any]]) -> dict[str, Any]:
     """Convert Jellyfin MediaStreams array into a compact dict with subtitles and audio lists."""
@@ -44,6 +62,93 @@ def _parse_streams(media_streams: list[dict[str, Any]]) -> dict[str, Any]:
     return {"subtitles": subtitles, "audio": audio}
 
 
+def _normalize_title(title: str) -> str:
+    """Lowercase title without accents, punctuation or leading article ("The Matrix" → "matrix")."""
+    text = unicodedata.normalize("NFKD", title)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower().replace("&", " and ")
+    words = re.sub(r"[^\w\s]", " ", text).split()
+    if len(words) > 1 and words[0] in _LEADING_ARTICLES:
+        words = words[1:]
+    return " ".join(words)
+
+
+def _episode_key(jf_episode: dict[str, Any]) -> tuple[int, int] | None:
+    """(season_number, episode_number) of a Jellyfin episode, None when not numbered."""
+    season = jf_episode.get("ParentIndexNumber")
+    episode = jf_episode.get("IndexNumber")
+    if season is None or episode is None:
+        return None
+    return int(season), int(episode)
+
+
+def _index_episodes(jf_episodes: list[dict[str, Any]]) -> dict[tuple[int, int], dict]:
+    """Build lookup: (season_number, episode_number) → parsed streams."""
+    index = {}
+    for jf_ep in jf_episodes:
+        key = _episode_key(jf_ep)
+        if key is not None:
+            index[key] = _parse_streams(jf_ep.get("MediaStreams") or [])
+    return index
+
+
+class MovieStreamsIndex:
+    """
+    Index des films Jellyfin, construit une fois par sync des streams.
+
+    Ordre de recherche : dossier du fichier, (titre, année), titre seul, puis
+    titre normalisé (ponctuation, accents et article initial ignorés) avec et
+    sans année. Chaque étape est une recherche de dictionnaire.
+    """
+
+    def __init__(self, jellyfin_movies: list[dict[str, Any]]):
+        self.by_path: dict[str, MovieEntry] = {}
+        self.by_title_year: dict[tuple[str, int | None], MovieEntry] = {}
+        self.by_title: dict[str, MovieEntry] = {}
+        self.by_normalized_title_year: dict[tuple[str, int | None], MovieEntry] = {}
+        self.by_normalized_title: dict[str, MovieEntry] = {}
+
+        for jf in jellyfin_movies:
+            name = (jf.get("Name") or "").strip().lower()
+            normalized = _normalize_title(name)
+            year = jf.get("ProductionYear")
+            entry = (_parse_streams(jf.get("MediaStreams") or []), jf.get("Id"))
+            self.by_title_year[(name, year)] = entry
+            # Titre seul : le premier film rencontré l'emporte, comme l'ancien parcours linéaire
+            self.by_title.setdefault(name, entry)
+            if normalized:
+                self.by_normalized_title_year.setdefault((normalized, year), entry)
+                self.by_normalized_title.setdefault(normalized, entry)
+            # Index by parent folder of the Jellyfin file path
+            raw_path = jf.get("Path") or ""
+            if raw_path:
+                self.by_path[str(Path(raw_path).parent)] = entry
+
+    def match(self, title: str, year: int | None, media_path: str | None) -> tuple[MovieEntry | None, str | None]:
+        """
+        Retrouver le film Jellyfin d'un LibraryItem.
+
+        Returns:
+            (streams, jellyfin_id) et le critère utilisé, ou (None, None)
+        """
+        if media_path and (entry := self.by_path.get(media_path)) is not None:
+            return entry, "path"
+
+        title_norm = title.strip().lower()
+        if (entry := self.by_title_year.get((title_norm, year))) is not None:
+            return entry, "title_year"
+        if (entry := self.by_title.get(title_norm)) is not None:
+            return entry, "title"
+
+        normalized = _normalize_title(title_norm)
+        if not normalized:
+            return None, None
+        if (entry := self.by_normalized_title_year.get((normalized, year))) is not None:
+            return entry, "normalized_title_year"
+        if (entry := self.by_normalized_title.get(normalized)) is not None:
+            return entry, "normalized_title"
+        return None, None
+
+
 class JellyfinStreamsService:
     """Synchronise les informations de sous-titres/audio depuis l'API Jellyfin."""
 
@@ -62,7 +167,7 @@ class JellyfinStreamsService:
         if not config:
             print("⚠️  Jellyfin non configuré, skip sync des streams")
             return None
-        return JellyfinConnector(base_url=config.url, api_key=config.api_key, port=config.port)
+        return JellyfinConnector(base_url=config.url, api_key=config.api_key, port=config.port, shared_client=True)
 
     async def sync_movie_streams(self) -> dict[str, int]:
         """Sync media_streams for all movies in LibraryItem."""
@@ -74,20 +179,7 @@ class JellyfinStreamsService:
         jellyfin_movies = await connector.get_movies_with_streams()
         print(f"   → {len(jellyfin_movies)} films trouvés sur Jellyfin")
 
-        # Build lookup indexes
-        jf_index: dict[tuple[str, int | None], tuple[dict, str | None]] = {}
-        path_index: dict[str, tuple[dict, str | None]] = {}
-        for jf in jellyfin_movies:
-            name = (jf.get("Name") or "").strip().lower()
-            year = jf.get("ProductionYear")
-            streams = _parse_streams(jf.get("MediaStreams") or [])
-            jf_id = jf.get("Id")
-            jf_index[(name, year)] = (streams, jf_id)
-            # Index by parent folder of the Jellyfin file path
-            raw_path = jf.get("Path") or ""
-            if raw_path:
-                folder = str(Path(raw_path).parent)
-                path_index[folder] = (streams, jf_id)
+        index = MovieStreamsIndex(jellyfin_movies)
 
         # Load all movie LibraryItems
         movies = self.db.query(LibraryItem).filter(LibraryItem.media_type == MediaType.MOVIE).all()
@@ -95,21 +187,9 @@ class JellyfinStreamsService:
         updated = 0
         skipped = 0
         for item in movies:
-            title_norm = item.title.strip().lower()
-
-            # 1. Path-based match (primary)
-            entry = path_index.get(item.media_path) if item.media_path else None
-            if entry is not None:
+            entry, matched_by = index.match(item.title, item.year, item.media_path)
+            if matched_by == "path":
                 print(f"   🗂️  Path match: {item.title}")
-            else:
-                # 2. Title+year match (fallback)
-                entry = jf_index.get((title_norm, item.year))
-                if entry is None:
-                    # 3. Title-only match (last resort)
-                    entry = next(
-                        (v for (t, _y), v in jf_index.items() if t == title_norm),
-                        None,
-                    )
 
             if entry is not None:
                 streams, jf_id = entry
@@ -124,6 +204,25 @@ class JellyfinStreamsService:
         print(f"✅ Films : {updated} mis à jour, {skipped} non trouvés sur Jellyfin")
         return {"total": len(movies), "updated": updated, "skipped": skipped}
 
+    async def _index_episodes_bulk(
+        self, connector: JellyfinConnector, series_ids: set[str]
+    ) -> dict[str, dict[tuple[int, int], dict]]:
+        """Parcourir tous les épisodes Jellyfin par pages et les indexer par SeriesId."""
+        indexes: dict[str, dict[tuple[int, int], dict]] = {series_id: {} for series_id in series_ids}
+        pages = 0
+        async for jf_episodes in connector.iter_episodes_with_streams():
+            pages += 1
+            for jf_ep in jf_episodes:
+                index = indexes.get(jf_ep.get("SeriesId"))
+                if index is None:
+                    # Série Jellyfin absente de la bibliothèque : streams inutiles
+                    continue
+                key = _episode_key(jf_ep)
+                if key is not None:
+                    index[key] = _parse_streams(jf_ep.get("MediaStreams") or [])
+        print(f"   → {pages} pages d'épisodes Jellyfin récupérées")
+        return indexes
+
     async def sync_tv_streams(self) -> dict[str, int]:
         """Sync media_streams for all TV episodes in Episode."""
         connector = self._get_connector()
@@ -134,57 +233,69 @@ class JellyfinStreamsService:
         tv_items = self.db.query(LibraryItem).filter(LibraryItem.media_type == MediaType.TV).all()
         print(f"📺 Sync streams pour {len(tv_items)} séries TV...")
 
-        # Fetch all Jellyfin series with paths once, build path index
+        # Fetch all Jellyfin series with paths once, build path and name indexes
         jf_series_list = await connector.get_series_with_path()
         series_path_index: dict[str, str] = {
             jf.get("Path"): jf.get("Id") for jf in jf_series_list if jf.get("Path") and jf.get("Id")
         }
+        series_name_index: dict[str, str] = {
+            jf.get("Name").strip().lower(): jf.get("Id") for jf in jf_series_list if jf.get("Name") and jf.get("Id")
+        }
         print(f"   → {len(series_path_index)} séries Jellyfin indexées par path")
 
-        total_episodes = 0
-        total_updated = 0
-        total_skipped = 0
-
+        matched: list[tuple[LibraryItem, str]] = []
         for item in tv_items:
             # 1. Path-based match (primary)
             jf_series_id = series_path_index.get(item.media_path) if item.media_path else None
             if jf_series_id:
                 print(f"   🗂️  Path match: {item.title}")
             else:
-                # 2. Title search fallback
-                jf_series_id = await connector.get_series_id_by_title(item.title)
+                # 2. Exact title match, then title search fallback
+                jf_series_id = series_name_index.get(item.title.strip().lower())
+                if not jf_series_id:
+                    jf_series_id = await connector.get_series_id_by_title(item.title)
 
             if not jf_series_id:
                 print(f"   ⚠️  Série non trouvée sur Jellyfin : {item.title}")
                 continue
 
             # Store Jellyfin series ID for future webhook matching
-            if jf_series_id and not item.jellyfin_id:
+            if not item.jellyfin_id:
                 item.jellyfin_id = jf_series_id
+            matched.append((item, jf_series_id))
+
+        # Episodes with streams, indexed by Jellyfin series: (season_number, episode_number) → streams
+        series_ids = {jf_series_id for _item, jf_series_id in matched}
+        if settings.JELLYFIN_STREAMS_BULK:
+            jf_indexes = await self._index_episodes_bulk(connector, series_ids)
+        else:
+            jf_indexes = {
+                jf_series_id: _index_episodes(await connector.get_episodes_with_streams(jf_series_id))
+                for jf_series_id in series_ids
+            }
+
+        # Load DB episodes of every TV series in one query
+        episodes_by_item: dict[str, list[Episode]] = defaultdict(list)
+        episodes = (
+            self.db.query(Episode)
+            .join(LibraryItem, Episode.library_item_id == LibraryItem.id)
+            .filter(LibraryItem.media_type == MediaType.TV, Episode.has_file.is_(True))
+            .all()
+        )
+        for ep in episodes:
+            episodes_by_item[ep.library_item_id].append(ep)
 
-            # Fetch all episodes with streams for this series
-            jf_episodes = await connector.get_episodes_with_streams(jf_series_id)
-
-            # Build lookup: (season_number, episode_number) → streams
-            jf_ep_index: dict[tuple[int, int], dict] = {}
-            for jf_ep in jf_episodes:
-                s = jf_ep.get("ParentIndexNumber")
-                e = jf_ep.get("IndexNumber")
-                if s is not None and e is not None:
-                    jf_ep_index[(int(s), int(e))] = _parse_streams(jf_ep.get("MediaStreams") or [])
-
-            # Load DB episodes for this series
-            seasons = self.db.query(Season).filter(Season.library_item_id == item.id).all()
-            season_ids = [s.id for s in seasons]
+        total_episodes = 0
+        total_updated = 0
+        total_skipped = 0
 
-            if not season_ids:
+        for item, jf_series_id in matched:
+            item_episodes = episodes_by_item.get(item.id)
+            if not item_episodes:
                 continue
 
-            episodes = (
-                self.db.query(Episode).filter(Episode.season_id.in_(season_ids), Episode.has_file.is_(True)).all()
-            )
-
-            for ep in episodes:
+            jf_ep_index = jf_indexes.get(jf_series_id, {})
+            for ep in item_episodes:
                 key = (ep.season_number, ep.episode_number)
                 streams = jf_ep_index.get(key)
                 if streams is not None:
@@ -194,12 +305,122 @@ class JellyfinStreamsService:
                     total_skipped += 1
                 total_episodes += 1
 
-            print(f"   ✅ {item.title}: {len(episodes)} épisodes traités ({len(jf_ep_index)} trouvés sur Jellyfin)")
+            print(
+                f"   ✅ {item.title}: {len(item_episodes)} épisodes traités ({len(jf_ep_index)} trouvés sur Jellyfin)"
+            )
 
         self.db.commit()
         print(f"✅ Séries TV : {total_updated}/{total_episodes} épisodes mis à jour")
         return {"total": total_episodes, "updated": total_updated, "skipped": total_skipped}
 
+    def _apply_movie_items(self, jf_movies: list[dict[str, Any]]) -> int:
+        """Write streams of the given Jellyfin movies onto their LibraryItem; returns the number updated."""
+        if not jf_movies:
+            return 0
+        by_jellyfin_id = {
+            item.jellyfin_id: item
+            for item in self.db.query(LibraryItem).filter(
+                LibraryItem.media_type == MediaType.MOVIE,
+                LibraryItem.jellyfin_id.in_([jf.get("Id") for jf in jf_movies]),
+            )
+        }
+
+        updated = 0
+        for jf in jf_movies:
+            item = by_jellyfin_id.get(jf.get("Id"))
+            if item is None:
+                # New movie: match by folder, then case-insensitive title + year
+                raw_path = jf.get("Path") or ""
+                name = (jf.get("Name") or "").strip().lower()
+                query = self.db.query(LibraryItem).filter(LibraryItem.media_type == MediaType.MOVIE)
+                if raw_path:
+                    item = query.filter(LibraryItem.media_path == str(Path(raw_path).parent)).first()
+                if item is None and name:
+                    item = query.filter(
+                        func.lower(LibraryItem.title) == name, LibraryItem.year == jf.get("ProductionYear")
+                    ).first()
+                if item is None:
+                    continue
+                if not item.jellyfin_id:
+                    item.jellyfin_id = jf.get("Id")
+            item.media_streams = _parse_streams(jf.get("MediaStreams") or [])
+            updated += 1
+        return updated
+
+    def _apply_episode_items(self, jf_episodes: list[dict[str, Any]]) -> int:
+        """Write streams of the given Jellyfin episodes onto their Episode rows; returns the number updated."""
+        if not jf_episodes:
+            return 0
+        series_ids = {jf.get("SeriesId") for jf in jf_episodes if jf.get("SeriesId")}
+        series_by_jellyfin_id = {
+            item.jellyfin_id: item
+            for item in self.db.query(LibraryItem).filter(
+                LibraryItem.media_type == MediaType.TV, LibraryItem.jellyfin_id.in_(series_ids)
+            )
+        }
+        # Series not matched yet: case-insensitive series name, learning its Jellyfin ID
+        for jf in jf_episodes:
+            series_id = jf.get("SeriesId")
+            series_name = (jf.get("SeriesName") or "").strip().lower()
+            if not series_id or series_id in series_by_jellyfin_id or not series_name:
+                continue
+            item = (
+                self.db.query(LibraryItem)
+                .filter(LibraryItem.media_type == MediaType.TV, func.lower(LibraryItem.title) == series_name)
+                .first()
+            )
+            if item is not None:
+                if not item.jellyfin_id:
+                    item.jellyfin_id = series_id
+                series_by_jellyfin_id[series_id] = item
+
+        if not series_by_jellyfin_id:
+            return 0
+        episodes = {
+            (ep.library_item_id, ep.season_number, ep.episode_number): ep
+            for ep in self.db.query(Episode).filter(
+                Episode.library_item_id.in_([item.id for item in series_by_jellyfin_id.values()])
+            )
+        }
+
+        updated = 0
+        for jf in jf_episodes:
+            item = series_by_jellyfin_id.get(jf.get("SeriesId"))
+            key = _episode_key(jf)
+            if item is None or key is None:
+                continue
+            ep = episodes.get((item.id, *key))
+            if ep is not None:
+                ep.media_streams = _parse_streams(jf.get("MediaStreams") or [])
+                updated += 1
+        return updated
+
+    async def sync_items(self, item_ids: list[str]) -> dict[str, int]:
+        """
+        Sync media_streams of the given Jellyfin items only (webhook-driven incremental mode).
+
+        Movies and episodes are refreshed directly; a series refreshes all its episodes.
+
+        Raises:
+            httpx.HTTPError: Jellyfin unreachable (the caller re-queues the items)
+        """
+        connector = self._get_connector()
+        if not connector or not item_ids:
+            return {"total": 0, "updated": 0, "skipped": 0}
+
+        jf_items = await connector.get_items_with_streams(item_ids)
+        jf_movies = [jf for jf in jf_items if jf.get("Type") == "Movie"]
+        jf_episodes = [jf for jf in jf_items if jf.get("Type") == "Episode"]
+        for jf_series in (jf for jf in jf_items if jf.get("Type") == "Series"):
+            jf_episodes.extend(await connector.get_episodes_with_streams(jf_series.get("Id")))
+
+        updated = self._apply_movie_items(jf_movies) + self._apply_episode_items(jf_episodes)
+        self.db.commit()
+
+        total = len(jf_movies) + len(jf_episodes)
+        print(f"✅ Streams incrémentaux : {updated}/{total} items mis à jour")
+        return {"total": total, "updated": updated, "skipped": total - updated}
+
     async def sync_all(self) -> dict[str, Any]:
         """Sync streams for both movies and TV episodes."""
         print("\n🎞️  Synchronisation des MediaStreams Jellyfin...")
@@ -2,6 +2,9 @@ from typing import Any
 
 from app.services.base_connector import BaseConnector
 
+# Les métadonnées TMDB d'un média (titre, poster, synopsis) bougent très rarement
+MEDIA_DETAILS_CACHE_TTL = 3600
+
 
 class JellyseerrConnector(BaseConnector):
     """Connecteur pour l'API Jellyseerr"""
@@ -69,7 +72,7 @@ class JellyseerrConnector(BaseConnector):
         """
         try:
             endpoint = f"/api/v1/{'movie' if media_type == 'movie' else 'tv'}/{tmdb_id}"
-            return await self._get(endpoint)
+            return await self._get_cached(endpoint, ttl=MEDIA_DETAILS_CACHE_TTL)
         except Exception as e:
             print(f"⚠️  Erreur récupération détails média {tmdb_id}: {e}")
             return {}
@@ -0,0 +1,115 @@
+"""
+Parsing JSON incrémental des grosses réponses tableau (/api/v3/movie, /api/v3/series)
+
+Le corps est lu par morceaux et chaque élément du tableau est décodé dès qu'il
+est complet, puis réduit aux champs utiles : on ne matérialise jamais la
+réponse entière (images, titres alternatifs, fichiers...) en mémoire.
+"""
+
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any, Union
+
+# Champs à conserver : {champ: None (valeur entière) | sous-spécification (dict ou liste de dicts)}
+FieldSpec = dict[str, Union["FieldSpec", None]]
+
+_WHITESPACE = " \t\n\r"
+
+
+async def iter_json_array(chunks: AsyncIterable[str]) -> AsyncIterator[Any]:
+    """
+    Décoder un tableau JSON élément par élément à partir de morceaux de texte
+
+    Args:
+        chunks: Morceaux successifs du corps (ex: ``response.aiter_text()``)
+
+    Yields:
+        Chaque élément du tableau, dès qu'il est complet
+
+    Raises:
+        ValueError: Corps qui n'est pas un tableau JSON valide
+    """
+    decoder = json.JSONDecoder()
+    iterator = chunks.__aiter__()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+    # Taille minimale du tampon avant de retenter un décodage (évite de reparser un gros élément à chaque morceau)
+    wanted = 0
+
+    async def _read() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        try:
+            chunk = await iterator.__anext__()
+        except StopAsyncIteration:
+            eof = True
+            return False
+        # Compacter le tampon : on ne garde que ce qui reste à décoder
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer) or len(buffer) - pos < wanted and not eof:
+            if not await _read():
+                if pos < len(buffer) and wanted:
+                    # Fin du flux avec un élément incomplet : dernier essai, qui lèvera l'erreur
+                    wanted = 0
+                    continue
+                raise ValueError("Tableau JSON tronqué")
+            continue
+
+        char = buffer[pos]
+        if not started:
+            if char != "[":
+                raise ValueError("Tableau JSON attendu")
+            started = True
+            pos += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            pos += 1
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ValueError(f"JSON invalide: {e}") from e
+            wanted = 2 * (len(buffer) - pos)
+            continue
+
+        if end == len(buffer) and not eof and not isinstance(value, dict | list | str):
+            # Nombre / littéral en fin de tampon : peut-être coupé, attendre la suite
+            wanted = len(buffer) - pos + 1
+            continue
+
+        wanted = 0
+        pos = end
+        yield value
+
+
+def trim_record(value: Any, spec: FieldSpec | None) -> Any:
+    """
+    Réduire un enregistrement aux champs de ``spec`` (récursif, listes comprises)
+
+    Args:
+        value: Enregistrement décodé
+        spec: Champs à conserver, None pour garder la valeur telle quelle
+
+    Returns:
+        Copie réduite de l'enregistrement
+    """
+    if spec is None:
+        return value
+    if isinstance(value, list):
+        return [trim_record(element, spec) for element in value]
+    if isinstance(value, dict):
+        return {key: trim_record(value[key], sub_spec) for key, sub_spec in spec.items() if key in value}
+    return value
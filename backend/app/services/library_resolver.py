@@ -0,0 +1,179 @@
+"""
+Résolution en mémoire Jellyfin → LibraryItem pour les webhooks de lecture
+
+Chaque playback.start cherchait le LibraryItem par jellyfin_id, puis par
+lower(title) + année, puis par lower(title) seul : lower(title) n'utilise aucun
+index. Le résolveur garde, par type de média, les tables jellyfin_id → id,
+(titre normalisé, année) → id et titre normalisé → id. Il est réchauffé après
+chaque sync_radarr / sync_sonarr et complété quand un webhook apprend un
+jellyfin_id ; un item absent du cache retombe sur les requêtes SQL.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.enums import MediaType
+from app.models.models import LibraryItem
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_title(title: str | None) -> str:
+    return (title or "").strip().lower()
+
+
+@dataclass
+class _ResolverTable:
+    """Index d'un type de média"""
+
+    by_jellyfin_id: dict[str, str] = field(default_factory=dict)
+    by_title_year: dict[tuple[str, int | None], str] = field(default_factory=dict)
+    by_title: dict[str, str] = field(default_factory=dict)
+
+    def add(self, item_id: str, title: str | None, year: int | None, jellyfin_id: str | None):
+        if jellyfin_id:
+            self.by_jellyfin_id[jellyfin_id] = item_id
+        title_norm = normalize_title(title)
+        if title_norm:
+            # Premier item rencontré, comme le .first() des anciennes requêtes
+            self.by_title_year.setdefault((title_norm, year), item_id)
+            self.by_title.setdefault(title_norm, item_id)
+
+
+class LibraryItemResolver:
+    """Cache process-wide des correspondances Jellyfin → LibraryItem.id"""
+
+    def __init__(self):
+        self._tables: dict[MediaType, _ResolverTable] = {}
+        # Le worker des webhooks tourne dans un thread : les tables sont remplacées sous verrou
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self, db: Session, media_type: MediaType | None = None) -> int:
+        """
+        (Re)construire les index depuis la base, pour un type de média ou tous
+
+        Returns:
+            Nombre d'items indexés
+        """
+        media_types = [media_type] if media_type else [MediaType.MOVIE, MediaType.TV]
+        tables = {mt: _ResolverTable() for mt in media_types}
+        rows = (
+            db.query(
+                LibraryItem.id, LibraryItem.media_type, LibraryItem.title, LibraryItem.year, LibraryItem.jellyfin_id
+            )
+            .filter(LibraryItem.media_type.in_(media_types))
+            .order_by(LibraryItem.created_at, LibraryItem.id)
+            .all()
+        )
+        for item_id, item_media_type, title, year, jellyfin_id in rows:
+            tables[item_media_type].add(item_id, title, year, jellyfin_id)
+
+        with self._lock:
+            self._tables.update(tables)
+        logger.info(
+            f"🗂️  Résolveur LibraryItem réchauffé : {len(rows)} items ({', '.join(mt.value for mt in media_types)})"
+        )
+        return len(rows)
+
+    def is_warm(self, media_type: MediaType) -> bool:
+        return media_type in self._tables
+
+    def _lookup(
+        self, media_type: MediaType, jellyfin_id: str | None, title: str | None, year: int | None, use_year: bool
+    ) -> str | None:
+        table = self._tables.get(media_type)
+        if table is None:
+            return None
+        if jellyfin_id and (item_id := table.by_jellyfin_id.get(jellyfin_id)):
+            return item_id
+        title_norm = normalize_title(title)
+        if not title_norm:
+            return None
+        if use_year and (item_id := table.by_title_year.get((title_norm, year))):
+            return item_id
+        return table.by_title.get(title_norm)
+
+    def resolve(
+        self,
+        db: Session,
+        media_type: MediaType,
+        jellyfin_id: str | None,
+        title: str | None,
+        year: int | None = None,
+        use_year: bool = True,
+    ) -> LibraryItem | None:
+        """
+        Retrouver le LibraryItem d'un média Jellyfin
+
+        Ordre : jellyfin_id, puis (titre, année) si use_year, puis titre seul.
+        Le cache est réchauffé au premier appel ; un item introuvable dans le
+        cache (ajouté depuis le dernier réchauffage...) est cherché en base.
+
+        Args:
+            db: Session SQLAlchemy
+            media_type: Film ou série
+            jellyfin_id: ID Jellyfin du film ou de la série
+            title: Titre du film ou nom de la série
+            year: Année de production (films)
+            use_year: Essayer (titre, année) avant le titre seul
+        """
+        if not self.is_warm(media_type):
+            self.warm(db, media_type)
+
+        item_id = self._lookup(media_type, jellyfin_id, title, year, use_year)
+        if item_id is not None:
+            # Clé primaire : servi par l'identity map quand l'item est déjà chargé
+            item = db.get(LibraryItem, item_id)
+            if item is not None:
+                self.hits += 1
+                return item
+
+        self.misses += 1
+        item = self._query(db, media_type, jellyfin_id, title, year, use_year)
+        if item is not None:
+            self.remember(item, jellyfin_id=item.jellyfin_id)
+        return item
+
+    @staticmethod
+    def _query(
+        db: Session, media_type: MediaType, jellyfin_id: str | None, title: str | None, year: int | None, use_year: bool
+    ) -> LibraryItem | None:
+        """Chaîne de requêtes d'origine (cache froid ou item inconnu du cache)"""
+        query = db.query(LibraryItem).filter(LibraryItem.media_type == media_type)
+        if jellyfin_id:
+            item = query.filter(LibraryItem.jellyfin_id == jellyfin_id).first()
+            if item:
+                return item
+        title_norm = normalize_title(title)
+        if not title_norm:
+            return None
+        if use_year:
+            item = query.filter(func.lower(LibraryItem.title) == title_norm, LibraryItem.year == year).first()
+            if item:
+                return item
+        return query.filter(func.lower(LibraryItem.title) == title_norm).first()
+
+    def remember(self, item: LibraryItem, jellyfin_id: str | None = None):
+        """Ajouter / compléter l'entrée d'un item (jellyfin_id appris par un webhook...)"""
+        with self._lock:
+            table = self._tables.get(item.media_type)
+            if table is None:
+                return
+            table.add(item.id, item.title, item.year, jellyfin_id)
+
+    def clear(self):
+        """Oublier tous les index (tests)"""
+        with self._lock:
+            self._tables.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Instance globale du résolveur
+library_item_resolver = LibraryItemResolver()
@@ -0,0 +1,351 @@
+"""
+File d'attente des événements de lecture Jellyfin (write-behind)
+
+Le webhook /analytics/webhook/playback valide l'événement, le met en file et
+répond 202 immédiatement ; un worker unique vide la file par lots, dans un
+thread et une session DB dédiés, en conservant l'ordre d'arrivée (un Stop est
+toujours traité après son Play). La file est bornée : pleine, le webhook
+répond 503 et Jellyfin peut réessayer.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.enums import MediaType, ServiceType
+from app.models.models import ServiceConfiguration
+from app.services.analytics_service import AnalyticsService
+from app.services.endpoint import service_base_url
+from app.services.library_resolver import library_item_resolver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class PlaybackEvent:
+    """Événement de lecture validé, en attente de traitement"""
+
+    event_type: str
+    payload: dict[str, Any]
+    # Horodatage de réception : début / fin de session, indépendamment du retard de la file
+    received_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def _truncate(value: str | None, max_length: int = 255) -> str | None:
+    """Tronque une chaîne à une longueur maximale"""
+    if value is None:
+        return None
+    return value[:max_length]
+
+
+def process_playback_event(db: Session, event: PlaybackEvent) -> dict[str, Any]:
+    """
+    Appliquer un événement de lecture en base
+
+    Args:
+        db: Session SQLAlchemy
+        event: Événement validé par le webhook
+
+    Returns:
+        Résultat du traitement (status, session_id, event)
+    """
+    event_type = event.event_type
+    item = event.payload.get("Item", {})
+    user = event.payload.get("User", {})
+    session_info = event.payload.get("Session", {})
+    play_state = session_info.get("PlayState", {})
+    media_id = item.get("Id")
+    user_id = user.get("Id")
+
+    # Traitement selon le type d'événement
+    if event_type == "playback.start":
+        # Déterminer le type de média
+        item_type = item.get("Type", "Movie")
+        media_type = "tv" if item_type == "Episode" else "movie"
+
+        # Info épisode si série
+        episode_info = None
+        if item_type == "Episode":
+            season = item.get("ParentIndexNumber", 0)
+            episode = item.get("IndexNumber", 0)
+            episode_info = f"S{season:02d}E{episode:02d}"
+
+        # Extraire la qualité vidéo depuis les MediaStreams
+        media_streams = item.get("MediaStreams", [])
+        video_stream = next((s for s in media_streams if s.get("Type") == "Video"), {})
+        video_height = video_stream.get("Height", 0)
+
+        # Mapper la qualité (vérifier HDR pour 2160p)
+        video_range = video_stream.get("VideoRange", "")
+        if video_height >= 2160:
+            video_quality = "FOUR_K_HDR" if video_range and video_range.upper() == "HDR" else "FOUR_K"
+        else:
+            quality_map = {1080: "FULL_HD", 720: "HD", 480: "SD"}
+            video_quality = quality_map.get(video_height, "UNKNOWN")
+
+        # Codec vidéo source
+        video_codec_source = video_stream.get("Codec", "unknown")
+
+        # Déterminer si c'est du transcodage
+        play_method = play_state.get("PlayMethod", "DirectPlay")
+        is_transcoding = play_method == "Transcode"
+        is_direct_playing = play_method == "DirectPlay"
+
+        # Codec cible si transcodage
+        video_codec_target = None
+        if is_transcoding:
+            video_codec_target = "h264"  # Par défaut pour le transcodage
+
+        # Durée en secondes
+        run_time_ticks = item.get("RunTimeTicks", 0)
+        duration_seconds = run_time_ticks // 10000000 if run_time_ticks else None
+
+        # Déterminer le type d'appareil
+        device_name = session_info.get("DeviceName", "Unknown")
+        client_name = session_info.get("Client", "Unknown")
+
+        # URL du poster : Utiliser l'URL de Jellyfin depuis la base de données
+        poster_url = None
+        jellyfin_service = (
+            db.query(ServiceConfiguration).filter(ServiceConfiguration.service_name == ServiceType.JELLYFIN).first()
+        )
+        jellyfin_url = service_base_url(jellyfin_service) if jellyfin_service else None
+        if item.get("ImageTags", {}).get("Primary") and jellyfin_url:
+            poster_url = f"{jellyfin_url}/Items/{media_id}/Images/Primary"
+
+        session_data = {
+            "media_id": media_id,
+            "media_title": _truncate(item.get("Name", "Unknown")),
+            "media_type": media_type,
+            "media_year": item.get("ProductionYear"),
+            "episode_info": _truncate(episode_info, 20),
+            "poster_url": _truncate(poster_url, 500),
+            "user_id": user_id,
+            "user_name": _truncate(user.get("Name", "Unknown")),
+            "device_name": _truncate(device_name),
+            "client_name": _truncate(client_name),
+            "video_quality": video_quality,
+            "is_transcoding": is_transcoding,
+            "is_direct_playing": is_direct_playing,
+            "transcoding_progress": 0,
+            "transcoding_speed": None,
+            "video_codec_source": _truncate(video_codec_source, 50),
+            "video_codec_target": _truncate(video_codec_target, 50),
+            "duration_seconds": duration_seconds,
+            "start_time": event.received_at,
+        }
+
+        # Recherche du LibraryItem correspondant (cache en mémoire, requêtes SQL en dernier recours)
+        library_item = None
+        if media_type == "movie":
+            # jellyfin_id, puis titre + année, puis titre seul
+            library_item = library_item_resolver.resolve(
+                db, MediaType.MOVIE, media_id, item.get("Name", ""), item.get("ProductionYear")
+            )
+        elif media_type == "tv":
+            # ID Jellyfin de la série, puis nom de la série
+            library_item = library_item_resolver.resolve(
+                db, MediaType.TV, item.get("SeriesId"), item.get("SeriesName"), use_year=False
+            )
+
+        if library_item:
+            session_data["library_item_id"] = library_item.id
+            # Learn Jellyfin ID from webhook so future matches use the fast path
+            if not library_item.jellyfin_id:
+                if media_type == "movie":
+                    library_item.jellyfin_id = media_id
+                elif media_type == "tv":
+                    jf_series_id = item.get("SeriesId")
+                    if jf_series_id:
+                        library_item.jellyfin_id = jf_series_id
+                db.flush()
+                library_item_resolver.remember(library_item, jellyfin_id=library_item.jellyfin_id)
+
+        playback_session = AnalyticsService.start_session(db, session_data)
+        logger.info(f"✅ Session créée : {playback_session.id} - {playback_session.media_title}")
+        return {"status": "success", "session_id": playback_session.id, "event": event_type}
+
+    elif event_type == "playback.stop":
+        # Position de lecture en secondes
+        playback_position_ticks = play_state.get("PositionTicks", 0)
+        watched_seconds = playback_position_ticks // 10000000 if playback_position_ticks else 0
+
+        playback_session = AnalyticsService.stop_session(
+            db, media_id, user_id, watched_seconds, ended_at=event.received_at
+        )
+
+        if playback_session:
+            logger.info(
+                f"✅ Session arrêtée : {playback_session.id} - {playback_session.media_title} ({watched_seconds}s)"
+            )
+            return {"status": "success", "session_id": playback_session.id, "event": event_type}
+        else:
+            logger.warning(f"⚠️  Aucune session active trouvée pour media_id={media_id}, user_id={user_id}")
+            return {"status": "no_active_session", "event": event_type}
+
+    elif event_type == "playback.pause":
+        playback_session = AnalyticsService.pause_session(db, media_id, user_id)
+        if playback_session:
+            logger.info(f"⏸️  Session mise en pause : {playback_session.id}")
+            return {"status": "success", "session_id": playback_session.id, "event": event_type}
+        return {"status": "no_active_session", "event": event_type}
+
+    elif event_type == "playback.unpause":
+        playback_session = AnalyticsService.resume_session(db, media_id, user_id)
+        if playback_session:
+            logger.info(f"▶️  Session reprise : {playback_session.id}")
+            return {"status": "success", "session_id": playback_session.id, "event": event_type}
+        return {"status": "no_active_session", "event": event_type}
+
+    else:
+        logger.warning(f"⚠️  Événement non supporté : {event_type}")
+        return {"status": "ignored", "event": event_type}
+
+
+class PlaybackEventQueue:
+    """File bornée des événements de lecture et son worker"""
+
+    def __init__(self):
+        self._queue: asyncio.Queue[PlaybackEvent] | None = None
+        self._worker: asyncio.Task | None = None
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.high_water = 0
+        self.last_lag_seconds = 0.0
+
+    @property
+    def queue(self) -> asyncio.Queue[PlaybackEvent]:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=settings.PLAYBACK_WEBHOOK_QUEUE_MAX_SIZE)
+        return self._queue
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def submit(self, event: PlaybackEvent) -> bool:
+        """
+        Mettre un événement en file sans attendre
+
+        Returns:
+            False si la file est pleine (backpressure : le webhook répond 503)
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        self.high_water = max(self.high_water, self.queue.qsize())
+        return True
+
+    def _take_batch(self, first: PlaybackEvent | None = None) -> list[PlaybackEvent]:
+        batch = [first] if first is not None else []
+        while len(batch) < settings.PLAYBACK_WEBHOOK_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    def process_batch(self, events: list[PlaybackEvent], db: Session | None = None) -> list[dict[str, Any]]:
+        """
+        Traiter un lot d'événements dans l'ordre, dans une seule session DB
+
+        Un événement en échec est journalisé et compté sans bloquer les suivants.
+        """
+        own_session = db is None
+        db = db or SessionLocal()
+        results = []
+        try:
+            for event in events:
+                self.last_lag_seconds = time.monotonic() - event.enqueued_at
+                try:
+                    results.append(process_playback_event(db, event))
+                    self.processed += 1
+                except Exception as e:
+                    db.rollback()
+                    self.failed += 1
+                    logger.error(f"❌ Erreur lors du traitement de l'événement {event.event_type} : {e}")
+                    results.append({"status": "error", "event": event.event_type})
+            self.batches += 1
+        finally:
+            if own_session:
+                db.close()
+        return results
+
+    def process_pending(self, db: Session | None = None) -> list[dict[str, Any]]:
+        """Traiter tout ce qui est en file (arrêt de l'application, tests)"""
+        results = []
+        while batch := self._take_batch():
+            results.extend(self.process_batch(batch, db))
+        return results
+
+    async def _run(self):
+        while True:
+            batch = self._take_batch(await self.queue.get())
+            try:
+                # Les services analytics sont synchrones : hors de la boucle d'événements
+                await asyncio.to_thread(self.process_batch, batch)
+            except Exception as e:
+                # Base injoignable... : le lot est perdu mais le worker continue
+                self.failed += len(batch)
+                logger.error(f"❌ Lot de {len(batch)} événements de lecture non traité : {e}")
+
+    def start(self):
+        """Démarrer le worker dans la boucle d'événements courante"""
+        if self.running:
+            return
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+        logger.info("✅ Worker des webhooks de lecture démarré")
+
+    async def stop(self):
+        """Arrêter le worker puis traiter les événements restants"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        if self._queue is not None and not self._queue.empty():
+            await asyncio.to_thread(self.process_pending)
+
+    def stats(self) -> dict[str, Any]:
+        """Métriques de la file (profondeur, débit, rejets pour backpressure)"""
+        return {
+            "running": self.running,
+            "depth": self.queue.qsize(),
+            "max_size": self.queue.maxsize,
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+        }
+
+    def clear(self):
+        """Oublier la file et les métriques (tests)"""
+        self._queue = None
+        self._worker = None
+        self._reset_metrics()
+
+
+# Instance globale de la file
+playback_event_queue = PlaybackEventQueue()
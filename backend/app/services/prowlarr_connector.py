@@ -1,6 +1,10 @@
 from typing import Any
 
 from app.services.base_connector import BaseConnector
+from app.services.response_cache import response_cache
+
+# Indexer definitions rarely change; toggle_indexer invalidates them explicitly
+INDEXERS_CACHE_TTL = 600
 
 
 class ProwlarrConnector(BaseConnector):
@@ -19,7 +23,7 @@ class ProwlarrConnector(BaseConnector):
 
     async def get_indexers(self) -> list[dict[str, Any]]:
         try:
-            return await self._get("/api/v1/indexer")
+            return await self._get_cached("/api/v1/indexer", ttl=INDEXERS_CACHE_TTL)
         except Exception as e:
             print(f"❌ Prowlarr get_indexers error: {e}")
             return []
@@ -85,6 +89,7 @@ class ProwlarrConnector(BaseConnector):
             indexer = await self._get(f"/api/v1/indexer/{indexer_id}")
             indexer["enable"] = enable
             await self._put(f"/api/v1/indexer/{indexer_id}", indexer)
+            response_cache.invalidate(self.base_url, "/api/v1/indexer")
             return True
         except Exception as e:
             print(f"❌ Prowlarr toggle_indexer error: {e}")
@@ -2,42 +2,88 @@
 Connecteur pour qBittorrent
 """
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 
 import aiohttp
 
+from app.core.config import settings
 from app.services.base_connector import BaseConnector
+from app.services.qbittorrent_maindata import TorrentTable, maindata_registry
+from app.services.qbittorrent_sessions import SessionState, qbittorrent_session_registry
 
 logger = logging.getLogger(__name__)
 
 
 class QBittorrentConnector(BaseConnector):
-    def __init__(self, base_url: str, username: str, password: str, port: int | None = None):
-        if port:
-            full_url = f"{base_url}:{port}"
-        else:
-            full_url = base_url
-
-        super().__init__(base_url=full_url, api_key="")  # api_key vide car non utilisé
+    def __init__(
+        self, base_url: str, username: str, password: str, port: int | None = None, shared_session: bool = False
+    ):
+        super().__init__(base_url=base_url, api_key="", port=port)  # api_key vide car non utilisé
 
         self.username = username
         self.password = password
-        self.session: aiohttp.ClientSession | None = None
-        self._authenticated = False
+        # shared_session=True : session authentifiée (cookie SID + pool keep-alive) du registre,
+        # réutilisée d'un connecteur à l'autre et non fermée par close()
+        self._shared_session = shared_session
+        self._state = self._resolve_state() if shared_session else SessionState()
+
+    def _resolve_state(self) -> SessionState:
+        return qbittorrent_session_registry.get_state(self.base_url, self.username, self.password)
+
+    @property
+    def session(self) -> aiohttp.ClientSession | None:
+        return self._state.session
+
+    @session.setter
+    def session(self, value: aiohttp.ClientSession | None):
+        self._state.session = value
+
+    @property
+    def _authenticated(self) -> bool:
+        return self._state.authenticated
+
+    @_authenticated.setter
+    def _authenticated(self, value: bool):
+        self._state.authenticated = value
 
     async def _ensure_session(self):
         """Crée une session HTTP si elle n'existe pas"""
+        if self._shared_session:
+            self._state = self._resolve_state()
         if self.session is None or self.session.closed:
-            # Créer une session avec gestion automatique des cookies
-            jar = aiohttp.CookieJar(unsafe=True)  # unsafe=True pour accepter les cookies de toutes les IPs
-            self.session = aiohttp.ClientSession(cookie_jar=jar)
+            self.session = SessionState.build_session()
             self._authenticated = False
 
-    async def _ensure_authenticated(self):
-        """S'assure que la session est authentifiée"""
+    async def ensure_authenticated(self) -> bool:
+        """S'assure que la session est authentifiée (login seulement si aucun SID valide n'est connu)"""
+        if self._shared_session:
+            await self._ensure_session()
         if not self._authenticated:
-            await self.login()
+            return await self.login()
+        return True
+
+    @asynccontextmanager
+    async def _authed_get(self, url: str, params: dict[str, Any] | None = None) -> AsyncIterator[Any]:
+        """
+        GET authentifié ; sur un 403 (SID expiré), reconnexion puis un seul nouvel essai
+
+        Yields:
+            La réponse aiohttp (403 si la reconnexion a échoué)
+        """
+        await self.ensure_authenticated()
+        for attempt in range(2):
+            async with self.session.get(url, params=params) as response:
+                if response.status == 403 and attempt == 0:
+                    logger.warning("🔐 403 qBittorrent : session expirée, reconnexion")
+                    self._authenticated = False
+                    if await self.login():
+                        continue
+                yield response
+                return
 
     async def login(self) -> bool:
         try:
@@ -61,6 +107,7 @@ class QBittorrentConnector(BaseConnector):
                     logger.info(f"🍪 Cookies reçus : {cookies}")
 
                     self._authenticated = True
+                    self._state.logins += 1
                     logger.info("✅ Auth qBittorent success")
                     return True
                 else:
@@ -82,35 +129,21 @@ class QBittorrentConnector(BaseConnector):
             Torrent informations
         """
         try:
-            await self._ensure_authenticated()
-
             # Récupérer les infos du torrent
             url = f"{self.base_url}/api/v2/torrents/info"
             params = {"hashes": torrent_hash}
 
             logger.info(f"🔍 Récupération infos torrent : {url}?hashes={torrent_hash}")
 
-            async with self.session.get(url, params=params) as response:
+            async with self._authed_get(url, params=params) as response:
                 logger.info(f"📥 Response get_torrent_info : status={response.status}")
 
                 if response.status == 200:
                     torrents = await response.json()
 
                     if torrents and len(torrents) > 0:
-                        torrent = torrents[0]
-
                         # Formater les données
-                        return {
-                            "hash": torrent.get("hash"),
-                            "name": torrent.get("name"),
-                            "status": self._map_status(torrent.get("state")),
-                            "ratio": round(torrent.get("ratio", 0), 2),
-                            "tags": torrent.get("tags", "").split(",") if torrent.get("tags") else [],
-                            "seeding_time": torrent.get("seeding_time", 0),  # en secondes
-                            "download_date": torrent.get("completion_on"),  # timestamp
-                            "size": torrent.get("size", 0),
-                            "progress": round(torrent.get("progress", 0) * 100, 1),
-                        }
+                        return self._format_torrent_info(torrents[0], torrents[0].get("hash"))
                     else:
                         logger.warning(f"⚠️  Torrent {torrent_hash} not found")
                         return None
@@ -127,45 +160,145 @@ class QBittorrentConnector(BaseConnector):
             logger.error(f"❌ Error from getting torrent : {e}")
             return None
 
-    async def get_torrents_info(self, hashes: list[str]) -> dict[str, dict[str, Any]]:
+    async def sync_maindata(self, max_age: float | None = None) -> TorrentTable | None:
+        """
+        Update the local torrent table from /api/v2/sync/maindata.
+
+        Only the diff since the table's last ``rid`` is transferred (changed fields,
+        new torrents, ``torrents_removed``); the first call gets a full update.
+
+        Args:
+            max_age: Skip the request if the table was synced less than max_age seconds ago
+                (default: QBITTORRENT_MAINDATA_MAX_AGE_SECONDS)
+
+        Returns:
+            The up-to-date table, or None if maindata is disabled or the request failed
+        """
+        if not settings.QBITTORRENT_MAINDATA_ENABLED:
+            return None
+
+        max_age = settings.QBITTORRENT_MAINDATA_MAX_AGE_SECONDS if max_age is None else max_age
+        table = maindata_registry.get_table(self.base_url)
+
+        async with table.lock:
+            if table.is_fresh(max_age):
+                return table
+
+            try:
+                url = f"{self.base_url}/api/v2/sync/maindata"
+                async with self._authed_get(url, params={"rid": table.rid}) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        table.apply(data)
+                        logger.info(
+                            f"🔄 maindata rid={table.rid}: {len(data.get('torrents') or {})} changed, "
+                            f"{len(data.get('torrents_removed') or [])} removed, {len(table.torrents)} total"
+                        )
+                        return table
+                    elif response.status == 403:
+                        logger.error("❌ 403 Forbidden - session expired?")
+                        self._authenticated = False
+                        return None
+                    else:
+                        logger.error(f"❌ maindata HTTP {response.status}")
+                        return None
+
+            except Exception as e:
+                logger.error(f"❌ maindata sync error: {e}")
+                return None
+
+    async def get_torrents_info(
+        self, hashes: list[str], chunk_size: int | None = None, concurrency: int | None = None
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Torrent info for multiple hashes, read from the maindata torrent table.
+
+        Falls back to chunked /torrents/info requests (fetch_torrents_info) when
+        maindata is disabled or unavailable.
+
+        Args:
+            hashes: List of torrent hashes
+            chunk_size: Hashes per request on the fallback path
+            concurrency: Max requests in flight on the fallback path
+
+        Returns:
+            Dict mapping hash (uppercase) -> torrent info dict. Missing torrents are omitted.
+        """
+        unique_hashes = list(dict.fromkeys(h for h in hashes if h))
+        if not unique_hashes:
+            return {}
+
+        table = await self.sync_maindata()
+        if table is None:
+            return await self.fetch_torrents_info(unique_hashes, chunk_size=chunk_size, concurrency=concurrency)
+
+        result = {}
+        for torrent_hash in unique_hashes:
+            fields = table.get(torrent_hash)
+            if fields is not None:
+                result[torrent_hash.upper()] = self._format_torrent_info(fields, torrent_hash.upper())
+        logger.info(f"✅ maindata lookup: {len(result)}/{len(unique_hashes)} torrents found")
+        return result
+
+    async def fetch_torrents_info(
+        self, hashes: list[str], chunk_size: int | None = None, concurrency: int | None = None
+    ) -> dict[str, dict[str, Any]]:
         """
-        Batch-fetch torrent info for multiple hashes in a single API call.
+        Batch-fetch torrent info for multiple hashes from /api/v2/torrents/info.
+
+        Hashes are split into chunks of ``chunk_size`` (one ``hashes=a|b|...`` request
+        each, so the URL stays short) fetched concurrently over the same session.
 
         Args:
             hashes: List of torrent hashes
+            chunk_size: Hashes per request (default: QBITTORRENT_HASH_CHUNK_SIZE)
+            concurrency: Max requests in flight (default: QBITTORRENT_HASH_CONCURRENCY)
 
         Returns:
-            Dict mapping hash -> torrent info dict. Missing torrents are omitted.
+            Dict mapping hash -> torrent info dict. Missing torrents (or failed chunks) are omitted.
         """
-        if not hashes:
+        unique_hashes = list(dict.fromkeys(h for h in hashes if h))
+        if not unique_hashes:
             return {}
 
+        chunk_size = max(1, chunk_size or settings.QBITTORRENT_HASH_CHUNK_SIZE)
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.QBITTORRENT_HASH_CONCURRENCY))
+        chunks = [unique_hashes[i : i + chunk_size] for i in range(0, len(unique_hashes), chunk_size)]
+
         try:
-            await self._ensure_authenticated()
+            # Authentification unique avant de lancer les requêtes en parallèle
+            await self.ensure_authenticated()
 
-            url = f"{self.base_url}/api/v2/torrents/info"
-            params = {"hashes": "|".join(hashes)}
+            logger.info(f"🔍 Batch fetch {len(unique_hashes)} torrents ({len(chunks)} chunk(s) of {chunk_size})")
 
-            logger.info(f"🔍 Batch fetch {len(hashes)} torrents")
+            async def _fetch(chunk: list[str]) -> dict[str, dict[str, Any]]:
+                async with semaphore:
+                    return await self._fetch_torrents_chunk(chunk)
 
-            async with self.session.get(url, params=params) as response:
+            result: dict[str, dict[str, Any]] = {}
+            for chunk_result in await asyncio.gather(*(_fetch(chunk) for chunk in chunks)):
+                result.update(chunk_result)
+
+            logger.info(f"✅ Batch fetch: {len(result)}/{len(unique_hashes)} torrents found")
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ Error from fetching torrents : {e}")
+            return {}
+
+    async def _fetch_torrents_chunk(self, hashes: list[str]) -> dict[str, dict[str, Any]]:
+        """One /torrents/info request for a chunk of hashes (empty dict on failure)"""
+        url = f"{self.base_url}/api/v2/torrents/info"
+        params = {"hashes": "|".join(hashes)}
+
+        try:
+            async with self._authed_get(url, params=params) as response:
                 if response.status == 200:
                     torrents = await response.json()
                     result = {}
                     for torrent in torrents:
                         h = torrent.get("hash", "").upper()
-                        result[h] = {
-                            "hash": h,
-                            "name": torrent.get("name"),
-                            "status": self._map_status(torrent.get("state")),
-                            "ratio": round(torrent.get("ratio", 0), 2),
-                            "tags": torrent.get("tags", "").split(",") if torrent.get("tags") else [],
-                            "seeding_time": torrent.get("seeding_time", 0),
-                            "download_date": torrent.get("completion_on"),
-                            "size": torrent.get("size", 0),
-                            "progress": round(torrent.get("progress", 0) * 100, 1),
-                        }
-                    logger.info(f"✅ Batch fetch: {len(result)}/{len(hashes)} torrents found")
+                        result[h] = self._format_torrent_info(torrent, h)
                     return result
                 elif response.status == 403:
                     logger.error("❌ 403 Forbidden - Expired session ?")
@@ -176,9 +309,23 @@ class QBittorrentConnector(BaseConnector):
                     return {}
 
         except Exception as e:
-            logger.error(f"❌ Error from fetching torrents : {e}")
+            logger.error(f"❌ Error from fetching torrents chunk ({len(hashes)} hashes) : {e}")
             return {}
 
+    def _format_torrent_info(self, torrent: dict[str, Any], torrent_hash: str | None) -> dict[str, Any]:
+        """Format stocké dans torrent_info (LibraryItem / LibraryItemTorrent)"""
+        return {
+            "hash": torrent_hash,
+            "name": torrent.get("name"),
+            "status": self._map_status(torrent.get("state")),
+            "ratio": round(torrent.get("ratio", 0), 2),
+            "tags": torrent.get("tags", "").split(",") if torrent.get("tags") else [],
+            "seeding_time": torrent.get("seeding_time", 0),  # en secondes
+            "download_date": torrent.get("completion_on"),  # timestamp
+            "size": torrent.get("size", 0),
+            "progress": round(torrent.get("progress", 0) * 100, 1),
+        }
+
     def _map_status(self, qbt_state: str) -> str:
         """
         Map qBittorrent states
@@ -263,16 +410,21 @@ class QBittorrentConnector(BaseConnector):
         """
         Returns all torrents in the client-agnostic schema.
 
+        Read from the maindata torrent table; falls back to a full /torrents/info
+        request when maindata is disabled or unavailable.
+
         Returns:
             List of torrent dicts
         """
-        try:
-            await self._ensure_authenticated()
+        table = await self.sync_maindata()
+        if table is not None:
+            return [self._map_torrent({**fields, "hash": h}) for h, fields in table.torrents.items()]
 
+        try:
             url = f"{self.base_url}/api/v2/torrents/info"
             logger.info("🔍 Fetching all torrents")
 
-            async with self.session.get(url) as response:
+            async with self._authed_get(url) as response:
                 if response.status == 200:
                     torrents = await response.json()
                     result = [self._map_torrent(t) for t in torrents]
@@ -294,23 +446,22 @@ class QBittorrentConnector(BaseConnector):
         """
         Returns global transfer stats from qBittorrent.
 
+        Read from the maindata server_state when available, /transfer/info otherwise.
+
         Returns:
             Dict with dl_speed, ul_speed, connection_status
         """
-        try:
-            await self._ensure_authenticated()
+        table = await self.sync_maindata()
+        if table is not None and table.server_state:
+            return self._map_transfer(table.server_state)
 
+        try:
             url = f"{self.base_url}/api/v2/transfer/info"
             logger.info("🔍 Fetching transfer info")
 
-            async with self.session.get(url) as response:
+            async with self._authed_get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    return {
-                        "dl_speed": data.get("dl_info_speed", 0),
-                        "ul_speed": data.get("up_info_speed", 0),
-                        "connection_status": data.get("connection_status", "disconnected"),
-                    }
+                    return self._map_transfer(await response.json())
                 elif response.status == 403:
                     logger.error("❌ 403 Forbidden - session expired?")
                     self._authenticated = False
@@ -323,6 +474,15 @@ class QBittorrentConnector(BaseConnector):
             logger.error(f"❌ get_transfer_info error: {e}")
             return {"dl_speed": 0, "ul_speed": 0, "connection_status": "disconnected"}
 
+    @staticmethod
+    def _map_transfer(data: dict) -> dict:
+        """Maps /transfer/info (or maindata server_state) to the transfer schema."""
+        return {
+            "dl_speed": data.get("dl_info_speed", 0),
+            "ul_speed": data.get("up_info_speed", 0),
+            "connection_status": data.get("connection_status", "disconnected"),
+        }
+
     async def test_connection(self) -> tuple[bool, str]:
         """
         Teste la connexion à qBittorrent
@@ -356,7 +516,9 @@ class QBittorrentConnector(BaseConnector):
             return False, f"Erreur de connexion : {str(e)}"
 
     async def close(self):
-        """Ferme la session HTTP"""
+        """Ferme la session HTTP (la session partagée reste ouverte dans le registre)"""
+        if self._shared_session:
+            return
         if self.session and not self.session.closed:
             await self.session.close()
             logger.info("🔒 Session qBittorrent fermée")
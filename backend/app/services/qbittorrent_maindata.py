@@ -0,0 +1,113 @@
+"""
+Table locale des torrents qBittorrent, tenue à jour par /api/v2/sync/maindata
+
+qBittorrent renvoie un ``rid`` avec chaque réponse maindata : en le repassant
+à l'appel suivant, on ne reçoit que les champs modifiés, les torrents ajoutés
+et la liste ``torrents_removed``. La table est process-wide (une par endpoint)
+pour survivre aux connecteurs créés à chaque requête / sync.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class TorrentTable:
+    """État qBittorrent reconstruit à partir des diffs maindata"""
+
+    rid: int = 0
+    # hash (minuscules, comme qBittorrent) -> champs bruts de /torrents/info (sans "hash")
+    torrents: dict[str, dict[str, Any]] = field(default_factory=dict)
+    server_state: dict[str, Any] = field(default_factory=dict)
+    # time.monotonic() de la dernière synchronisation réussie (0 = jamais)
+    synced_at: float = 0.0
+    full_updates: int = 0
+    partial_updates: int = 0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+    # Boucle d'événements du verrou : un asyncio.Lock n'est pas réutilisable d'une boucle à l'autre
+    loop: asyncio.AbstractEventLoop | None = field(default=None, repr=False)
+
+    def apply(self, data: dict[str, Any]):
+        """
+        Appliquer une réponse maindata (complète ou différentielle)
+
+        Args:
+            data: Corps JSON de /api/v2/sync/maindata
+        """
+        torrents = data.get("torrents") or {}
+        if data.get("full_update"):
+            self.torrents = {h: dict(fields) for h, fields in torrents.items()}
+            self.server_state = dict(data.get("server_state") or {})
+            self.full_updates += 1
+        else:
+            for h, fields in torrents.items():
+                self.torrents.setdefault(h, {}).update(fields)
+            for h in data.get("torrents_removed") or []:
+                self.torrents.pop(h, None)
+            self.server_state.update(data.get("server_state") or {})
+            self.partial_updates += 1
+
+        self.rid = data.get("rid", self.rid)
+        self.synced_at = time.monotonic()
+
+    def is_fresh(self, max_age: float) -> bool:
+        return self.synced_at > 0 and time.monotonic() - self.synced_at < max_age
+
+    def get(self, torrent_hash: str) -> dict[str, Any] | None:
+        """Champs bruts d'un torrent, quelle que soit la casse du hash"""
+        return self.torrents.get(torrent_hash.lower())
+
+    def reset(self):
+        """Repartir d'un rid 0 (prochain appel = mise à jour complète)"""
+        self.rid = 0
+        self.torrents = {}
+        self.server_state = {}
+        self.synced_at = 0.0
+
+
+class MaindataRegistry:
+    """Tables de torrents indexées par endpoint qBittorrent"""
+
+    def __init__(self):
+        self._tables: dict[str, TorrentTable] = {}
+
+    def get_table(self, base_url: str) -> TorrentTable:
+        """Retourner la table d'un endpoint (créée vide au premier appel)"""
+        key = base_url.rstrip("/")
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = TorrentTable(loop=loop)
+        elif table.loop is not loop:
+            table.lock = asyncio.Lock()
+            table.loop = loop
+        return table
+
+    def invalidate(self, base_url: str | None = None) -> int:
+        """
+        Oublier la table d'un endpoint (ou toutes si base_url est None)
+
+        Returns:
+            Nombre de tables supprimées
+        """
+        prefix = base_url.rstrip("/") if base_url else None
+        keys = [key for key in self._tables if prefix is None or key == prefix]
+        for key in keys:
+            del self._tables[key]
+        return len(keys)
+
+    def clear(self):
+        self._tables.clear()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+
+# Instance globale du registre
+maindata_registry = MaindataRegistry()
@@ -0,0 +1,114 @@
+"""
+Registre process-wide des sessions qBittorrent authentifiées
+
+qBittorrent authentifie par cookie SID : une session aiohttp (pool keep-alive +
+cookie jar) par endpoint est partagée entre les connecteurs créés à chaque
+requête / sync, pour ne pas refaire /api/v2/auth/login à chaque rafraîchissement
+du dashboard. Le connecteur se reconnecte de lui-même sur un 403 (SID expiré).
+"""
+
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionState:
+    """Session aiohttp d'un endpoint qBittorrent et son état d'authentification"""
+
+    session: aiohttp.ClientSession | None = None
+    authenticated: bool = False
+    # Empreinte (username, password) : des credentials modifiés invalident la session
+    credentials: str = ""
+    # Boucle d'événements de création : une session aiohttp n'est pas réutilisable d'une boucle à l'autre
+    loop: asyncio.AbstractEventLoop | None = field(default=None, repr=False)
+    logins: int = 0
+
+    @staticmethod
+    def build_session() -> aiohttp.ClientSession:
+        """Session avec pool keep-alive et cookie jar (unsafe=True : cookies acceptés pour les IPs)"""
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            keepalive_timeout=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        )
+        return aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+
+def _fingerprint(username: str, password: str) -> str:
+    return hashlib.sha256(f"{username}\0{password}".encode()).hexdigest()
+
+
+class QBittorrentSessionRegistry:
+    """Sessions qBittorrent partagées, indexées par base_url"""
+
+    def __init__(self):
+        self._states: dict[str, SessionState] = {}
+        # Fermetures lancées en tâche de fond : référence gardée jusqu'à la fin (sinon collectables)
+        self._closing: set[asyncio.Task] = set()
+
+    def get_state(self, base_url: str, username: str, password: str) -> SessionState:
+        """Retourner l'état partagé d'un endpoint, remis à zéro si la boucle ou les credentials ont changé"""
+        key = base_url.rstrip("/")
+        credentials = _fingerprint(username, password)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        state = self._states.get(key)
+        if state is None or state.loop is not loop or state.credentials != credentials:
+            if state is not None and state.loop is loop and state.session and not state.session.closed:
+                # Credentials modifiés : fermer l'ancienne session en tâche de fond
+                task = loop.create_task(state.session.close())
+                self._closing.add(task)
+                task.add_done_callback(self._on_close_done)
+            state = SessionState(credentials=credentials, loop=loop)
+            self._states[key] = state
+            logger.debug("🔌 Nouvelle session qBittorrent partagée pour %s", key)
+        return state
+
+    def _on_close_done(self, task: asyncio.Task):
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("⚠️ Fermeture d'une session qBittorrent impossible: %s", task.exception())
+
+    async def invalidate(self, base_url: str | None = None) -> int:
+        """
+        Fermer et oublier les sessions d'un endpoint (ou toutes si base_url est None)
+
+        Returns:
+            Nombre de sessions oubliées
+        """
+        prefix = base_url.rstrip("/") if base_url else None
+        keys = [key for key in self._states if prefix is None or key == prefix]
+        for key in keys:
+            state = self._states.pop(key)
+            if state.session is None or state.session.closed:
+                continue
+            try:
+                await state.session.close()
+            except Exception as e:
+                logger.warning("⚠️ Fermeture de la session qBittorrent %s impossible: %s", key, e)
+        return len(keys)
+
+    async def aclose(self):
+        """Fermer toutes les sessions (arrêt de l'application)"""
+        await self.invalidate()
+
+    def clear(self):
+        """Oublier toutes les sessions sans les fermer (tests)"""
+        self._states.clear()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+# Instance globale du registre
+qbittorrent_session_registry = QBittorrentSessionRegistry()
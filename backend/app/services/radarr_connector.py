@@ -1,7 +1,15 @@
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
+from app.core.config import settings
+from app.services.arr_history import HistoryCursor, stop_at_watermark
+from app.services.arr_records import MovieRecord
 from app.services.base_connector import BaseConnector
+from app.services.json_stream import FieldSpec, trim_record
+
+# Les profils de qualité ne changent qu'à la main dans l'UI *arr
+QUALITY_PROFILES_CACHE_TTL = 3600
 
 
 class RadarrConnector(BaseConnector):
@@ -20,20 +28,52 @@ class RadarrConnector(BaseConnector):
         except Exception as e:
             return False, f"Erreur de connexion: {str(e)}"
 
-    async def get_movies(self) -> list[dict[str, Any]]:
+    async def get_movies(self, fields: FieldSpec | None = None) -> list[dict[str, Any]]:
         """
         Récupérer tous les films
 
+        Args:
+            fields: Champs à conserver ; si fourni, la réponse est lue en streaming
+                et chaque élément réduit à ces champs (None = réponse complète)
+
         Returns:
             Liste des films avec leurs détails
         """
         try:
+            if fields is not None:
+                return [movie async for movie in self.iter_movies(fields)]
             movies = await self._get("/api/v3/movie")
             return movies
         except Exception as e:
             print(f"❌ Erreur récupération films Radarr: {e}")
             return []
 
+    async def iter_movies(self, fields: FieldSpec | None = None) -> AsyncIterator[dict[str, Any]]:
+        """
+        Parcourir les films un à un, sans charger tout le tableau en mémoire
+
+        Args:
+            fields: Champs à conserver dans chaque élément (None = tous)
+
+        Yields:
+            Chaque film, réduit à ``fields``
+        """
+        async for record in self._stream_array("/api/v3/movie"):
+            yield trim_record(record, fields)
+
+    async def get_movie_records(self) -> list[MovieRecord]:
+        """
+        Récupérer tous les films sous forme d'enregistrements compacts (lecture en streaming)
+
+        Returns:
+            Liste de MovieRecord, limités aux champs utilisés par la synchronisation
+        """
+        try:
+            return [MovieRecord.from_api(movie) async for movie in self.iter_movies()]
+        except Exception as e:
+            print(f"❌ Erreur récupération films Radarr: {e}")
+            return []
+
     async def get_calendar(self, days_ahead: int = 30, days_behind: int = 30) -> list[dict[str, Any]]:
         """
         Récupérer le calendrier des sorties
@@ -123,26 +163,57 @@ class RadarrConnector(BaseConnector):
             print(f"❌ Erreur récupération historique Radarr: {e}")
             return []
 
-    async def get_movie_history_map(self) -> dict[int, str]:
+    async def iter_history_pages(
+        self, after_id: int | None = None, page_size: int | None = None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Parcourir l'historique des téléchargements page par page, du plus récent au plus ancien
+
+        Args:
+            after_id: High-water mark : s'arrêter aux enregistrements déjà traités (None = tout l'historique)
+            page_size: Taille des pages (défaut: ARR_HISTORY_PAGE_SIZE)
+
+        Yields:
+            Les événements d'historique de chaque page
         """
-        Créer une map {movieId: torrent_hash}
+        params = {"sortKey": "date", "sortDirection": "descending", "eventType": 1}  # 1 = Downloaded
+        pages = self._iter_paged("/api/v3/history", params, page_size or settings.ARR_HISTORY_PAGE_SIZE)
+        async for records in stop_at_watermark(pages, after_id):
+            yield records
+
+    async def get_movie_history_map(
+        self, after_id: int | None = None, cursor: HistoryCursor | None = None
+    ) -> dict[int, str]:
+        """
+        Créer une map {movieId: torrent_hash} en parcourant l'historique page par page
+
+        Args:
+            after_id: High-water mark : ne lire que les événements plus récents (None = tout l'historique)
+            cursor: Renseigné avec l'id / la date les plus récents vus et l'état du parcours
 
         Returns:
-            Dictionnaire associant les IDs de films aux hash de torrents
+            Dictionnaire associant les IDs de films au hash de leur téléchargement le plus récent
         """
-        history = await self.get_history(page_size=200)
+        cursor = cursor if cursor is not None else HistoryCursor()
         movie_hash_map = {}
 
-        for record in history:
-            movie_id = record.get("movieId")
-            download_id = record.get("downloadId", "")
-
-            if movie_id and download_id:
-                # Extraire le hash du downloadId
-                # Format possible: "qBittorrent-HASH" ou juste "HASH"
-                hash_value = self._extract_hash(download_id)
-                if hash_value:
-                    movie_hash_map[movie_id] = hash_value
+        try:
+            async for records in self.iter_history_pages(after_id=after_id):
+                for record in records:
+                    cursor.observe(record)
+                    movie_id = record.get("movieId")
+                    download_id = record.get("downloadId", "")
+
+                    if movie_id and download_id:
+                        # Extraire le hash du downloadId
+                        # Format possible: "qBittorrent-HASH" ou juste "HASH"
+                        hash_value = self._extract_hash(download_id)
+                        if hash_value:
+                            # Historique du plus récent au plus ancien : garder le dernier téléchargement
+                            movie_hash_map.setdefault(movie_id, hash_value)
+            cursor.complete = True
+        except Exception as e:
+            print(f"❌ Erreur parcours historique Radarr: {e}")
 
         return movie_hash_map
 
@@ -174,7 +245,7 @@ class RadarrConnector(BaseConnector):
     async def get_quality_profiles(self) -> dict[int, str]:
         """Retourne un mapping {id: name} des profils de qualité Radarr"""
         try:
-            profiles = await self._get("/api/v3/qualityprofile")
+            profiles = await self._get_cached("/api/v3/qualityprofile", ttl=QUALITY_PROFILES_CACHE_TTL)
             return {p["id"]: p["name"] for p in profiles if "id" in p and "name" in p}
         except Exception as e:
             print(f"❌ Erreur récupération profils qualité Radarr: {e}")
@@ -188,7 +259,7 @@ class RadarrConnector(BaseConnector):
             Statistiques (nombre de films monitorés, téléchargés, etc.)
         """
         try:
-            movies = await self.get_movies()
+            movies = await self.get_movies(fields={"monitored": None, "hasFile": None})
 
             total = len(movies)
             monitored = sum(1 for m in movies if m.get("monitored"))
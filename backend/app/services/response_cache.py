@@ -0,0 +1,122 @@
+"""
+Cache TTL + LRU des réponses GET quasi statiques des services externes
+
+Profils de qualité *arr, indexers Prowlarr, détails média Jellyseerr... sont
+relus à chaque sync ou chargement d'écran alors qu'ils ne changent presque
+jamais. Les entrées expirées qui portent un ETag / Last-Modified sont
+revalidées (If-None-Match / If-Modified-Since) plutôt que retéléchargées.
+"""
+
+import copy
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+
+CacheKey = tuple[str, str, tuple[tuple[str, str], ...]]
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def validators(self) -> dict[str, str]:
+        """Headers de revalidation conditionnelle"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    evictions: int = 0
+    by_endpoint: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def record(self, endpoint: str, outcome: str):
+        setattr(self, outcome, getattr(self, outcome) + 1)
+        counters = self.by_endpoint.setdefault(endpoint, {"hits": 0, "misses": 0, "revalidated": 0})
+        counters[outcome] += 1
+
+
+class ResponseCache:
+    """Cache LRU borné, entrées avec TTL, partagé par tous les connecteurs"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(base_url: str, endpoint: str, params: dict[str, Any] | None = None) -> CacheKey:
+        """Clé (service, endpoint, params triés)"""
+        normalized = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        return (base_url, endpoint, normalized)
+
+    def get(self, key: CacheKey) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(
+        self, key: CacheKey, value: Any, ttl: float, etag: str | None = None, last_modified: str | None = None
+    ) -> CacheEntry:
+        entry = CacheEntry(value=value, expires_at=time.monotonic() + ttl, etag=etag, last_modified=last_modified)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        return entry
+
+    def touch(self, entry: CacheEntry, ttl: float):
+        """Prolonger une entrée revalidée (304)"""
+        entry.expires_at = time.monotonic() + ttl
+
+    def invalidate(self, base_url: str | None = None, endpoint_prefix: str | None = None) -> int:
+        """Supprimer les entrées d'un service (et d'un préfixe d'endpoint), ou tout le cache"""
+        keys = [
+            key
+            for key in self._entries
+            if (base_url is None or key[0] == base_url)
+            and (endpoint_prefix is None or key[1].startswith(endpoint_prefix))
+        ]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self.stats = CacheStats()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Compteurs hit/miss pour le monitoring"""
+        lookups = self.stats.hits + self.stats.misses + self.stats.revalidated
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "revalidated": self.stats.revalidated,
+            "evictions": self.stats.evictions,
+            "hit_ratio": round((self.stats.hits + self.stats.revalidated) / lookups, 3) if lookups else 0.0,
+            "by_endpoint": copy.deepcopy(self.stats.by_endpoint),
+        }
+
+
+# Instance globale du cache
+response_cache = ResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
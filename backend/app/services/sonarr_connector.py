@@ -1,7 +1,15 @@
+from collections.abc import AsyncIterator
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
+from app.core.config import settings
+from app.services.arr_history import HistoryCursor, stop_at_watermark
+from app.services.arr_records import EpisodeFileRecord, EpisodeRecord, SeriesRecord
 from app.services.base_connector import BaseConnector
+from app.services.json_stream import FieldSpec, trim_record
+
+# Les profils de qualité ne changent qu'à la main dans l'UI *arr
+QUALITY_PROFILES_CACHE_TTL = 3600
 
 
 class SonarrConnector(BaseConnector):
@@ -20,24 +28,56 @@ class SonarrConnector(BaseConnector):
         except Exception as e:
             return False, f"Erreur de connexion: {str(e)}"
 
-    async def get_series(self) -> list[dict[str, Any]]:
+    async def get_series(self, fields: FieldSpec | None = None) -> list[dict[str, Any]]:
         """
         Récupérer toutes les séries
 
+        Args:
+            fields: Champs à conserver ; si fourni, la réponse est lue en streaming
+                et chaque élément réduit à ces champs (None = réponse complète)
+
         Returns:
             Liste des séries avec leurs détails
         """
         try:
+            if fields is not None:
+                return [series async for series in self.iter_series(fields)]
             series = await self._get("/api/v3/series")
             return series
         except Exception as e:
             print(f"❌ Erreur récupération séries Sonarr: {e}")
             return []
 
+    async def iter_series(self, fields: FieldSpec | None = None) -> AsyncIterator[dict[str, Any]]:
+        """
+        Parcourir les séries une à une, sans charger tout le tableau en mémoire
+
+        Args:
+            fields: Champs à conserver dans chaque élément (None = tous)
+
+        Yields:
+            Chaque série, réduite à ``fields``
+        """
+        async for record in self._stream_array("/api/v3/series"):
+            yield trim_record(record, fields)
+
+    async def get_series_records(self) -> list[SeriesRecord]:
+        """
+        Récupérer toutes les séries sous forme d'enregistrements compacts (lecture en streaming)
+
+        Returns:
+            Liste de SeriesRecord (saisons comprises), limités aux champs utilisés par la synchronisation
+        """
+        try:
+            return [SeriesRecord.from_api(series) async for series in self.iter_series()]
+        except Exception as e:
+            print(f"❌ Erreur récupération séries Sonarr: {e}")
+            return []
+
     async def get_quality_profiles(self) -> dict[int, str]:
         """Retourne un mapping {id: name} des profils de qualité Sonarr"""
         try:
-            profiles = await self._get("/api/v3/qualityprofile")
+            profiles = await self._get_cached("/api/v3/qualityprofile", ttl=QUALITY_PROFILES_CACHE_TTL)
             return {p["id"]: p["name"] for p in profiles if "id" in p and "name" in p}
         except Exception as e:
             print(f"❌ Erreur récupération profils qualité Sonarr: {e}")
@@ -94,6 +134,44 @@ class SonarrConnector(BaseConnector):
             print(f"❌ Erreur récupération fichiers épisodes série {series_id}: {e}")
             return []
 
+    async def get_episode_records(self, series_id: int) -> list[EpisodeRecord] | None:
+        """
+        Épisodes d'une série sous forme d'enregistrements compacts (lecture en streaming)
+
+        Args:
+            series_id: Sonarr series ID
+
+        Returns:
+            Liste d'EpisodeRecord, None si la récupération a échoué (à distinguer d'une série vide)
+        """
+        try:
+            return [
+                EpisodeRecord.from_api(episode)
+                async for episode in self._stream_array("/api/v3/episode", params={"seriesId": series_id})
+            ]
+        except Exception as e:
+            print(f"❌ Erreur récupération épisodes série {series_id}: {e}")
+            return None
+
+    async def get_episode_file_records(self, series_id: int) -> list[EpisodeFileRecord] | None:
+        """
+        Fichiers d'épisodes d'une série sous forme d'enregistrements compacts (lecture en streaming)
+
+        Args:
+            series_id: Sonarr series ID
+
+        Returns:
+            Liste d'EpisodeFileRecord, None si la récupération a échoué (à distinguer d'une série sans fichier)
+        """
+        try:
+            return [
+                EpisodeFileRecord.from_api(episode_file)
+                async for episode_file in self._stream_array("/api/v3/episodefile", params={"seriesId": series_id})
+            ]
+        except Exception as e:
+            print(f"❌ Erreur récupération fichiers épisodes série {series_id}: {e}")
+            return None
+
     async def get_calendar(self, days_ahead: int = 30, days_behind: int = 30) -> list[dict[str, Any]]:
         """
         Récupérer le calendrier des épisodes
@@ -183,6 +261,42 @@ class SonarrConnector(BaseConnector):
             print(f"❌ Erreur récupération historique Sonarr: {e}")
             return []
 
+    async def iter_history_pages(
+        self, after_id: int | None = None, page_size: int | None = None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Parcourir l'historique des téléchargements page par page, du plus récent au plus ancien
+
+        Args:
+            after_id: High-water mark : s'arrêter aux enregistrements déjà traités (None = tout l'historique)
+            page_size: Taille des pages (défaut: ARR_HISTORY_PAGE_SIZE)
+
+        Yields:
+            Les événements d'historique de chaque page
+        """
+        params = {"sortKey": "date", "sortDirection": "descending", "eventType": 3}  # 3 = Downloaded for Sonarr
+        pages = self._iter_paged("/api/v3/history", params, page_size or settings.ARR_HISTORY_PAGE_SIZE)
+        async for records in stop_at_watermark(pages, after_id):
+            yield records
+
+    async def get_history_since(self, since: datetime) -> list[dict[str, Any]] | None:
+        """
+        GET /api/v3/history/since - Tous les événements d'historique depuis une date
+
+        Args:
+            since: Date de départ (UTC)
+
+        Returns:
+            Liste des événements (tous types : grab, import, suppression, renommage...),
+            None si l'historique n'a pas pu être récupéré (à distinguer d'un historique vide)
+        """
+        try:
+            records = await self._get("/api/v3/history/since", params={"date": since.isoformat()})
+            return records if records else []
+        except Exception as e:
+            print(f"❌ Erreur récupération historique Sonarr depuis {since}: {e}")
+            return None
+
     async def get_series_history_map(self) -> dict[int, str]:
         """
         Créer une map {seriesId: torrent_hash} (backward compat, returns first hash only)
@@ -193,53 +307,64 @@ class SonarrConnector(BaseConnector):
         torrents_map = await self.get_series_torrents_map()
         return {series_id: entries[0]["hash"] for series_id, entries in torrents_map.items() if entries}
 
-    async def get_series_torrents_map(self) -> dict[int, list[dict]]:
+    async def get_series_torrents_map(
+        self, after_id: int | None = None, cursor: HistoryCursor | None = None
+    ) -> dict[int, list[dict]]:
         """
         Créer une map {seriesId: [{hash, episode_id, season_number, is_season_pack}, ...]}
 
-        Fetches history with a larger page size to capture all torrents per series.
+        Walks the download history page by page (full history, or only records newer
+        than ``after_id``) and folds each page into the maps without keeping the records.
         Detects season packs by finding hashes shared across multiple episodes.
 
+        Args:
+            after_id: High-water mark : ne lire que les événements plus récents (None = tout l'historique)
+            cursor: Renseigné avec l'id / la date les plus récents vus et l'état du parcours
+
         Returns:
             Dict mapping series IDs to lists of torrent info dicts
         """
-        history = await self.get_history(page_size=500)
+        cursor = cursor if cursor is not None else HistoryCursor()
 
         # First pass: collect all (hash, episode, season) tuples per series
         # Also track which episodes each hash covers (for season pack detection)
         series_entries: dict[int, dict[str, dict]] = {}  # {seriesId: {hash: entry_dict}}
         hash_episodes: dict[str, set[int]] = {}  # {hash: {episodeId, ...}}
 
-        for record in history:
-            series_id = record.get("seriesId")
-            download_id = record.get("downloadId", "")
-            episode_id = record.get("episodeId")
-            season_number = record.get("seasonNumber")
-
-            if not series_id or not download_id:
-                continue
-
-            hash_value = self._extract_hash(download_id)
-            if not hash_value:
-                continue
-
-            # Track episodes per hash for season pack detection
-            if hash_value not in hash_episodes:
-                hash_episodes[hash_value] = set()
-            if episode_id:
-                hash_episodes[hash_value].add(episode_id)
-
-            # Store unique hash per series
-            if series_id not in series_entries:
-                series_entries[series_id] = {}
-
-            if hash_value not in series_entries[series_id]:
-                series_entries[series_id][hash_value] = {
-                    "hash": hash_value,
-                    "episode_id": episode_id,
-                    "season_number": season_number,
-                    "is_season_pack": False,
-                }
+        try:
+            async for records in self.iter_history_pages(after_id=after_id):
+                for record in records:
+                    cursor.observe(record)
+                    series_id = record.get("seriesId")
+                    download_id = record.get("downloadId", "")
+                    episode_id = record.get("episodeId")
+                    season_number = record.get("seasonNumber")
+
+                    if not series_id or not download_id:
+                        continue
+
+                    hash_value = self._extract_hash(download_id)
+                    if not hash_value:
+                        continue
+
+                    # Track episodes per hash for season pack detection
+                    episodes = hash_episodes.setdefault(hash_value, set())
+                    if episode_id:
+                        episodes.add(episode_id)
+
+                    # Store unique hash per series
+                    series_entries.setdefault(series_id, {}).setdefault(
+                        hash_value,
+                        {
+                            "hash": hash_value,
+                            "episode_id": episode_id,
+                            "season_number": season_number,
+                            "is_season_pack": False,
+                        },
+                    )
+            cursor.complete = True
+        except Exception as e:
+            print(f"❌ Erreur parcours historique Sonarr: {e}")
 
         # Second pass: mark season packs (hash covers 2+ episodes)
         for series_id, entries in series_entries.items():
@@ -310,7 +435,9 @@ class SonarrConnector(BaseConnector):
             Statistiques (séries, épisodes, etc.)
         """
         try:
-            series = await self.get_series()
+            series = await self.get_series(
+                fields={"monitored": None, "statistics": {"episodeCount": None, "episodeFileCount": None}}
+            )
 
             total_series = len(series)
             monitored_series = sum(1 for s in series if s.get("monitored"))
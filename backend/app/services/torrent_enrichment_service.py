@@ -5,8 +5,11 @@ then aggregates results back onto LibraryItem.torrent_info.
 """
 
 import logging
+from collections import defaultdict
 from datetime import UTC, datetime
+from typing import Any
 
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from app.models.models import LibraryItem, LibraryItemTorrent, ServiceConfiguration
@@ -18,6 +21,14 @@ logger = logging.getLogger(__name__)
 class TorrentEnrichmentService:
     """Service pour enrichir les items de bibliothèque avec les données torrents"""
 
+    # Phase A only needs these columns (no full ORM objects for every torrent row)
+    _TORRENT_ROW_COLUMNS = (
+        LibraryItemTorrent.id,
+        LibraryItemTorrent.library_item_id,
+        LibraryItemTorrent.torrent_hash,
+        LibraryItemTorrent.torrent_info,
+    )
+
     def __init__(self, db: Session):
         self.db = db
         self.qbt_connector = None
@@ -98,52 +109,16 @@ class TorrentEnrichmentService:
                 return {"total": 0, "success": 0, "failed": 0, "error": "qBittorrent non configuré"}
 
             # === Phase A: Enrich individual torrent rows (always refresh, not just NULL) ===
-            torrent_rows_query = self.db.query(LibraryItemTorrent)
+            torrent_rows_query = self.db.query(*self._TORRENT_ROW_COLUMNS)
             if limit:
                 torrent_rows_query = torrent_rows_query.limit(limit)
 
             torrent_rows = torrent_rows_query.all()
             logger.info(f"📊 Phase A: {len(torrent_rows)} torrent rows à enrichir")
+            row_stats = await self._refresh_torrent_rows(connector, torrent_rows)
 
-            if torrent_rows:
-                # Batch fetch all hashes at once
-                hashes = list({row.torrent_hash for row in torrent_rows if row.torrent_hash})
-                torrents_data = await connector.get_torrents_info(hashes)
-
-                enriched_count = 0
-                for row in torrent_rows:
-                    info = torrents_data.get(row.torrent_hash.upper() if row.torrent_hash else "")
-                    if info:
-                        row.torrent_info = info
-                        row.updated_at = datetime.now(UTC)
-                        enriched_count += 1
-
-                self.db.commit()
-                logger.info(f"✅ Phase A: {enriched_count}/{len(torrent_rows)} torrent rows enrichis")
-
-            # === Phase B: Aggregate per LibraryItem ===
-            # Get all library items that have at least one torrent row
-            affected_item_ids = (
-                self.db.query(LibraryItemTorrent.library_item_id)
-                .filter(LibraryItemTorrent.torrent_info.isnot(None))
-                .distinct()
-                .all()
-            )
-            affected_item_ids = [row[0] for row in affected_item_ids]
-
-            items = self.db.query(LibraryItem).filter(LibraryItem.id.in_(affected_item_ids)).all()
-            logger.info(f"📊 Phase B: {len(items)} library items à agréger")
-
-            stats = {"total": len(items), "success": 0, "failed": 0}
-
-            for item in items:
-                try:
-                    self._aggregate_torrent_info(item)
-                    stats["success"] += 1
-                except Exception as e:
-                    logger.error(f"❌ Erreur agrégation item {item.id}: {e}")
-                    stats["failed"] += 1
-
+            # === Phase B: Aggregate per LibraryItem (one grouped load + one bulk update) ===
+            affected_item_ids, stats = self._aggregate_items()
             self.db.commit()
             logger.info(f"✅ Phase B: {stats}")
 
@@ -160,23 +135,9 @@ class TorrentEnrichmentService:
 
             if legacy_items:
                 logger.info(f"📊 Legacy enrichment: {len(legacy_items)} items sans junction table rows")
-                legacy_hashes = list({item.torrent_hash for item in legacy_items if item.torrent_hash})
-                legacy_data = await connector.get_torrents_info(legacy_hashes)
-
-                for item in legacy_items:
-                    info = legacy_data.get(item.torrent_hash.upper() if item.torrent_hash else "")
-                    if info:
-                        info["torrent_count"] = 1
-                        item.torrent_info = info
-                        item.updated_at = datetime.now(UTC)
-                        stats["success"] += 1
-                        stats["total"] += 1
-                    else:
-                        stats["failed"] += 1
-                        stats["total"] += 1
-
-                self.db.commit()
+                await self._enrich_legacy_items(connector, legacy_items, stats)
 
+            stats.update(row_stats)
             logger.info(f"✅ Enrichissement terminé : {stats}")
             return stats
 
@@ -187,23 +148,132 @@ class TorrentEnrichmentService:
             if self.qbt_connector:
                 await self.qbt_connector.close()
 
-    def _aggregate_torrent_info(self, item: LibraryItem):
+    async def _refresh_torrent_rows(self, connector, torrent_rows: list) -> dict[str, int]:
         """
-        Compute aggregated torrent_info from all LibraryItemTorrent rows for this item.
-        Writes the result to item.torrent_info.
+        Phase A: write the fresh qBittorrent info onto LibraryItemTorrent rows.
+
+        Only rows whose info actually changed (ratio, status, seeding_time, ...) are
+        written, in one bulk UPDATE; unchanged rows keep their JSON and updated_at.
+
+        Args:
+            connector: qBittorrent connector
+            torrent_rows: (id, library_item_id, torrent_hash, torrent_info) rows
+
+        Returns:
+            {"rows_written": ..., "rows_skipped": ...}
         """
-        torrent_rows = (
-            self.db.query(LibraryItemTorrent)
-            .filter(
-                LibraryItemTorrent.library_item_id == item.id,
-                LibraryItemTorrent.torrent_info.isnot(None),
-            )
-            .all()
+        row_stats = {"rows_written": 0, "rows_skipped": 0}
+        if not torrent_rows:
+            return row_stats
+
+        hashes = list({row.torrent_hash for row in torrent_rows if row.torrent_hash})
+        torrents_data = await connector.get_torrents_info(hashes)
+
+        now = datetime.now(UTC)
+        updates = []
+        enriched_count = 0
+        for row in torrent_rows:
+            info = torrents_data.get(row.torrent_hash.upper() if row.torrent_hash else "")
+            if not info:
+                continue
+            enriched_count += 1
+            if row.torrent_info == info:
+                row_stats["rows_skipped"] += 1
+                continue
+            updates.append({"id": row.id, "torrent_info": info, "updated_at": now})
+
+        if updates:
+            self.db.execute(update(LibraryItemTorrent), updates)
+        self.db.commit()
+        row_stats["rows_written"] = len(updates)
+
+        logger.info(
+            f"✅ Phase A: {enriched_count}/{len(torrent_rows)} torrent rows enrichis "
+            f"({row_stats['rows_written']} écrits, {row_stats['rows_skipped']} inchangés)"
         )
+        return row_stats
 
-        if not torrent_rows:
-            return
+    def _aggregate_items(self, item_ids: list[str] | None = None) -> tuple[list[str], dict]:
+        """
+        Aggregate torrent_info for every LibraryItem that has enriched torrent rows.
+
+        Loads all relevant (library_item_id, torrent_info) pairs in one query, together
+        with the item's current aggregate, groups them in memory and writes the items
+        whose aggregate changed with one bulk UPDATE, so the statement count does not
+        depend on the number of items.
 
+        Args:
+            item_ids: Restrict to these items (None = all items)
+
+        Returns:
+            (ids of the aggregated items, stats)
+        """
+        stats = {"total": 0, "success": 0, "failed": 0, "items_written": 0, "items_skipped": 0}
+        query = (
+            self.db.query(LibraryItemTorrent.library_item_id, LibraryItemTorrent.torrent_info, LibraryItem.torrent_info)
+            .join(LibraryItem, LibraryItem.id == LibraryItemTorrent.library_item_id)
+            .filter(LibraryItemTorrent.torrent_info.isnot(None))
+        )
+        if item_ids is not None:
+            if not item_ids:
+                return [], stats
+            query = query.filter(LibraryItemTorrent.library_item_id.in_(item_ids))
+
+        infos_by_item: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        current_by_item: dict[str, dict[str, Any] | None] = {}
+        for library_item_id, torrent_info, current_info in query.all():
+            infos_by_item[library_item_id].append(torrent_info)
+            current_by_item[library_item_id] = current_info
+
+        logger.info(f"📊 Phase B: {len(infos_by_item)} library items à agréger")
+
+        stats["total"] = len(infos_by_item)
+        now = datetime.now(UTC)
+        updates = []
+        for library_item_id, infos in infos_by_item.items():
+            try:
+                aggregated = self._aggregate_infos(infos)
+                stats["success"] += 1
+            except Exception as e:
+                logger.error(f"❌ Erreur agrégation item {library_item_id}: {e}")
+                stats["failed"] += 1
+                continue
+            if current_by_item[library_item_id] == aggregated:
+                stats["items_skipped"] += 1
+            else:
+                updates.append({"id": library_item_id, "torrent_info": aggregated, "updated_at": now})
+
+        if updates:
+            self.db.execute(update(LibraryItem), updates)
+        stats["items_written"] = len(updates)
+
+        return list(infos_by_item), stats
+
+    async def _enrich_legacy_items(self, connector, legacy_items: list[LibraryItem], stats: dict):
+        """Items with a torrent_hash but no junction table rows: single-torrent info, written only if changed"""
+        legacy_hashes = list({item.torrent_hash for item in legacy_items if item.torrent_hash})
+        legacy_data = await connector.get_torrents_info(legacy_hashes)
+
+        for item in legacy_items:
+            stats["total"] += 1
+            info = legacy_data.get(item.torrent_hash.upper() if item.torrent_hash else "")
+            if not info:
+                stats["failed"] += 1
+                continue
+            stats["success"] += 1
+            info = {**info, "torrent_count": 1}
+            if item.torrent_info == info:
+                stats["items_skipped"] += 1
+                continue
+            item.torrent_info = info
+            item.updated_at = datetime.now(UTC)
+            stats["items_written"] += 1
+
+        self.db.commit()
+
+    @staticmethod
+    def _aggregate_infos(infos: list[dict[str, Any]]) -> dict[str, Any]:
+        """Aggregate the torrent_info of one item's torrent rows (mean ratio, summed size, ...)."""
         ratios = []
         sizes = []
         seeding_times = []
@@ -212,8 +282,7 @@ class TorrentEnrichmentService:
         statuses = []
         names = []
 
-        for row in torrent_rows:
-            info = row.torrent_info
+        for info in infos:
             if not info:
                 continue
 
@@ -257,12 +326,11 @@ class TorrentEnrichmentService:
             "seeding_time": max(seeding_times) if seeding_times else 0,
             "download_date": min(download_dates) if download_dates else None,
             "progress": agg_progress,
-            "torrent_count": len(torrent_rows),
-            "name": names[0] if len(names) == 1 else f"{len(torrent_rows)} torrents",
+            "torrent_count": len(infos),
+            "name": names[0] if len(names) == 1 else f"{len(infos)} torrents",
         }
 
-        item.torrent_info = aggregated
-        item.updated_at = datetime.now(UTC)
+        return aggregated
 
     async def enrich_recent_items(self, days: int = 7) -> dict:
         """
@@ -285,7 +353,7 @@ class TorrentEnrichmentService:
 
             # Phase A: enrich recent torrent rows (always refresh, not just NULL)
             torrent_rows = (
-                self.db.query(LibraryItemTorrent)
+                self.db.query(*self._TORRENT_ROW_COLUMNS)
                 .filter(
                     LibraryItemTorrent.created_at >= cutoff_date,
                 )
@@ -293,37 +361,11 @@ class TorrentEnrichmentService:
             )
 
             logger.info(f"📊 {len(torrent_rows)} torrent rows récents à enrichir")
-
-            if torrent_rows:
-                hashes = list({row.torrent_hash for row in torrent_rows if row.torrent_hash})
-                torrents_data = await connector.get_torrents_info(hashes)
-
-                for row in torrent_rows:
-                    info = torrents_data.get(row.torrent_hash.upper() if row.torrent_hash else "")
-                    if info:
-                        row.torrent_info = info
-                        row.updated_at = datetime.now(UTC)
-
-                self.db.commit()
+            row_stats = await self._refresh_torrent_rows(connector, torrent_rows)
 
             # Phase B: aggregate affected items
             affected_item_ids = list({row.library_item_id for row in torrent_rows})
-            items = (
-                self.db.query(LibraryItem).filter(LibraryItem.id.in_(affected_item_ids)).all()
-                if affected_item_ids
-                else []
-            )
-
-            stats = {"total": len(items), "success": 0, "failed": 0}
-
-            for item in items:
-                try:
-                    self._aggregate_torrent_info(item)
-                    stats["success"] += 1
-                except Exception as e:
-                    logger.error(f"❌ Erreur agrégation item {item.id}: {e}")
-                    stats["failed"] += 1
-
+            _, stats = self._aggregate_items(affected_item_ids)
             self.db.commit()
 
             # Legacy path for items without junction table rows
@@ -339,23 +381,9 @@ class TorrentEnrichmentService:
             )
 
             if legacy_items:
-                legacy_hashes = list({item.torrent_hash for item in legacy_items if item.torrent_hash})
-                legacy_data = await connector.get_torrents_info(legacy_hashes)
-
-                for item in legacy_items:
-                    info = legacy_data.get(item.torrent_hash.upper() if item.torrent_hash else "")
-                    if info:
-                        info["torrent_count"] = 1
-                        item.torrent_info = info
-                        item.updated_at = datetime.now(UTC)
-                        stats["success"] += 1
-                        stats["total"] += 1
-                    else:
-                        stats["failed"] += 1
-                        stats["total"] += 1
-
-                self.db.commit()
+                await self._enrich_legacy_items(connector, legacy_items, stats)
 
+            stats.update(row_stats)
             logger.info(f"✅ Enrichissement des items récents terminé : {stats}")
             return stats
 
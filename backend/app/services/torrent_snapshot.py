@@ -0,0 +1,164 @@
+"""
+Instantané serveur de la liste des torrents (GET /api/torrents/all)
+
+Un job planifié rafraîchit à intervalle fixe les torrents + stats de transfert
+du client torrent ; toutes les requêtes (plusieurs onglets du dashboard...)
+sont servies depuis cet instantané au lieu d'interroger qBittorrent chacune.
+L'ETag est calculé sur le contenu : un instantané inchangé garde son ETag et
+son generated_at, et le client reçoit un 304 sur If-None-Match.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models.models import ServiceConfiguration
+from app.services.connector_factory import create_connector
+
+logger = logging.getLogger(__name__)
+
+
+class TorrentClientUnavailableError(Exception):
+    """Client torrent configuré mais injoignable (authentification, réseau...)"""
+
+
+@dataclass(frozen=True)
+class TorrentSnapshot:
+    payload: dict[str, Any]
+    etag: str
+    generated_at: datetime
+
+
+def compute_etag(content: dict[str, Any]) -> str:
+    """ETag fort calculé sur le contenu (indépendant de l'horodatage)"""
+    digest = hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Comparaison If-None-Match (liste séparée par des virgules, W/ et * acceptés)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class TorrentSnapshotPoller:
+    """Dernier instantané torrents + transfert, rafraîchi par le scheduler"""
+
+    def __init__(self):
+        self._snapshot: TorrentSnapshot | None = None
+        # time.monotonic() du dernier rafraîchissement réussi (contenu modifié ou non)
+        self._refreshed_at = 0.0
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.refreshes = 0
+
+    @property
+    def snapshot(self) -> TorrentSnapshot | None:
+        return self._snapshot
+
+    def is_fresh(self, max_age: float | None = None) -> bool:
+        """Instantané disponible et rafraîchi il y a moins de max_age secondes"""
+        if max_age is None:
+            # Au-delà de quelques intervalles manqués, le job ne tourne plus : on repasse en direct
+            max_age = 3 * settings.TORRENT_SNAPSHOT_INTERVAL_SECONDS
+        return self._snapshot is not None and time.monotonic() - self._refreshed_at < max_age
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Un asyncio.Lock n'est pas réutilisable d'une boucle d'événements à l'autre
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    async def get_or_refresh(self, db: Session) -> TorrentSnapshot | None:
+        """
+        Instantané courant, rafraîchi immédiatement s'il est absent ou périmé
+
+        Les requêtes concurrentes sur un instantané périmé partagent un seul rafraîchissement.
+
+        Returns:
+            L'instantané, ou None si aucun client torrent n'est configuré
+
+        Raises:
+            TorrentClientUnavailableError: Client torrent injoignable
+        """
+        if self.is_fresh():
+            return self._snapshot
+        async with self._get_lock():
+            if self.is_fresh():
+                return self._snapshot
+            return await self._refresh(db)
+
+    async def refresh(self, db: Session) -> TorrentSnapshot | None:
+        """Rafraîchir l'instantané (job planifié)"""
+        async with self._get_lock():
+            return await self._refresh(db)
+
+    async def _refresh(self, db: Session) -> TorrentSnapshot | None:
+        qbt_service = (
+            db.query(ServiceConfiguration)
+            .filter(ServiceConfiguration.service_name == "qbittorrent", ServiceConfiguration.is_active.is_(True))
+            .first()
+        )
+        if not qbt_service:
+            self.clear()
+            return None
+
+        connector = create_connector(qbt_service)
+        try:
+            if not await connector.ensure_authenticated():
+                raise TorrentClientUnavailableError("Could not authenticate with qBittorrent")
+
+            torrents, transfer = await asyncio.gather(
+                connector.get_all_torrents(),
+                connector.get_transfer_info(),
+            )
+        finally:
+            await connector.close()
+
+        # Le connecteur ne lève pas : un client injoignable renvoie [] et un transfert "disconnected".
+        # Garder le dernier instantané (périmé via is_fresh) plutôt que publier une liste vide.
+        if not torrents and transfer.get("connection_status") == "disconnected":
+            raise TorrentClientUnavailableError("qBittorrent unreachable (no torrents, transfer disconnected)")
+
+        content = {"client": "qbittorrent", "transfer": transfer, "torrents": torrents}
+        etag = compute_etag(content)
+        if self._snapshot is None or self._snapshot.etag != etag:
+            generated_at = datetime.now(UTC)
+            self._snapshot = TorrentSnapshot(
+                payload={**content, "generated_at": generated_at.isoformat()}, etag=etag, generated_at=generated_at
+            )
+        self._refreshed_at = time.monotonic()
+        self.refreshes += 1
+        return self._snapshot
+
+    async def run_job(self):
+        """Job planifié : rafraîchir l'instantané dans sa propre session DB"""
+        db = SessionLocal()
+        try:
+            await self.refresh(db)
+        except Exception as e:
+            logger.warning(f"⚠️ Instantané torrents non rafraîchi : {e}")
+        finally:
+            db.close()
+
+    def clear(self):
+        """Oublier l'instantané (configuration du client modifiée, tests)"""
+        self._snapshot = None
+        self._refreshed_at = 0.0
+
+
+# Instance globale du poller
+torrent_snapshot_poller = TorrentSnapshotPoller()
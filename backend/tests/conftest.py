@@ -11,7 +11,7 @@ Strategy:
 
 import os
 from datetime import datetime
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -53,6 +53,13 @@ from app.models.models import (  # noqa: E402
     User,
 )
 from app.services.auth_service import create_access_token, hash_password  # noqa: E402
+from app.services.jellyfin_stream_queue import jellyfin_stream_queue  # noqa: E402
+from app.services.library_resolver import library_item_resolver  # noqa: E402
+from app.services.playback_event_queue import playback_event_queue  # noqa: E402
+from app.services.qbittorrent_maindata import maindata_registry  # noqa: E402
+from app.services.qbittorrent_sessions import qbittorrent_session_registry  # noqa: E402
+from app.services.response_cache import response_cache  # noqa: E402
+from app.services.torrent_snapshot import torrent_snapshot_poller  # noqa: E402
 
 # ── SQLite in-memory engine ───────────────────────────────────────────────────
 SQLITE_URL = "sqlite:///:memory:"
@@ -80,6 +87,47 @@ def db():
         Base.metadata.drop_all(bind=engine)
 
 
+# ── Process-wide caches ───────────────────────────────────────────────────────
+
+
+@pytest.fixture(autouse=True)
+def _clear_response_cache():
+    """Connector response cache is process-wide: never leak entries between tests."""
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_qbittorrent_state():
+    """qBittorrent maindata tables, shared sessions and the torrents snapshot are process-wide too."""
+    maindata_registry.clear()
+    qbittorrent_session_registry.clear()
+    torrent_snapshot_poller.clear()
+    yield
+    maindata_registry.clear()
+    qbittorrent_session_registry.clear()
+    torrent_snapshot_poller.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_jellyfin_stream_queue():
+    """Jellyfin webhook items waiting for a streams refresh."""
+    jellyfin_stream_queue.clear()
+    yield
+    jellyfin_stream_queue.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_playback_event_queue():
+    """Queued playback webhook events, their metrics and the LibraryItem resolver cache."""
+    playback_event_queue.clear()
+    library_item_resolver.clear()
+    yield
+    playback_event_queue.clear()
+    library_item_resolver.clear()
+
+
 # ── TestClient fixture ────────────────────────────────────────────────────────
 
 
@@ -88,7 +136,8 @@ def client(db):
     """
     TestClient with:
     - get_db overridden to use the in-memory SQLite session.
-    - lifespan patched (no MySQL check, no scheduler start).
+    - lifespan patched (no MySQL check, no scheduler start, no playback webhook worker:
+      queued events are applied with playback_event_queue.process_pending(db)).
     - get_current_user NOT overridden here — use `auth_client` for that.
     """
 
@@ -104,6 +153,7 @@ def client(db):
         patch("app.main.check_db_connection", return_value=False),
         patch("app.main.app_scheduler"),
         patch("app.main.analytics_scheduler"),
+        patch("app.main.playback_event_queue", MagicMock(stop=AsyncMock())),
     ):
         with TestClient(app, raise_server_exceptions=True) as c:
             yield c
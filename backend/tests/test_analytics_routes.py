@@ -1,17 +1,24 @@
-"""Integration tests for analytics routes (webhook + protected GET endpoints)."""
+"""Integration tests for analytics routes (webhooks + protected GET endpoints)."""
 
 import json
 from datetime import date, datetime, timedelta
 
 import pytest
 
+from app.core.config import settings
 from app.models.enums import DeviceType, MediaType, SessionStatus
+from app.models.models import PlaybackSession
+from app.services.analytics_service import AnalyticsService
+from app.services.jellyfin_stream_queue import jellyfin_stream_queue
+from app.services.library_resolver import library_item_resolver
+from app.services.playback_event_queue import playback_event_queue
 
 # ── Shared helpers ─────────────────────────────────────────────────────────────
 
 VALID_MEDIA_ID = "a" * 32  # 32 hex chars
 VALID_USER_ID = "b" * 32
 WEBHOOK_URL = "/api/analytics/webhook/playback?apiKey=test-api-key"
+LIBRARY_WEBHOOK_URL = "/api/analytics/webhook/library?apiKey=test-api-key"
 WEBHOOK_SECRET = "test-webhook-secret"
 
 
@@ -69,110 +76,191 @@ def _post_webhook(client, payload, secret=WEBHOOK_SECRET):
     return client.post(WEBHOOK_URL, content=json.dumps(payload), headers=headers)
 
 
+def _deliver_webhook(client, db, payload):
+    """POST a playback webhook, then run the queued event like the worker would: (response, result)."""
+    r = _post_webhook(client, payload)
+    results = playback_event_queue.process_pending(db)
+    return r, results[-1] if results else None
+
+
 # ── Webhook: Play ──────────────────────────────────────────────────────────────
 
 
 class TestWebhookPlay:
-    def test_play_event_creates_session(self, client):
-        r = _post_webhook(client, _play_payload())
-        assert r.status_code == 200
-        body = r.json()
-        assert body["status"] == "success"
-        assert body["event"] == "playback.start"
-        assert "session_id" in body
-
-    def test_play_episode_creates_tv_session(self, client):
+    def test_play_event_is_queued_then_creates_session(self, client, db):
+        r, result = _deliver_webhook(client, db, _play_payload())
+        assert r.status_code == 202
+        assert r.json() == {"status": "queued", "event": "playback.start"}
+        assert result["status"] == "success"
+        assert result["event"] == "playback.start"
+        assert "session_id" in result
+
+    def test_play_episode_creates_tv_session(self, client, db):
         payload = _play_payload(
             item_type="Episode",
             series_id="c" * 32,
             series_name="Breaking Bad",
         )
-        r = _post_webhook(client, payload)
-        assert r.status_code == 200
-        assert r.json()["status"] == "success"
+        r, result = _deliver_webhook(client, db, payload)
+        assert r.status_code == 202
+        assert result["status"] == "success"
+        session = db.query(PlaybackSession).one()
+        assert session.media_type == MediaType.TV
+        assert session.episode_info == "S01E01"
 
     def test_play_matches_movie_library_item_by_jellyfin_id(self, client, db, make_library_item):
-        make_library_item(title="Inception", year=2010, media_type=MediaType.MOVIE, jellyfin_id=VALID_MEDIA_ID)
-        r = _post_webhook(client, _play_payload())
-        assert r.status_code == 200
+        movie = make_library_item(title="Inception", year=2010, media_type=MediaType.MOVIE, jellyfin_id=VALID_MEDIA_ID)
+        _deliver_webhook(client, db, _play_payload(name="Renamed"))
+        assert db.query(PlaybackSession).one().library_item_id == movie.id
 
     def test_play_matches_movie_by_title_and_year_fallback(self, client, db, make_library_item):
-        make_library_item(title="Inception", year=2010, media_type=MediaType.MOVIE)
-        r = _post_webhook(client, _play_payload())
-        assert r.status_code == 200
+        movie = make_library_item(title="Inception", year=2010, media_type=MediaType.MOVIE)
+        _deliver_webhook(client, db, _play_payload())
+        assert db.query(PlaybackSession).one().library_item_id == movie.id
 
     def test_play_matches_tv_by_series_name_fallback(self, client, db, make_library_item):
-        make_library_item(title="Breaking Bad", media_type=MediaType.TV)
+        show = make_library_item(title="Breaking Bad", media_type=MediaType.TV)
         payload = _play_payload(item_type="Episode", series_name="Breaking Bad")
-        r = _post_webhook(client, payload)
-        assert r.status_code == 200
+        _deliver_webhook(client, db, payload)
+        assert db.query(PlaybackSession).one().library_item_id == show.id
 
     def test_play_learns_jellyfin_id_when_matched_by_title(self, client, db, make_library_item):
         movie = make_library_item(title="Inception", year=2010, media_type=MediaType.MOVIE)
         assert movie.jellyfin_id is None
 
-        _post_webhook(client, _play_payload(name="Inception", year=2010))
+        _deliver_webhook(client, db, _play_payload(name="Inception", year=2010))
 
         db.refresh(movie)
         assert movie.jellyfin_id == VALID_MEDIA_ID
 
-    def test_play_transcoded_session(self, client):
+    def test_learned_jellyfin_id_is_resolved_from_cache(self, client, db, make_library_item):
+        movie = make_library_item(title="Inception", year=2010, media_type=MediaType.MOVIE)
+        _deliver_webhook(client, db, _play_payload(name="Inception", year=2010))
+
+        # Renamed on the Jellyfin side: still matched, by the learned jellyfin_id
+        _deliver_webhook(client, db, _play_payload(name="Inception (Director's Cut)", year=2010))
+
+        sessions = db.query(PlaybackSession).all()
+        assert [session.library_item_id for session in sessions] == [movie.id, movie.id]
+        assert library_item_resolver.misses == 0
+
+    def test_play_transcoded_session(self, client, db):
         payload = _play_payload(play_method="Transcode")
-        r = _post_webhook(client, payload)
-        assert r.status_code == 200
+        _r, result = _deliver_webhook(client, db, payload)
+        assert result["status"] == "success"
 
-    def test_play_4k_hdr_video(self, client):
+    def test_play_4k_hdr_video(self, client, db):
         payload = _play_payload(height=2160)
         payload["Item"]["MediaStreams"][0]["VideoRange"] = "HDR"
-        r = _post_webhook(client, payload)
-        assert r.status_code == 200
+        _r, result = _deliver_webhook(client, db, payload)
+        assert result["status"] == "success"
 
 
 # ── Webhook: Stop ──────────────────────────────────────────────────────────────
 
 
 class TestWebhookStop:
-    def test_stop_event_closes_session(self, client):
+    def test_stop_event_closes_session(self, client, db):
+        _deliver_webhook(client, db, _play_payload())
+        r, result = _deliver_webhook(client, db, _stop_payload())
+        assert r.status_code == 202
+        assert result["status"] == "success"
+        assert result["event"] == "playback.stop"
+
+    def test_stop_without_active_session_returns_no_active(self, client, db):
+        _r, result = _deliver_webhook(client, db, _stop_payload())
+        assert result["status"] == "no_active_session"
+
+    def test_play_and_stop_in_one_batch_keep_order(self, client, db):
         _post_webhook(client, _play_payload())
-        r = _post_webhook(client, _stop_payload())
-        assert r.status_code == 200
-        assert r.json()["status"] == "success"
-        assert r.json()["event"] == "playback.stop"
+        _post_webhook(client, _stop_payload())
 
-    def test_stop_without_active_session_returns_no_active(self, client):
-        r = _post_webhook(client, _stop_payload())
-        assert r.status_code == 200
-        assert r.json()["status"] == "no_active_session"
+        results = playback_event_queue.process_pending(db)
+
+        assert [res["event"] for res in results] == ["playback.start", "playback.stop"]
+        assert all(res["status"] == "success" for res in results)
+        assert playback_event_queue.batches == 1
 
 
 # ── Webhook: Pause / Resume ────────────────────────────────────────────────────
 
 
 class TestWebhookPauseResume:
-    def test_pause_event(self, client):
+    def test_pause_event(self, client, db):
+        _deliver_webhook(client, db, _play_payload())
+        _r, result = _deliver_webhook(client, db, _play_payload("Pause"))
+        assert result["event"] == "playback.pause"
+        assert result["status"] == "success"
+
+    def test_pause_without_session_returns_no_active(self, client, db):
+        _r, result = _deliver_webhook(client, db, _play_payload("Pause"))
+        assert result["status"] == "no_active_session"
+
+    def test_resume_event(self, client, db):
+        _deliver_webhook(client, db, _play_payload())
+        _deliver_webhook(client, db, _play_payload("Pause"))
+        _r, result = _deliver_webhook(client, db, _play_payload("Resume"))
+        assert result["event"] == "playback.unpause"
+        assert result["status"] == "success"
+
+    def test_unsupported_event_is_ignored(self, client):
+        payload = _play_payload("ScrobbleItem")
+        r = _post_webhook(client, payload)
+        assert r.status_code == 202
+        assert r.json()["status"] == "ignored"
+        assert playback_event_queue.queue.qsize() == 0
+
+
+# ── Webhook: write-behind queue ────────────────────────────────────────────────
+
+
+class TestWebhookQueue:
+    def test_nothing_written_before_the_worker_runs(self, client, db):
         _post_webhook(client, _play_payload())
-        pause = _play_payload("Pause")
-        r = _post_webhook(client, pause)
-        assert r.status_code == 200
-        assert r.json()["event"] == "playback.pause"
+        assert db.query(PlaybackSession).count() == 0
+        assert playback_event_queue.stats()["depth"] == 1
+
+    def test_full_queue_returns_503_with_retry_after(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "PLAYBACK_WEBHOOK_QUEUE_MAX_SIZE", 1)
+        playback_event_queue.clear()
 
-    def test_pause_without_session_returns_no_active(self, client):
+        assert _post_webhook(client, _play_payload()).status_code == 202
         r = _post_webhook(client, _play_payload("Pause"))
-        assert r.status_code == 200
-        assert r.json()["status"] == "no_active_session"
 
-    def test_resume_event(self, client):
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == str(settings.PLAYBACK_WEBHOOK_RETRY_AFTER_SECONDS)
+        stats = playback_event_queue.stats()
+        assert (stats["enqueued"], stats["rejected"], stats["high_water"]) == (1, 1, 1)
+
+    def test_session_start_time_is_reception_time(self, client, db):
+        _post_webhook(client, _play_payload())
+        received_at = playback_event_queue.queue._queue[0].received_at
+
+        playback_event_queue.process_pending(db)
+
+        start_time = db.query(PlaybackSession).one().start_time
+        assert start_time.replace(tzinfo=None) == received_at.replace(tzinfo=None)
+
+    def test_failed_event_does_not_block_the_batch(self, client, db, monkeypatch):
         _post_webhook(client, _play_payload())
         _post_webhook(client, _play_payload("Pause"))
-        r = _post_webhook(client, _play_payload("Resume"))
-        assert r.status_code == 200
-        assert r.json()["event"] == "playback.unpause"
 
-    def test_unsupported_event_is_ignored(self, client):
-        payload = _play_payload("ScrobbleItem")
-        r = _post_webhook(client, payload)
+        def _boom(*args, **kwargs):
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(AnalyticsService, "start_session", _boom)
+        results = playback_event_queue.process_pending(db)
+
+        assert [res["status"] for res in results] == ["error", "no_active_session"]
+        assert playback_event_queue.failed == 1
+        assert playback_event_queue.processed == 1
+
+    def test_inline_mode_returns_result(self, client, db, monkeypatch):
+        monkeypatch.setattr(settings, "PLAYBACK_WEBHOOK_ASYNC", False)
+        r = _post_webhook(client, _play_payload())
         assert r.status_code == 200
-        assert r.json()["status"] == "ignored"
+        assert r.json()["status"] == "success"
+        assert db.query(PlaybackSession).count() == 1
 
 
 # ── Webhook: Auth & Validation errors ─────────────────────────────────────────
@@ -216,6 +304,77 @@ class TestWebhookErrors:
         assert r.status_code == 413
 
 
+# ── Webhook: library events ────────────────────────────────────────────────────
+
+
+def _post_library_webhook(client, payload, secret=WEBHOOK_SECRET):
+    headers = {"X-Webhook-Secret": secret, "Content-Type": "application/json"}
+    return client.post(LIBRARY_WEBHOOK_URL, content=json.dumps(payload), headers=headers)
+
+
+class TestLibraryWebhook:
+    @pytest.fixture(autouse=True)
+    def _incremental_streams(self, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_INCREMENTAL", True)
+
+    def test_item_added_flat_payload_is_queued(self, client):
+        r = _post_library_webhook(
+            client, {"NotificationType": "ItemAdded", "ItemId": VALID_MEDIA_ID, "ItemType": "Movie"}
+        )
+        assert r.status_code == 202
+        assert r.json() == {"status": "queued", "event": "ItemAdded", "pending": 1}
+        assert jellyfin_stream_queue.take(10) == [VALID_MEDIA_ID]
+
+    def test_item_updated_nested_payload_is_queued_once(self, client):
+        payload = {"Event": "ItemUpdated", "Item": {"Id": VALID_MEDIA_ID, "Type": "Episode"}}
+        _post_library_webhook(client, payload)
+        r = _post_library_webhook(client, payload)
+        assert r.status_code == 202
+        assert len(jellyfin_stream_queue) == 1
+
+    def test_other_events_and_types_are_ignored(self, client):
+        r1 = _post_library_webhook(
+            client, {"NotificationType": "PlaybackStart", "ItemId": VALID_MEDIA_ID, "ItemType": "Movie"}
+        )
+        r2 = _post_library_webhook(
+            client, {"NotificationType": "ItemAdded", "ItemId": VALID_MEDIA_ID, "ItemType": "Audio"}
+        )
+        assert r1.json()["status"] == r2.json()["status"] == "ignored"
+        assert len(jellyfin_stream_queue) == 0
+
+    def test_disabled_incremental_mode_ignores_events(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_INCREMENTAL", False)
+        r = _post_library_webhook(
+            client, {"NotificationType": "ItemAdded", "ItemId": VALID_MEDIA_ID, "ItemType": "Movie"}
+        )
+        assert r.json()["status"] == "ignored"
+        assert len(jellyfin_stream_queue) == 0
+
+    def test_full_queue_drops_item(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_QUEUE_MAX_SIZE", 1)
+        _post_library_webhook(client, {"NotificationType": "ItemAdded", "ItemId": "c" * 32, "ItemType": "Movie"})
+        r = _post_library_webhook(
+            client, {"NotificationType": "ItemAdded", "ItemId": VALID_MEDIA_ID, "ItemType": "Movie"}
+        )
+        assert r.json()["status"] == "dropped"
+        assert jellyfin_stream_queue.dropped == 1
+
+    def test_invalid_item_id_returns_400(self, client):
+        r = _post_library_webhook(client, {"NotificationType": "ItemAdded", "ItemId": "bad id!", "ItemType": "Movie"})
+        assert r.status_code == 400
+
+    def test_wrong_webhook_secret_returns_403(self, client):
+        r = _post_library_webhook(
+            client, {"NotificationType": "ItemAdded", "ItemId": VALID_MEDIA_ID, "ItemType": "Movie"}, secret="nope"
+        )
+        assert r.status_code == 403
+
+    def test_invalid_json_returns_400(self, client):
+        headers = {"X-Webhook-Secret": WEBHOOK_SECRET, "Content-Type": "application/json"}
+        r = client.post(LIBRARY_WEBHOOK_URL, content="{not json", headers=headers)
+        assert r.status_code == 400
+
+
 # ── GET /analytics/usage ───────────────────────────────────────────────────────
 
 
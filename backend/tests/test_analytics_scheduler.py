@@ -147,6 +147,9 @@ class TestCleanupLoop:
         def fake_update_device_stats(db, target_date):
             call_order.append("update_device_stats")
 
+        def fake_reconcile(db, target_date):
+            call_order.append("reconcile_daily")
+
         def fake_cleanup_metrics(db, keep_days):
             call_order.append("cleanup_metrics")
 
@@ -155,12 +158,19 @@ class TestCleanupLoop:
             patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
             patch.object(AnalyticsService, "cleanup_orphan_sessions", side_effect=fake_cleanup_orphans),
             patch.object(AnalyticsService, "update_device_statistics", side_effect=fake_update_device_stats),
+            patch.object(AnalyticsService, "reconcile_daily_analytics", side_effect=fake_reconcile),
             patch.object(MetricsService, "cleanup_old_metrics", side_effect=fake_cleanup_metrics),
             patch("time.sleep"),
         ):
             scheduler._cleanup_loop()
 
-        assert call_order == ["cleanup_orphans", "update_device_stats", "cleanup_metrics"]
+        assert call_order == [
+            "cleanup_orphans",
+            "update_device_stats",
+            "reconcile_daily",
+            "reconcile_daily",
+            "cleanup_metrics",
+        ]
 
     def test_cleanup_orphans_uses_24h_timeout(self):
         scheduler = AnalyticsScheduler()
@@ -176,6 +186,7 @@ class TestCleanupLoop:
             patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
             patch.object(AnalyticsService, "cleanup_orphan_sessions", side_effect=fake_cleanup_orphans),
             patch.object(AnalyticsService, "update_device_statistics"),
+            patch.object(AnalyticsService, "reconcile_daily_analytics"),
             patch.object(MetricsService, "cleanup_old_metrics"),
             patch("time.sleep"),
         ):
@@ -197,6 +208,7 @@ class TestCleanupLoop:
             patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
             patch.object(AnalyticsService, "cleanup_orphan_sessions"),
             patch.object(AnalyticsService, "update_device_statistics", side_effect=fake_update_device_stats),
+            patch.object(AnalyticsService, "reconcile_daily_analytics"),
             patch.object(MetricsService, "cleanup_old_metrics"),
             patch("time.sleep"),
         ):
@@ -207,6 +219,31 @@ class TestCleanupLoop:
         expected_yesterday = (datetime.utcnow() - timedelta(days=1)).date()
         assert captured["target_date"] == expected_yesterday
 
+    def test_reconciles_yesterday_and_today(self):
+        scheduler = AnalyticsScheduler()
+        scheduler.running = True
+        captured = []
+
+        def fake_reconcile(db, target_date):
+            captured.append(target_date)
+            scheduler.running = False
+
+        fake_db = MagicMock()
+        with (
+            patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
+            patch.object(AnalyticsService, "cleanup_orphan_sessions"),
+            patch.object(AnalyticsService, "update_device_statistics"),
+            patch.object(AnalyticsService, "reconcile_daily_analytics", side_effect=fake_reconcile),
+            patch.object(MetricsService, "cleanup_old_metrics"),
+            patch("time.sleep"),
+        ):
+            scheduler._cleanup_loop()
+
+        from datetime import datetime
+
+        today = datetime.utcnow().date()
+        assert captured == [today - timedelta(days=1), today]
+
     def test_cleanup_metrics_keeps_7_days(self):
         scheduler = AnalyticsScheduler()
         scheduler.running = True
@@ -221,6 +258,7 @@ class TestCleanupLoop:
             patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
             patch.object(AnalyticsService, "cleanup_orphan_sessions"),
             patch.object(AnalyticsService, "update_device_statistics"),
+            patch.object(AnalyticsService, "reconcile_daily_analytics"),
             patch.object(MetricsService, "cleanup_old_metrics", side_effect=fake_cleanup_metrics),
             patch("time.sleep"),
         ):
@@ -244,6 +282,7 @@ class TestCleanupLoop:
             patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
             patch.object(AnalyticsService, "cleanup_orphan_sessions", side_effect=fake_cleanup_orphans),
             patch.object(AnalyticsService, "update_device_statistics"),
+            patch.object(AnalyticsService, "reconcile_daily_analytics"),
             patch.object(MetricsService, "cleanup_old_metrics"),
             patch("time.sleep", side_effect=fake_sleep),
         ):
@@ -272,6 +311,7 @@ class TestCleanupLoop:
             patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
             patch.object(AnalyticsService, "cleanup_orphan_sessions", side_effect=fake_cleanup_orphans),
             patch.object(AnalyticsService, "update_device_statistics"),
+            patch.object(AnalyticsService, "reconcile_daily_analytics"),
             patch.object(MetricsService, "cleanup_old_metrics"),
             patch("time.sleep", side_effect=fake_sleep),
         ):
@@ -291,6 +331,7 @@ class TestCleanupLoop:
             patch("app.schedulers.analytics_scheduler.SessionLocal", return_value=fake_db),
             patch.object(AnalyticsService, "cleanup_orphan_sessions", side_effect=fake_cleanup_orphans),
             patch.object(AnalyticsService, "update_device_statistics"),
+            patch.object(AnalyticsService, "reconcile_daily_analytics"),
             patch.object(MetricsService, "cleanup_old_metrics"),
             patch("time.sleep"),
         ):
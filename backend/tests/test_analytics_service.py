@@ -1,11 +1,14 @@
 """Unit tests for AnalyticsService."""
 
 from datetime import date, datetime, timedelta
+from unittest.mock import patch
 
 import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Query
 
 from app.models.enums import DeviceType, MediaType, PlaybackMethod, SessionStatus, VideoQuality
-from app.models.models import DailyAnalytic, DeviceStatistic, PlaybackSession
+from app.models.models import DailyAnalytic, DailyAnalyticMember, DeviceStatistic, PlaybackSession
 from app.services.analytics_service import AnalyticsService
 
 # ── map_device_type ────────────────────────────────────────────────────────────
@@ -470,6 +473,115 @@ class TestUpdateDailyAnalytics:
         daily = db.query(DailyAnalytic).first()
         assert daily.hours_watched == pytest.approx(1.5)
 
+    def test_unique_counters_updated_without_count_distinct(self, db, make_playback_session):
+        statements = []
+
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.lower())
+
+        engine = db.get_bind()
+        event.listen(engine, "before_cursor_execute", _before)
+        try:
+            for user_id, media_id in (("u1", "a"), ("u1", "b"), ("u2", "a")):
+                ps = make_playback_session(media_id=media_id, user_id=user_id, watched_seconds=100)
+                AnalyticsService.update_daily_analytics(db, ps)
+        finally:
+            event.remove(engine, "before_cursor_execute", _before)
+
+        daily = db.query(DailyAnalytic).first()
+        assert (daily.unique_users, daily.unique_media) == (2, 2)
+        assert not any("count(distinct" in statement for statement in statements)
+
+    def test_unique_members_are_tracked_per_day(self, db, make_playback_session):
+        today = datetime.utcnow()
+        for start_time in (today - timedelta(days=1), today):
+            ps = make_playback_session(user_id="u1", media_id="a", start_time=start_time)
+            AnalyticsService.update_daily_analytics(db, ps)
+
+        dailies = db.query(DailyAnalytic).order_by(DailyAnalytic.date).all()
+        assert [(d.unique_users, d.unique_media) for d in dailies] == [(1, 1), (1, 1)]
+        assert db.query(DailyAnalyticMember).count() == 4
+
+    def test_concurrent_member_insert_keeps_other_counters(self, db, make_playback_session):
+        ps1 = make_playback_session(media_id="a", user_id="u1", watched_seconds=3600)
+        AnalyticsService.update_daily_analytics(db, ps1)
+        ps2 = make_playback_session(media_id="a", user_id="u1", watched_seconds=3600)
+
+        # Un autre worker a inséré les membres entre la recherche et l'insertion
+        first = Query.first
+
+        def _first(query):
+            if query.column_descriptions[0]["entity"] is DailyAnalyticMember:
+                return None
+            return first(query)
+
+        with patch.object(Query, "first", autospec=True, side_effect=_first):
+            AnalyticsService.update_daily_analytics(db, ps2)
+
+        daily = db.query(DailyAnalytic).first()
+        db.refresh(daily)
+        assert daily.total_plays == 2
+        assert daily.hours_watched == pytest.approx(2.0)
+        assert (daily.unique_users, daily.unique_media) == (1, 1)
+        assert db.query(DailyAnalyticMember).count() == 2
+
+
+# ── reconcile_daily_analytics ──────────────────────────────────────────────────
+
+
+class TestReconcileDailyAnalytics:
+    def test_rebuilds_drifted_counters_from_sessions(self, db, make_playback_session):
+        ps = make_playback_session(user_id="u1", media_id="a")
+        AnalyticsService.update_daily_analytics(db, ps)
+        # Session encore active, jamais passée par update_daily_analytics
+        make_playback_session(user_id="u2", media_id="b")
+        daily = db.query(DailyAnalytic).first()
+        daily.unique_users = 42
+        db.commit()
+
+        result = AnalyticsService.reconcile_daily_analytics(db, ps.start_time.date())
+
+        assert result == {"unique_users": 2, "unique_media": 2}
+        db.refresh(daily)
+        assert (daily.unique_users, daily.unique_media) == (2, 2)
+        assert db.query(DailyAnalyticMember).count() == 4
+
+    def test_incremental_updates_continue_after_reconcile(self, db, make_playback_session):
+        ps = make_playback_session(user_id="u1", media_id="a")
+        AnalyticsService.update_daily_analytics(db, ps)
+        AnalyticsService.reconcile_daily_analytics(db, ps.start_time.date())
+
+        again = make_playback_session(user_id="u1", media_id="a")
+        AnalyticsService.update_daily_analytics(db, again)
+        other = make_playback_session(user_id="u3", media_id="c")
+        AnalyticsService.update_daily_analytics(db, other)
+
+        daily = db.query(DailyAnalytic).first()
+        assert (daily.unique_users, daily.unique_media) == (2, 2)
+
+    def test_only_sessions_of_the_target_day(self, db, make_playback_session):
+        today = datetime.utcnow()
+        make_playback_session(user_id="u1", start_time=today)
+        make_playback_session(user_id="u2", start_time=today - timedelta(days=1))
+
+        result = AnalyticsService.reconcile_daily_analytics(db, today.date())
+
+        assert result["unique_users"] == 1
+        # Pas de ligne DailyAnalytic pour ce jour : seuls les ensembles sont reconstruits
+        assert db.query(DailyAnalytic).count() == 0
+
+    def test_removes_members_without_sessions(self, db, make_playback_session):
+        ps = make_playback_session(user_id="u1", media_id="a")
+        day = ps.start_time.date()
+        db.add(DailyAnalyticMember(date=day, kind="user", member_id="ghost"))
+        db.commit()
+
+        result = AnalyticsService.reconcile_daily_analytics(db, day)
+
+        assert result == {"unique_users": 1, "unique_media": 1}
+        members = {(m.kind, m.member_id) for m in db.query(DailyAnalyticMember).all()}
+        assert members == {("user", "u1"), ("media", "a")}
+
 
 # ── get_active_sessions ────────────────────────────────────────────────────────
 
@@ -0,0 +1,110 @@
+"""
+Unit tests for the slim Radarr/Sonarr record types used by the sync.
+
+Covers:
+- MovieRecord: poster fallback, file quality, missing optional fields
+- SeriesRecord: alternate titles, seasons, statistics
+- ArrStatistics.as_json / EpisodeFileRecord.as_json: only the stored subset, Sonarr key names
+- EpisodeRecord: defaults for missing monitored/hasFile
+"""
+
+import os
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+from app.services.arr_records import (  # noqa: E402
+    ArrStatistics,
+    EpisodeFileRecord,
+    EpisodeRecord,
+    MovieRecord,
+    SeriesRecord,
+)
+
+
+class TestMovieRecord:
+    def test_prefers_poster_image(self):
+        record = MovieRecord.from_api(
+            {
+                "id": 1,
+                "images": [
+                    {"coverType": "fanart", "remoteUrl": "http://fanart"},
+                    {"coverType": "poster", "remoteUrl": "http://poster"},
+                ],
+            }
+        )
+        assert record.poster_url == "http://poster"
+
+    def test_falls_back_to_first_image(self):
+        record = MovieRecord.from_api({"id": 1, "images": [{"coverType": "fanart", "remoteUrl": "http://fanart"}]})
+        assert record.poster_url == "http://fanart"
+
+    def test_missing_optional_fields(self):
+        record = MovieRecord.from_api({"id": 1, "title": "Dune", "movieFile": None})
+        assert record.poster_url == ""
+        assert record.rating == ""
+        assert record.size_on_disk == 0
+        assert record.file_path is None
+        assert record.file_quality is None
+        assert record.has_file is False
+
+
+class TestSeriesRecord:
+    def test_keeps_titles_seasons_and_statistics(self):
+        record = SeriesRecord.from_api(
+            {
+                "id": 10,
+                "title": "The Office",
+                "alternateTitles": [{"title": "The Office (US)", "sceneSeasonNumber": -1}, {"sceneOrigin": "x"}],
+                "statistics": {"sizeOnDisk": 42, "percentOfEpisodes": 100.0},
+                "ratings": {"value": 9.1, "votes": 1000},
+                "seasons": [{"seasonNumber": 1, "statistics": {"episodeFileCount": 6}}],
+            }
+        )
+        assert record.alternate_titles == ("The Office (US)",)
+        assert record.statistics.size_on_disk == 42
+        assert record.rating == "9.1"
+        [season] = record.seasons
+        assert (season.season_number, season.monitored, season.statistics.episode_file_count) == (1, True, 6)
+
+
+class TestAsJson:
+    def test_statistics_subset_skips_missing_counters(self):
+        stats = ArrStatistics.from_api({"episodeFileCount": 3, "sizeOnDisk": 0, "percentOfEpisodes": 50.0})
+        assert stats.as_json() == {"episodeFileCount": 3, "sizeOnDisk": 0}
+
+    def test_episode_file_subset_keeps_sonarr_shape(self):
+        record = EpisodeFileRecord.from_api(
+            {
+                "id": 5,
+                "size": 100,
+                "relativePath": "S01/e1.mkv",
+                "dateAdded": "2024-01-01T00:00:00Z",
+                "quality": {"quality": {"name": "WEBDL-1080p", "resolution": 1080}, "revision": {"version": 1}},
+                "mediaInfo": {"audioCodec": "AAC"},
+            }
+        )
+        assert record.as_json() == {
+            "id": 5,
+            "size": 100,
+            "relativePath": "S01/e1.mkv",
+            "dateAdded": "2024-01-01T00:00:00Z",
+            "quality": {"quality": {"name": "WEBDL-1080p"}},
+        }
+
+    def test_episode_file_without_optional_fields(self):
+        assert EpisodeFileRecord.from_api({"id": 7}).as_json() == {"id": 7}
+
+
+class TestEpisodeRecord:
+    def test_defaults(self):
+        record = EpisodeRecord.from_api({"id": 1, "seasonNumber": 1, "episodeNumber": 2})
+        assert record.monitored is True
+        assert record.has_file is False
+        assert record.episode_file_id is None
@@ -0,0 +1,85 @@
+"""
+Unit tests for the shared HTTP client registry used by connectors.
+
+Covers:
+- get_client: reuse per endpoint, rebuild when closed or on another event loop
+- invalidate: single endpoint and global
+- BaseConnector(shared_client=True): registry client, close() keeps the pool open
+"""
+
+import os
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+import pytest  # noqa: E402
+
+from app.services.http_client_registry import HttpClientRegistry, http_client_registry  # noqa: E402
+from app.services.radarr_connector import RadarrConnector  # noqa: E402
+
+
+@pytest.fixture()
+async def registry():
+    reg = HttpClientRegistry()
+    yield reg
+    await reg.aclose()
+
+
+class TestGetClient:
+    async def test_same_endpoint_reuses_client(self, registry):
+        assert registry.get_client("http://radarr:7878") is registry.get_client("http://radarr:7878/")
+        assert len(registry) == 1
+
+    async def test_different_endpoints_get_distinct_clients(self, registry):
+        assert registry.get_client("http://radarr:7878") is not registry.get_client("http://sonarr:8989")
+
+    async def test_closed_client_is_rebuilt(self, registry):
+        client = registry.get_client("http://radarr:7878")
+        await client.aclose()
+        assert registry.get_client("http://radarr:7878") is not client
+
+    async def test_client_from_another_loop_is_rebuilt(self, registry):
+        outside_loop = registry._build_client(30)
+        registry._clients[("http://radarr:7878", 30)] = outside_loop
+        registry._loops[("http://radarr:7878", 30)] = None
+        assert registry.get_client("http://radarr:7878") is not outside_loop
+        await outside_loop.aclose()
+
+
+class TestInvalidate:
+    async def test_invalidate_closes_only_matching_endpoint(self, registry):
+        radarr = registry.get_client("http://radarr:7878")
+        sonarr = registry.get_client("http://sonarr:8989")
+        assert await registry.invalidate("http://radarr:7878") == 1
+        assert radarr.is_closed
+        assert not sonarr.is_closed
+        assert registry.get_client("http://radarr:7878") is not radarr
+
+    async def test_invalidate_all(self, registry):
+        registry.get_client("http://radarr:7878")
+        registry.get_client("http://sonarr:8989")
+        assert await registry.invalidate() == 2
+        assert len(registry) == 0
+
+
+class TestSharedConnector:
+    async def test_shared_connectors_use_the_registry_client(self):
+        first = RadarrConnector(base_url="http://radarr-shared", api_key="key", port=7878, shared_client=True)
+        second = RadarrConnector(base_url="http://radarr-shared", api_key="key", port=7878, shared_client=True)
+        try:
+            assert first.client is second.client
+            await first.close()
+            assert not second.client.is_closed
+        finally:
+            await http_client_registry.invalidate("http://radarr-shared:7878")
+
+    async def test_owned_client_is_closed(self):
+        connector = RadarrConnector(base_url="http://radarr", api_key="key", port=7878)
+        await connector.close()
+        assert connector.client.is_closed
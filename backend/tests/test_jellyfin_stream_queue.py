@@ -0,0 +1,95 @@
+"""
+Unit tests for JellyfinStreamQueue.
+
+Covers:
+- enqueue: deduplicated, arrival order kept, bounded by JELLYFIN_STREAMS_QUEUE_MAX_SIZE (dropped counter)
+- take: oldest items first, removed from the queue
+- process: batches of JELLYFIN_STREAMS_BATCH_SIZE, stats summed, failed batch re-queued
+- run_job: no-op on an empty queue
+"""
+
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+import pytest  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.jellyfin_stream_queue import JellyfinStreamQueue  # noqa: E402
+
+
+@pytest.fixture()
+def queue():
+    return JellyfinStreamQueue()
+
+
+@pytest.fixture()
+def service_cls():
+    """JellyfinStreamsService double whose sync_items reports every item as updated."""
+    service = MagicMock()
+    service.sync_items = AsyncMock(
+        side_effect=lambda ids: {"total": len(ids), "updated": len(ids), "skipped": 0},
+    )
+    with (
+        patch("app.services.jellyfin_stream_queue.SessionLocal", MagicMock()),
+        patch("app.services.jellyfin_stream_queue.JellyfinStreamsService", MagicMock(return_value=service)),
+    ):
+        yield service
+
+
+class TestEnqueue:
+    def test_deduplicates_and_keeps_order(self, queue):
+        for item_id in ("a", "b", "a", "c"):
+            assert queue.enqueue(item_id) is True
+
+        assert len(queue) == 3
+        assert queue.take(2) == ["a", "b"]
+        assert queue.take(10) == ["c"]
+        assert len(queue) == 0
+
+    def test_bounded_queue_drops_new_items(self, queue, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_QUEUE_MAX_SIZE", 2)
+
+        assert queue.enqueue("a") and queue.enqueue("b")
+        assert queue.enqueue("c") is False
+        # Already queued items are still accepted (no-op)
+        assert queue.enqueue("a") is True
+        assert queue.dropped == 1
+        assert len(queue) == 2
+
+
+class TestProcess:
+    async def test_batches_and_stats(self, queue, service_cls, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_BATCH_SIZE", 2)
+        for item_id in ("a", "b", "c", "d", "e"):
+            queue.enqueue(item_id)
+
+        stats = await queue.process()
+
+        assert stats == {"batches": 3, "total": 5, "updated": 5, "skipped": 0}
+        assert [call.args[0] for call in service_cls.sync_items.await_args_list] == [["a", "b"], ["c", "d"], ["e"]]
+        assert queue.processed == 5
+        assert len(queue) == 0
+
+    async def test_failed_batch_is_requeued(self, queue, service_cls):
+        service_cls.sync_items.side_effect = RuntimeError("jellyfin down")
+        queue.enqueue("a")
+        queue.enqueue("b")
+
+        stats = await queue.process()
+
+        assert stats["batches"] == 0
+        assert queue.take(10) == ["a", "b"]
+
+    async def test_run_job_skips_empty_queue(self, queue, service_cls):
+        await queue.run_job()
+
+        service_cls.sync_items.assert_not_awaited()
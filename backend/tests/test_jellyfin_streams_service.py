@@ -0,0 +1,438 @@
+"""
+Unit tests for JellyfinStreamsService and the bulk episode paging of JellyfinConnector.
+
+Covers:
+- iter_episodes_with_streams: StartIndex / Limit paging, stops on a short page, default page size from settings
+- sync_tv_streams (bulk): a few paged requests instead of one per series, episodes indexed by SeriesId
+- sync_tv_streams: exact title match avoids the per-series search, search fallback still used
+- sync_tv_streams (per-series mode): JELLYFIN_STREAMS_BULK=false keeps one request per series
+- _normalize_title: accents, punctuation and leading articles ignored
+- MovieStreamsIndex: path > (title, year) > title > normalized title lookup order
+- sync_movie_streams: title-only and normalized-title fallbacks, jellyfin_id learned
+- scaling: title fallback is two dict lookups per movie on a synthetic 20k-movie payload (former scan is linear)
+- get_items_with_streams: Ids query, no request for an empty list
+- sync_items: movies by jellyfin_id then folder / title + year, episodes by series jellyfin_id or name,
+  series items refresh all their episodes
+"""
+
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+import pytest  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models import MediaType  # noqa: E402
+from app.services.jellyfin_connector import JellyfinConnector  # noqa: E402
+from app.services.jellyfin_streams_service import (  # noqa: E402
+    JellyfinStreamsService,
+    MovieStreamsIndex,
+    _normalize_title,
+)
+
+SUBTITLE = {"Type": "Subtitle", "Language": "fre", "Codec": "srt"}
+
+
+def _jf_episode(series_id, season, episode):
+    return {
+        "Id": f"{series_id}-{season}-{episode}",
+        "SeriesId": series_id,
+        "ParentIndexNumber": season,
+        "IndexNumber": episode,
+        "MediaStreams": [SUBTITLE],
+    }
+
+
+def _fake_connector(series, episodes_by_series, page_size=2):
+    """Connector double: get_series_with_path + paged iter_episodes_with_streams over all series."""
+    connector = MagicMock()
+    connector.get_series_with_path = AsyncMock(return_value=series)
+    connector.get_series_id_by_title = AsyncMock(return_value=None)
+    connector.get_episodes_with_streams = AsyncMock(side_effect=lambda sid: episodes_by_series.get(sid, []))
+    all_episodes = [ep for eps in episodes_by_series.values() for ep in eps]
+    connector.pages = 0
+
+    async def _iter_episodes(page_size_arg=None):
+        for start in range(0, len(all_episodes), page_size):
+            connector.pages += 1
+            yield all_episodes[start : start + page_size]
+
+    connector.iter_episodes_with_streams = _iter_episodes
+    return connector
+
+
+@pytest.fixture()
+def service(db):
+    return JellyfinStreamsService(db)
+
+
+class TestIterEpisodesWithStreams:
+    async def test_pages_with_start_index_until_short_page(self):
+        connector = JellyfinConnector(base_url="http://jf", api_key="k", port=8096)
+        pages = [{"Items": [{"Id": "1"}, {"Id": "2"}]}, {"Items": [{"Id": "3"}, {"Id": "4"}]}, {"Items": [{"Id": "5"}]}]
+        connector._get = AsyncMock(side_effect=pages)
+
+        result = [page async for page in connector.iter_episodes_with_streams(page_size=2)]
+
+        assert [len(page) for page in result] == [2, 2, 1]
+        starts = [call.kwargs["params"]["StartIndex"] for call in connector._get.call_args_list]
+        assert starts == [0, 2, 4]
+        assert all(call.kwargs["params"]["Limit"] == 2 for call in connector._get.call_args_list)
+        assert connector._get.call_args.kwargs["params"]["Fields"] == "MediaStreams"
+
+    async def test_empty_last_page_is_not_yielded(self):
+        connector = JellyfinConnector(base_url="http://jf", api_key="k", port=8096)
+        connector._get = AsyncMock(side_effect=[{"Items": [{"Id": "1"}, {"Id": "2"}]}, {"Items": []}])
+
+        result = [page async for page in connector.iter_episodes_with_streams(page_size=2)]
+
+        assert result == [[{"Id": "1"}, {"Id": "2"}]]
+        assert connector._get.await_count == 2
+
+    async def test_default_page_size_from_settings(self, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_EPISODES_PAGE_SIZE", 3)
+        connector = JellyfinConnector(base_url="http://jf", api_key="k", port=8096)
+        connector._get = AsyncMock(return_value={"Items": [{"Id": "1"}]})
+
+        [page async for page in connector.iter_episodes_with_streams()]
+
+        assert connector._get.call_args.kwargs["params"]["Limit"] == 3
+
+    async def test_http_error_stops_iteration(self):
+        connector = JellyfinConnector(base_url="http://jf", api_key="k", port=8096)
+        connector._get = AsyncMock(side_effect=[{"Items": [{"Id": "1"}, {"Id": "2"}]}, RuntimeError("boom")])
+
+        result = [page async for page in connector.iter_episodes_with_streams(page_size=2)]
+
+        assert result == [[{"Id": "1"}, {"Id": "2"}]]
+
+
+class TestSyncTvStreamsBulk:
+    async def test_bulk_mode_matches_episodes_by_series(self, service, db, make_tv_show, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_BULK", True)
+        show, _season, (ep1, ep2) = make_tv_show(title="Show A")
+        show.media_path = "/tv/Show A"
+        db.commit()
+        connector = _fake_connector(
+            series=[{"Id": "jf-a", "Name": "Show A", "Path": "/tv/Show A"}, {"Id": "jf-x", "Name": "Other"}],
+            episodes_by_series={
+                "jf-a": [_jf_episode("jf-a", 1, 1), _jf_episode("jf-a", 1, 2)],
+                "jf-x": [_jf_episode("jf-x", 1, 1), _jf_episode("jf-x", 1, 2), _jf_episode("jf-x", 2, 1)],
+            },
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_tv_streams()
+
+        # Only ep1 has a file; ep2 is ignored like before
+        assert stats == {"total": 1, "updated": 1, "skipped": 0}
+        db.refresh(ep1)
+        db.refresh(show)
+        assert ep1.media_streams["subtitles"][0]["language"] == "fre"
+        assert show.jellyfin_id == "jf-a"
+        # 5 episodes over pages of 2: three paged requests, never one per series
+        assert connector.pages == 3
+        connector.get_episodes_with_streams.assert_not_awaited()
+
+    async def test_exact_title_match_skips_search(self, service, db, make_tv_show, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_BULK", True)
+        _show, _season, (ep1, _ep2) = make_tv_show(title="Show B")
+        connector = _fake_connector(
+            series=[{"Id": "jf-b", "Name": "show b"}],
+            episodes_by_series={"jf-b": [_jf_episode("jf-b", 1, 1)]},
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_tv_streams()
+
+        assert stats["updated"] == 1
+        connector.get_series_id_by_title.assert_not_awaited()
+
+    async def test_search_fallback_and_unmatched_episode(self, service, db, make_tv_show, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_BULK", True)
+        _show, _season, (ep1, _ep2) = make_tv_show(title="Show C (2020)")
+        connector = _fake_connector(
+            series=[{"Id": "jf-c", "Name": "Show C"}],
+            episodes_by_series={"jf-c": [_jf_episode("jf-c", 2, 1)]},
+        )
+        connector.get_series_id_by_title = AsyncMock(return_value="jf-c")
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_tv_streams()
+
+        connector.get_series_id_by_title.assert_awaited_once_with("Show C (2020)")
+        assert stats == {"total": 1, "updated": 0, "skipped": 1}
+        db.refresh(ep1)
+        assert ep1.media_streams is None
+
+    async def test_no_connector_returns_zero_stats(self, service):
+        service._get_connector = MagicMock(return_value=None)
+
+        assert await service.sync_tv_streams() == {"total": 0, "updated": 0, "skipped": 0}
+
+
+class TestSyncTvStreamsPerSeries:
+    async def test_per_series_mode_fetches_each_series(self, service, db, make_tv_show, monkeypatch):
+        monkeypatch.setattr(settings, "JELLYFIN_STREAMS_BULK", False)
+        _show, _season, (ep1, _ep2) = make_tv_show(title="Show D")
+        connector = _fake_connector(
+            series=[{"Id": "jf-d", "Name": "Show D"}],
+            episodes_by_series={"jf-d": [_jf_episode("jf-d", 1, 1)]},
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_tv_streams()
+
+        assert stats == {"total": 1, "updated": 1, "skipped": 0}
+        connector.get_episodes_with_streams.assert_awaited_once_with("jf-d")
+        assert connector.pages == 0
+
+
+def _jf_movie(movie_id, name, year, path=None):
+    return {"Id": movie_id, "Name": name, "ProductionYear": year, "Path": path, "MediaStreams": [SUBTITLE]}
+
+
+class TestNormalizeTitle:
+    @pytest.mark.parametrize(
+        ("title", "expected"),
+        [
+            ("The Matrix", "matrix"),
+            ("Amélie", "amelie"),
+            ("L'Homme qui rit", "homme qui rit"),
+            ("Fast & Furious: Tokyo Drift", "fast and furious tokyo drift"),
+            ("Spider-Man:  No Way Home", "spider man no way home"),
+            ("A", "a"),
+            ("!!!", ""),
+        ],
+    )
+    def test_normalize(self, title, expected):
+        assert _normalize_title(title) == expected
+
+
+class TestMovieStreamsIndex:
+    def test_path_match_first(self):
+        index = MovieStreamsIndex([_jf_movie("m1", "Other", 2000, path="/movies/Dune (2021)/Dune.mkv")])
+
+        entry, matched_by = index.match("Dune", 2021, "/movies/Dune (2021)")
+
+        assert matched_by == "path"
+        assert entry[1] == "m1"
+
+    def test_title_year_preferred_over_title_only(self):
+        index = MovieStreamsIndex([_jf_movie("old", "Dune", 1984), _jf_movie("new", "Dune", 2021)])
+
+        assert index.match("Dune", 2021, None)[0][1] == "new"
+        assert index.match("Dune", 1984, None)[0][1] == "old"
+
+    def test_title_only_keeps_first_movie(self):
+        index = MovieStreamsIndex([_jf_movie("old", "Dune", 1984), _jf_movie("new", "Dune", 2021)])
+
+        entry, matched_by = index.match("dune ", 1999, None)
+
+        assert matched_by == "title"
+        assert entry[1] == "old"
+
+    def test_normalized_title_with_and_without_year(self):
+        index = MovieStreamsIndex([_jf_movie("m1", "The Lord of the Rings: The Two Towers", 2002)])
+
+        assert index.match("Lord of the Rings - The Two Towers", 2002, None)[1] == "normalized_title_year"
+        assert index.match("Lord of the Rings - The Two Towers", None, None)[1] == "normalized_title"
+
+    def test_no_match(self):
+        index = MovieStreamsIndex([_jf_movie("m1", "Dune", 2021)])
+
+        assert index.match("Arrival", 2016, "/movies/Arrival") == (None, None)
+
+
+class TestSyncMovieStreams:
+    async def test_fallbacks_and_jellyfin_id(self, service, db, make_library_item):
+        exact = make_library_item(title="Arrival", year=2016, media_type=MediaType.MOVIE)
+        wrong_year = make_library_item(title="Dune", year=2020, media_type=MediaType.MOVIE)
+        punctuated = make_library_item(title="Amelie", year=2001, media_type=MediaType.MOVIE)
+        missing = make_library_item(title="Nope", year=2001, media_type=MediaType.MOVIE)
+        connector = MagicMock()
+        connector.get_movies_with_streams = AsyncMock(
+            return_value=[
+                _jf_movie("jf-arrival", "Arrival", 2016),
+                _jf_movie("jf-dune", "Dune", 2021),
+                _jf_movie("jf-amelie", "Amélie", 2001),
+            ]
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_movie_streams()
+
+        assert stats == {"total": 4, "updated": 3, "skipped": 1}
+        for item in (exact, wrong_year, punctuated, missing):
+            db.refresh(item)
+        assert (exact.jellyfin_id, wrong_year.jellyfin_id, punctuated.jellyfin_id) == (
+            "jf-arrival",
+            "jf-dune",
+            "jf-amelie",
+        )
+        assert punctuated.media_streams["subtitles"][0]["language"] == "fre"
+        assert missing.media_streams is None
+
+
+class _CountingDict(dict):
+    """dict counting its .get() lookups"""
+
+    lookups = 0
+
+    def get(self, key, default=None):
+        type(self).lookups += 1
+        return super().get(key, default)
+
+
+class TestMovieIndexScaling:
+    def test_title_fallback_is_constant_lookups_on_20k_movies(self):
+        jellyfin_movies = [_jf_movie(f"m{i}", f"Movie {i}", 1950 + i % 70) for i in range(20_000)]
+        # Library items whose year does not match: every one of them hits the title-only fallback
+        lookups = [(f"Movie {i}", 1900) for i in range(0, 20_000, 400)]
+
+        scanned = 0
+
+        def _legacy():
+            nonlocal scanned
+            jf_index = {}
+            for jf in jellyfin_movies:
+                jf_index[((jf.get("Name") or "").strip().lower(), jf.get("ProductionYear"))] = jf.get("Id")
+            found = 0
+            for title, year in lookups:
+                title_norm = title.strip().lower()
+                entry = jf_index.get((title_norm, year))
+                if entry is None:
+                    for (t, _y), v in jf_index.items():
+                        scanned += 1
+                        if t == title_norm:
+                            entry = v
+                            break
+                found += entry is not None
+            return found
+
+        index = MovieStreamsIndex(jellyfin_movies)
+        for name in ("by_path", "by_title_year", "by_title", "by_normalized_title_year", "by_normalized_title"):
+            setattr(index, name, _CountingDict(getattr(index, name)))
+        _CountingDict.lookups = 0
+        indexed = sum(index.match(title, year, None)[0] is not None for title, year in lookups)
+
+        assert _legacy() == indexed == len(lookups)
+        # (titre, année) puis titre seul : 2 recherches par film, quel que soit le catalogue
+        assert _CountingDict.lookups == 2 * len(lookups)
+        # L'ancien parcours linéaire visite en moyenne la moitié du catalogue par film
+        assert scanned > 1000 * len(lookups)
+
+
+class TestGetItemsWithStreams:
+    async def test_ids_query(self):
+        connector = JellyfinConnector(base_url="http://jf", api_key="k", port=8096)
+        connector._get = AsyncMock(return_value={"Items": [{"Id": "1"}]})
+
+        assert await connector.get_items_with_streams(["1", "2"]) == [{"Id": "1"}]
+        params = connector._get.call_args.kwargs["params"]
+        assert params["Ids"] == "1,2"
+        assert "MediaStreams" in params["Fields"]
+
+    async def test_empty_list_skips_request(self):
+        connector = JellyfinConnector(base_url="http://jf", api_key="k", port=8096)
+        connector._get = AsyncMock()
+
+        assert await connector.get_items_with_streams([]) == []
+        connector._get.assert_not_awaited()
+
+
+class TestSyncItems:
+    @staticmethod
+    def _connector(items, series_episodes=None):
+        connector = MagicMock()
+        connector.get_items_with_streams = AsyncMock(return_value=items)
+        connector.get_episodes_with_streams = AsyncMock(return_value=series_episodes or [])
+        return connector
+
+    async def test_movies_by_jellyfin_id_then_title_year(self, service, db, make_library_item):
+        known = make_library_item(title="Arrival", year=2016, media_type=MediaType.MOVIE, jellyfin_id="jf-arrival")
+        new = make_library_item(title="Dune", year=2021, media_type=MediaType.MOVIE)
+        other = make_library_item(title="Heat", year=1995, media_type=MediaType.MOVIE)
+        connector = self._connector(
+            [
+                {**_jf_movie("jf-arrival", "Renamed", 2016), "Type": "Movie"},
+                {**_jf_movie("jf-dune", "Dune", 2021), "Type": "Movie"},
+                {**_jf_movie("jf-unknown", "Unknown", 2000), "Type": "Movie"},
+            ]
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_items(["jf-arrival", "jf-dune", "jf-unknown"])
+
+        assert stats == {"total": 3, "updated": 2, "skipped": 1}
+        for item in (known, new, other):
+            db.refresh(item)
+        assert known.media_streams["subtitles"][0]["language"] == "fre"
+        assert new.jellyfin_id == "jf-dune"
+        assert new.media_streams is not None
+        assert other.media_streams is None
+
+    async def test_movie_matched_by_folder(self, service, db, make_library_item):
+        item = make_library_item(title="Something Else", year=1999, media_type=MediaType.MOVIE)
+        item.media_path = "/movies/Dune (2021)"
+        db.commit()
+        connector = self._connector(
+            [{**_jf_movie("jf-dune", "Dune", 2021, path="/movies/Dune (2021)/Dune.mkv"), "Type": "Movie"}]
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        await service.sync_items(["jf-dune"])
+
+        db.refresh(item)
+        assert item.jellyfin_id == "jf-dune"
+
+    async def test_episode_by_series_name_learns_jellyfin_id(self, service, db, make_tv_show):
+        show, _season, (ep1, ep2) = make_tv_show(title="Show E")
+        connector = self._connector(
+            [{**_jf_episode("jf-e", 1, 2), "Type": "Episode", "SeriesName": "show e"}],
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_items(["jf-e-1-2"])
+
+        assert stats["updated"] == 1
+        db.refresh(show)
+        db.refresh(ep1)
+        db.refresh(ep2)
+        assert show.jellyfin_id == "jf-e"
+        # Episode rows are matched even before Sonarr reports the new file
+        assert ep2.media_streams is not None
+        assert ep1.media_streams is None
+
+    async def test_series_item_refreshes_its_episodes(self, service, db, make_tv_show):
+        show, _season, (ep1, _ep2) = make_tv_show(title="Show F")
+        show.jellyfin_id = "jf-f"
+        db.commit()
+        connector = self._connector(
+            [{"Id": "jf-f", "Type": "Series", "Name": "Show F"}],
+            series_episodes=[{**_jf_episode("jf-f", 1, 1), "Type": "Episode"}],
+        )
+        service._get_connector = MagicMock(return_value=connector)
+
+        stats = await service.sync_items(["jf-f"])
+
+        connector.get_episodes_with_streams.assert_awaited_once_with("jf-f")
+        assert stats == {"total": 1, "updated": 1, "skipped": 0}
+        db.refresh(ep1)
+        assert ep1.media_streams is not None
+
+    async def test_http_error_propagates(self, service):
+        connector = MagicMock()
+        connector.get_items_with_streams = AsyncMock(side_effect=RuntimeError("down"))
+        service._get_connector = MagicMock(return_value=connector)
+
+        with pytest.raises(RuntimeError):
+            await service.sync_items(["x"])
@@ -0,0 +1,130 @@
+"""
+Unit tests for incremental JSON array parsing.
+
+Covers:
+- iter_json_array: any chunk size, whitespace/indentation, scalars split across chunks, nested brackets in strings
+- iter_json_array: truncated, non-array and malformed bodies raise ValueError
+- trim_record: nested specs, lists of dicts, missing keys, None keeps the whole value
+- memory: streaming into slim records peaks well below json.loads of the whole payload
+"""
+
+import json
+import os
+import tracemalloc
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+import pytest  # noqa: E402
+
+from app.services.arr_records import MovieRecord  # noqa: E402
+from app.services.json_stream import iter_json_array, trim_record  # noqa: E402
+
+
+async def _chunks(text, size):
+    for start in range(0, len(text), size):
+        yield text[start : start + size]
+
+
+async def _parse(text, size=16):
+    return [element async for element in iter_json_array(_chunks(text, size))]
+
+
+_PAYLOAD = [
+    {"id": 1, "title": "Brackets ] and , inside [", "nested": {"a": [1, 2, {"b": None}]}},
+    {"id": 2, "title": 'Escaped " quote', "sizeOnDisk": 123456789012},
+    12345,
+    -1.5e3,
+    "plain",
+    True,
+    None,
+    [],
+    {},
+]
+
+
+class TestIterJsonArray:
+    @pytest.mark.parametrize("size", [1, 2, 5, 64, 100_000])
+    async def test_any_chunk_size(self, size):
+        assert await _parse(json.dumps(_PAYLOAD), size) == _PAYLOAD
+
+    async def test_indented_payload(self):
+        assert await _parse(json.dumps(_PAYLOAD, indent=2), 3) == _PAYLOAD
+
+    async def test_empty_array(self):
+        assert await _parse("  [ ]  ") == []
+
+    async def test_number_split_across_chunks(self):
+        assert await _parse("[123456,7]", 3) == [123456, 7]
+
+    @pytest.mark.parametrize("body", ["", '{"a": 1}', "[1, 2", '[{"a": 1},', '[{"a": }]'])
+    async def test_invalid_bodies_raise(self, body):
+        with pytest.raises(ValueError):
+            await _parse(body, 4)
+
+
+class TestTrimRecord:
+    def test_nested_spec_and_lists(self):
+        record = {
+            "id": 1,
+            "title": "Inception",
+            "alternateTitles": [{"title": "Origine", "sourceType": "tmdb"}],
+            "movieFile": {"path": "/movies/a.mkv", "mediaInfo": {"audioCodec": "DTS"}},
+            "images": [{"coverType": "poster", "remoteUrl": "http://p", "url": "/l"}],
+        }
+        spec = {"id": None, "movieFile": {"path": None}, "images": {"remoteUrl": None}, "missing": None}
+        assert trim_record(record, spec) == {
+            "id": 1,
+            "movieFile": {"path": "/movies/a.mkv"},
+            "images": [{"remoteUrl": "http://p"}],
+        }
+
+    def test_none_spec_keeps_value(self):
+        record = {"statistics": {"episodeCount": 3, "sizeOnDisk": 10}}
+        assert trim_record(record, {"statistics": None}) == record
+        assert trim_record(record, None) is record
+
+    def test_scalar_where_dict_expected_is_kept(self):
+        assert trim_record({"movieFile": None}, {"movieFile": {"path": None}}) == {"movieFile": None}
+
+
+def _big_movie(i):
+    return {
+        "id": i,
+        "title": f"Movie {i}",
+        "year": 2000 + i % 25,
+        "hasFile": True,
+        "sizeOnDisk": 4_000_000_000,
+        "overview": "o" * 400,
+        "images": [{"coverType": t, "url": f"/{t}/{i}.jpg", "remoteUrl": f"http://img/{t}/{i}"} for t in "abcd"],
+        "alternateTitles": [{"title": f"Alt {i}-{n}", "sourceType": "tmdb", "movieMetadataId": i} for n in range(20)],
+        "movieFile": {"path": f"/m/{i}.mkv", "mediaInfo": {f"k{n}": "v" * 20 for n in range(30)}, "quality": {}},
+        "tags": list(range(30)),
+    }
+
+
+class TestMemory:
+    async def test_streaming_peak_is_a_fraction_of_full_parse(self):
+        text = json.dumps([_big_movie(i) for i in range(400)])
+
+        tracemalloc.start()
+        full = json.loads(text)
+        full_peak = tracemalloc.get_traced_memory()[1]
+        del full
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        records = [MovieRecord.from_api(movie) async for movie in iter_json_array(_chunks(text, 16_384))]
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert len(records) == 400
+        assert records[0].file_path == "/m/0.mkv"
+        # The chunks themselves are slices of ``text``; the parsed result is what shrinks
+        assert stream_peak < full_peak / 3
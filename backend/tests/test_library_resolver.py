@@ -0,0 +1,135 @@
+"""
+Unit tests for LibraryItemResolver.
+
+Covers:
+- warm: indexes jellyfin_id, (normalized title, year) and normalized title per media type
+- resolve: jellyfin_id > title + year > title, media types kept apart, served without LibraryItem queries
+- resolve: cold cache warmed on first use, items added or removed since warm-up fall back to SQL
+- remember: a learned jellyfin_id becomes a cache hit
+"""
+
+import os
+from datetime import datetime
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.models.enums import MediaType  # noqa: E402
+from app.services.library_resolver import LibraryItemResolver  # noqa: E402
+
+
+@pytest.fixture()
+def resolver():
+    return LibraryItemResolver()
+
+
+@pytest.fixture()
+def count_library_selects(db):
+    """Number of SELECT statements hitting library_items while the fixture is active."""
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "library_items" in statement:
+            statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", _before)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _before)
+
+
+class TestResolve:
+    def test_lookup_order(self, resolver, db, make_library_item):
+        by_id = make_library_item(title="Dune", year=1984, media_type=MediaType.MOVIE, jellyfin_id="jf-old")
+        newer = make_library_item(title="Dune", year=2021, media_type=MediaType.MOVIE)
+        # Même created_at sinon (factory) : l'ordre dépendrait des UUID
+        by_id.created_at = datetime(2025, 1, 1)
+        db.commit()
+        resolver.warm(db)
+
+        assert resolver.resolve(db, MediaType.MOVIE, "jf-old", "Dune", 2021) is by_id
+        assert resolver.resolve(db, MediaType.MOVIE, "jf-unknown", " dune ", 2021) is newer
+        # Year-relaxed fallback: first item with that title
+        assert resolver.resolve(db, MediaType.MOVIE, None, "DUNE", 1999) is by_id
+
+    def test_media_types_are_separate(self, resolver, db, make_library_item):
+        movie = make_library_item(title="Fargo", year=1996, media_type=MediaType.MOVIE)
+        show = make_library_item(title="Fargo", year=2014, media_type=MediaType.TV)
+        resolver.warm(db)
+
+        assert resolver.resolve(db, MediaType.MOVIE, None, "Fargo", 1996) is movie
+        assert resolver.resolve(db, MediaType.TV, None, "fargo", use_year=False) is show
+
+    def test_warm_cache_hits_skip_library_queries(self, resolver, db, make_library_item, count_library_selects):
+        item = make_library_item(title="Inception", year=2010, media_type=MediaType.MOVIE, jellyfin_id="jf-1")
+        resolver.warm(db)
+        count_library_selects.clear()
+
+        for _ in range(5):
+            assert resolver.resolve(db, MediaType.MOVIE, "jf-1", "Inception", 2010) is item
+            assert resolver.resolve(db, MediaType.MOVIE, None, "inception", 2010) is item
+
+        # Items are already in the session identity map: no SELECT at all
+        assert count_library_selects == []
+        assert (resolver.hits, resolver.misses) == (10, 0)
+
+    def test_cold_cache_is_warmed_on_first_use(self, resolver, db, make_library_item):
+        item = make_library_item(title="Heat", year=1995, media_type=MediaType.MOVIE)
+
+        assert resolver.resolve(db, MediaType.MOVIE, None, "Heat", 1995) is item
+        assert resolver.is_warm(MediaType.MOVIE)
+        assert not resolver.is_warm(MediaType.TV)
+        assert resolver.hits == 1
+
+    def test_item_added_after_warm_falls_back_to_sql(self, resolver, db, make_library_item):
+        resolver.warm(db)
+        item = make_library_item(title="Arrival", year=2016, media_type=MediaType.MOVIE)
+
+        assert resolver.resolve(db, MediaType.MOVIE, None, "Arrival", 2016) is item
+        assert resolver.misses == 1
+        # Remembered: the next lookup is a hit
+        assert resolver.resolve(db, MediaType.MOVIE, None, "Arrival", 2016) is item
+        assert resolver.hits == 1
+
+    def test_deleted_item_is_not_returned(self, resolver, db, make_library_item):
+        item = make_library_item(title="Gone", year=2000, media_type=MediaType.MOVIE)
+        resolver.warm(db)
+        db.delete(item)
+        db.commit()
+
+        assert resolver.resolve(db, MediaType.MOVIE, None, "Gone", 2000) is None
+
+    def test_unknown_title(self, resolver, db):
+        resolver.warm(db)
+
+        assert resolver.resolve(db, MediaType.MOVIE, None, "", None) is None
+        assert resolver.resolve(db, MediaType.TV, None, None, use_year=False) is None
+
+
+class TestRemember:
+    def test_learned_jellyfin_id_is_a_hit(self, resolver, db, make_library_item):
+        item = make_library_item(title="Heat", year=1995, media_type=MediaType.MOVIE)
+        resolver.warm(db)
+
+        item.jellyfin_id = "jf-heat"
+        db.commit()
+        resolver.remember(item, jellyfin_id="jf-heat")
+
+        assert resolver.resolve(db, MediaType.MOVIE, "jf-heat", "Renamed", None) is item
+        assert resolver.misses == 0
+
+    def test_remember_before_warm_is_ignored(self, resolver, db, make_library_item):
+        item = make_library_item(title="Heat", year=1995, media_type=MediaType.MOVIE)
+
+        resolver.remember(item, jellyfin_id="jf-heat")
+
+        assert not resolver.is_warm(MediaType.MOVIE)
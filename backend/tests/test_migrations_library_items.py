@@ -0,0 +1,43 @@
+"""
+Unit tests for library_items column migrations.
+
+Tests mock inspect() and SessionLocal so no real DB is required.
+"""
+
+from unittest.mock import MagicMock, patch
+
+
+def _make_inspector(*column_names: str):
+    inspector = MagicMock()
+    inspector.get_columns.return_value = [{"name": name, "type": "VARCHAR(255)"} for name in column_names]
+    return inspector
+
+
+class TestMigrateAddSonarrSeriesIdToLibraryItems:
+    def test_adds_column_and_index_when_missing(self):
+        from app.db_migrations import migrate_add_sonarr_series_id_to_library_items
+
+        db = MagicMock()
+        with (
+            patch("app.db_migrations.inspect", return_value=_make_inspector("id", "title")),
+            patch("app.db.SessionLocal", return_value=db),
+        ):
+            migrate_add_sonarr_series_id_to_library_items()
+
+        statements = [str(call.args[0]) for call in db.execute.call_args_list]
+        assert any("ALTER TABLE library_items" in sql and "sonarr_series_id" in sql for sql in statements)
+        assert any("CREATE INDEX" in sql for sql in statements)
+        db.commit.assert_called_once()
+        db.close.assert_called_once()
+
+    def test_skips_when_column_exists(self):
+        from app.db_migrations import migrate_add_sonarr_series_id_to_library_items
+
+        db = MagicMock()
+        with (
+            patch("app.db_migrations.inspect", return_value=_make_inspector("id", "sonarr_series_id")),
+            patch("app.db.SessionLocal", return_value=db),
+        ):
+            migrate_add_sonarr_series_id_to_library_items()
+
+        db.execute.assert_not_called()
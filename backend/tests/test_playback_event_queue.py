@@ -0,0 +1,110 @@
+"""
+Unit tests for PlaybackEventQueue (write-behind playback webhook).
+
+Covers:
+- worker: started in the running loop, drains events in FIFO batches of PLAYBACK_WEBHOOK_BATCH_SIZE
+- stop: cancels the worker and applies the events still queued
+- worker keeps running after a batch that could not be processed at all
+- stats: depth, high-water mark, processed / rejected counters
+"""
+
+import asyncio
+import os
+from unittest.mock import MagicMock, patch
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+import pytest  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.playback_event_queue import PlaybackEvent, PlaybackEventQueue  # noqa: E402
+
+
+@pytest.fixture()
+def queue():
+    return PlaybackEventQueue()
+
+
+@pytest.fixture()
+def handled():
+    """Events applied by the worker, in order (process_playback_event and SessionLocal patched)."""
+    events = []
+
+    def _process(db, event):
+        events.append(event.payload["n"])
+        return {"status": "success", "event": event.event_type}
+
+    with (
+        patch("app.services.playback_event_queue.SessionLocal", MagicMock()),
+        patch("app.services.playback_event_queue.process_playback_event", side_effect=_process),
+    ):
+        yield events
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _event(n):
+    return PlaybackEvent(event_type="playback.start", payload={"n": n})
+
+
+class TestWorker:
+    async def test_worker_drains_in_fifo_batches(self, queue, handled, monkeypatch):
+        monkeypatch.setattr(settings, "PLAYBACK_WEBHOOK_BATCH_SIZE", 3)
+        for n in range(7):
+            assert queue.submit(_event(n))
+
+        queue.start()
+        await _wait_for(lambda: queue.processed == 7)
+        await queue.stop()
+
+        assert handled == list(range(7))
+        assert queue.batches == 3
+        assert not queue.running
+
+    async def test_stop_applies_remaining_events(self, queue, handled):
+        queue.start()
+        await queue.stop()
+        for n in range(3):
+            queue.submit(_event(n))
+
+        await queue.stop()
+
+        assert handled == [0, 1, 2]
+        assert queue.stats()["depth"] == 0
+
+    async def test_worker_survives_unprocessable_batch(self, queue, handled):
+        queue.process_batch = MagicMock(side_effect=[RuntimeError("db down"), []])
+        queue.start()
+
+        queue.submit(_event(0))
+        await _wait_for(lambda: queue.failed == 1)
+        queue.submit(_event(1))
+        await _wait_for(lambda: queue.process_batch.call_count == 2)
+        await queue.stop()
+
+        assert queue.running is False
+
+
+class TestStats:
+    def test_backpressure_metrics(self, queue, monkeypatch):
+        monkeypatch.setattr(settings, "PLAYBACK_WEBHOOK_QUEUE_MAX_SIZE", 2)
+
+        assert queue.submit(_event(0)) and queue.submit(_event(1))
+        assert queue.submit(_event(2)) is False
+
+        stats = queue.stats()
+        assert stats["depth"] == stats["high_water"] == stats["max_size"] == 2
+        assert (stats["enqueued"], stats["rejected"], stats["processed"]) == (2, 1, 0)
+        assert stats["running"] is False
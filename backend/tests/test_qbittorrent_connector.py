@@ -0,0 +1,329 @@
+"""
+Unit tests for QBittorrentConnector torrent lookups.
+
+Covers:
+- fetch_torrents_info: hashes split into chunks of chunk_size, deduplicated, default chunk size from settings
+- fetch_torrents_info: chunks fetched concurrently up to the concurrency cap, over one session
+- fetch_torrents_info: a failed or 403 chunk only drops its own hashes, empty input makes no request
+- TorrentTable: full update, field diffs, removals, server_state merge
+- sync_maindata: rid forwarded, fresh table reused, table shared between connectors, 403 / disabled
+- get_all_torrents / get_transfer_info / get_torrents_info read the maindata table, fall back to /torrents/info
+- shared sessions: one login reused across connectors, re-login + retry on 403, close() keeps the session,
+  credential change starts a new session, the old one closed by a tracked background task
+"""
+
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+from app.core.config import settings  # noqa: E402
+from app.services.qbittorrent_connector import QBittorrentConnector  # noqa: E402
+from app.services.qbittorrent_maindata import TorrentTable, maindata_registry  # noqa: E402
+from app.services.qbittorrent_sessions import qbittorrent_session_registry  # noqa: E402
+
+
+class _FakeSession:
+    """aiohttp-like session answering /torrents/info from an in-memory torrent table."""
+
+    def __init__(self, torrents, delay=0.0, statuses=None, maindata=None, maindata_status=200, login_ok=True):
+        self.torrents = torrents
+        self.delay = delay
+        self.statuses = statuses or {}
+        # Réponses successives de /sync/maindata (None = endpoint absent, 404)
+        self.maindata = list(maindata) if maindata is not None else None
+        self.maindata_status = maindata_status if maindata is not None else 404
+        self.requests = []
+        self.maindata_rids = []
+        self.in_flight = 0
+        self.peak = 0
+        self.closed = False
+        self.login_ok = login_ok
+        self.logins = 0
+        self.cookie_jar = MagicMock()
+
+    def post(self, url, data=None):
+        assert url.endswith("/api/v2/auth/login")
+        self.logins += 1
+        return self._respond(200, lambda: None, text="Ok." if self.login_ok else "Fails.")
+
+    async def close(self):
+        self.closed = True
+
+    def get(self, url, params=None):
+        if url.endswith("/api/v2/sync/maindata"):
+            self.maindata_rids.append(params["rid"])
+            return self._respond(self.maindata_status, lambda: self.maindata.pop(0))
+
+        hashes = params["hashes"].split("|")
+        self.requests.append(hashes)
+        status = self.statuses.get(len(self.requests), 200)
+        return self._respond(status, lambda: [self.torrents[h] for h in hashes if h in self.torrents])
+
+    def _respond(self, status, body, text=""):
+        session = self
+
+        class _Context:
+            async def __aenter__(self):
+                session.in_flight += 1
+                session.peak = max(session.peak, session.in_flight)
+                await asyncio.sleep(session.delay)
+                response = MagicMock()
+                response.status = status
+                response.json = AsyncMock(return_value=body() if status == 200 else None)
+                response.text = AsyncMock(return_value=text)
+                return response
+
+            async def __aexit__(self, *exc):
+                session.in_flight -= 1
+                return False
+
+        return _Context()
+
+
+def _torrent(h):
+    return {"hash": h.lower(), "name": f"T-{h}", "state": "uploading", "ratio": 1.234, "progress": 1.0}
+
+
+def _hashes(count):
+    return [f"{i:040X}" for i in range(count)]
+
+
+@pytest.fixture()
+def connector():
+    c = QBittorrentConnector(base_url="http://qbit", username="u", password="p", port=8080)
+    c._authenticated = True
+    return c
+
+
+class TestFetchTorrentsInfoChunks:
+    async def test_splits_hashes_into_chunks(self, connector):
+        hashes = _hashes(25)
+        connector.session = _FakeSession({h: _torrent(h) for h in hashes})
+        result = await connector.fetch_torrents_info(hashes, chunk_size=10)
+        assert [len(chunk) for chunk in connector.session.requests] == [10, 10, 5]
+        assert set(result) == set(hashes)
+        assert result[hashes[0]]["status"] == "seeding"
+        assert result[hashes[0]]["progress"] == 100.0
+
+    async def test_duplicates_and_empty_hashes_are_dropped(self, connector):
+        hashes = _hashes(3)
+        connector.session = _FakeSession({h: _torrent(h) for h in hashes})
+        await connector.fetch_torrents_info(hashes + hashes + ["", None], chunk_size=50)
+        assert connector.session.requests == [hashes]
+
+    async def test_default_chunk_size_from_settings(self, connector, monkeypatch):
+        monkeypatch.setattr(settings, "QBITTORRENT_HASH_CHUNK_SIZE", 4)
+        connector.session = _FakeSession({})
+        await connector.fetch_torrents_info(_hashes(9))
+        assert [len(chunk) for chunk in connector.session.requests] == [4, 4, 1]
+
+    async def test_chunks_run_concurrently_up_to_cap(self, connector):
+        hashes = _hashes(60)
+        connector.session = _FakeSession({h: _torrent(h) for h in hashes}, delay=0.01)
+        result = await connector.fetch_torrents_info(hashes, chunk_size=5, concurrency=3)
+        assert len(connector.session.requests) == 12
+        assert connector.session.peak == 3
+        assert len(result) == 60
+
+    async def test_forbidden_chunk_only_drops_its_hashes(self, connector):
+        hashes = _hashes(6)
+        connector.session = _FakeSession({h: _torrent(h) for h in hashes}, statuses={2: 403}, login_ok=False)
+        result = await connector.fetch_torrents_info(hashes, chunk_size=2, concurrency=1)
+        assert set(result) == set(hashes[:2] + hashes[4:])
+        assert connector._authenticated is False
+
+    async def test_empty_input_makes_no_request(self, connector):
+        connector.session = _FakeSession({})
+        assert await connector.fetch_torrents_info([]) == {}
+        assert connector.session.requests == []
+
+
+# ── maindata ──────────────────────────────────────────────────────────────────
+
+
+def _full(rid, torrents, server_state=None):
+    return {"rid": rid, "full_update": True, "torrents": torrents, "server_state": server_state or {}}
+
+
+_STATE = {"dl_info_speed": 100, "up_info_speed": 200, "connection_status": "connected"}
+
+
+class TestTorrentTable:
+    def test_full_update_then_diffs(self):
+        table = TorrentTable()
+        table.apply(_full(1, {"aa": {"name": "A", "ratio": 1.0}, "bb": {"name": "B"}}, _STATE))
+        table.apply({"rid": 2, "torrents": {"aa": {"ratio": 2.5}, "cc": {"name": "C"}}, "torrents_removed": ["bb"]})
+        assert table.rid == 2
+        assert table.torrents == {"aa": {"name": "A", "ratio": 2.5}, "cc": {"name": "C"}}
+        assert (table.full_updates, table.partial_updates) == (1, 1)
+
+    def test_server_state_merged(self):
+        table = TorrentTable()
+        table.apply(_full(1, {}, _STATE))
+        table.apply({"rid": 2, "server_state": {"dl_info_speed": 5}})
+        assert table.server_state == {**_STATE, "dl_info_speed": 5}
+
+    def test_new_full_update_replaces_table(self):
+        table = TorrentTable()
+        table.apply(_full(1, {"aa": {"name": "A"}}))
+        table.apply(_full(7, {"bb": {"name": "B"}}))
+        assert list(table.torrents) == ["bb"]
+
+    def test_lookup_ignores_hash_case(self):
+        table = TorrentTable()
+        table.apply(_full(1, {"abcdef": {"name": "A"}}))
+        assert table.get("ABCDEF") == {"name": "A"}
+
+
+class TestSyncMaindata:
+    async def test_rid_forwarded_between_polls(self, connector):
+        diff = {"rid": 4, "torrents": {"aa": {"ratio": 2}}}
+        connector.session = _FakeSession({}, maindata=[_full(3, {"aa": {"name": "A"}}), diff])
+        await connector.sync_maindata(max_age=0)
+        table = await connector.sync_maindata(max_age=0)
+        assert connector.session.maindata_rids == [0, 3]
+        assert table.get("aa") == {"name": "A", "ratio": 2}
+
+    async def test_fresh_table_skips_request(self, connector):
+        connector.session = _FakeSession({}, maindata=[_full(1, {})])
+        await connector.sync_maindata()
+        await connector.sync_maindata()
+        assert connector.session.maindata_rids == [0]
+
+    async def test_table_shared_between_connectors(self, connector):
+        connector.session = _FakeSession({}, maindata=[_full(5, {"aa": {"name": "A"}})])
+        await connector.sync_maindata(max_age=0)
+
+        other = QBittorrentConnector(base_url="http://qbit", username="u", password="p", port=8080)
+        other._authenticated = True
+        other.session = _FakeSession({}, maindata=[{"rid": 6}])
+        table = await other.sync_maindata(max_age=0)
+        assert other.session.maindata_rids == [5]
+        assert table.get("aa") == {"name": "A"}
+        assert len(maindata_registry) == 1
+
+    async def test_forbidden_returns_none_and_resets_auth(self, connector):
+        connector.session = _FakeSession({}, maindata=[], maindata_status=403)
+        assert await connector.sync_maindata() is None
+        assert connector._authenticated is False
+
+    async def test_disabled_by_settings(self, connector, monkeypatch):
+        monkeypatch.setattr(settings, "QBITTORRENT_MAINDATA_ENABLED", False)
+        connector.session = _FakeSession({}, maindata=[_full(1, {})])
+        assert await connector.sync_maindata() is None
+        assert connector.session.maindata_rids == []
+
+
+class TestReadsFromMaindata:
+    async def test_get_all_torrents_and_transfer_share_one_poll(self, connector):
+        torrents = {"abc": {"name": "A", "state": "uploading", "ratio": 1.5}}
+        connector.session = _FakeSession({}, maindata=[_full(1, torrents, _STATE)])
+        torrents, transfer = await asyncio.gather(connector.get_all_torrents(), connector.get_transfer_info())
+        assert connector.session.maindata_rids == [0]
+        assert torrents[0]["id"] == "ABC"
+        assert torrents[0]["status"] == "seeding"
+        assert transfer == {"dl_speed": 100, "ul_speed": 200, "connection_status": "connected"}
+
+    async def test_get_torrents_info_reads_table_without_info_requests(self, connector):
+        hashes = _hashes(300)
+        connector.session = _FakeSession({}, maindata=[_full(1, {h.lower(): _torrent(h) for h in hashes[:200]})])
+        result = await connector.get_torrents_info(hashes)
+        assert connector.session.requests == []
+        assert len(result) == 200
+        assert result[hashes[0]]["hash"] == hashes[0]
+        assert result[hashes[0]]["progress"] == 100.0
+
+    async def test_falls_back_to_chunked_requests(self, connector):
+        hashes = _hashes(5)
+        connector.session = _FakeSession({h: _torrent(h) for h in hashes})
+        result = await connector.get_torrents_info(hashes, chunk_size=2)
+        assert connector.session.maindata_rids == [0]
+        assert len(connector.session.requests) == 3
+        assert set(result) == set(hashes)
+
+
+# ── Shared sessions ───────────────────────────────────────────────────────────
+
+
+def _shared(password="p"):
+    return QBittorrentConnector(base_url="http://qbit", username="u", password=password, port=8080, shared_session=True)
+
+
+class TestSharedSession:
+    async def test_login_reused_across_connectors(self):
+        fake = _FakeSession({h: _torrent(h) for h in _hashes(2)})
+        qbittorrent_session_registry.get_state("http://qbit:8080", "u", "p").session = fake
+
+        for _ in range(3):
+            connector = _shared()
+            assert await connector.ensure_authenticated() is True
+            await connector.fetch_torrents_info(_hashes(2))
+            await connector.close()
+
+        assert fake.logins == 1
+        assert len(fake.requests) == 3
+        assert fake.closed is False
+
+    async def test_forbidden_triggers_relogin_and_retry(self):
+        hashes = _hashes(2)
+        fake = _FakeSession({h: _torrent(h) for h in hashes}, statuses={1: 403})
+        state = qbittorrent_session_registry.get_state("http://qbit:8080", "u", "p")
+        state.session, state.authenticated = fake, True
+
+        result = await _shared().fetch_torrents_info(hashes)
+        assert fake.logins == 1
+        assert len(fake.requests) == 2
+        assert set(result) == set(hashes)
+        assert state.authenticated is True
+
+    async def test_failed_relogin_returns_forbidden_result(self):
+        fake = _FakeSession({}, statuses={1: 403}, login_ok=False)
+        state = qbittorrent_session_registry.get_state("http://qbit:8080", "u", "p")
+        state.session, state.authenticated = fake, True
+
+        assert await _shared().fetch_torrents_info(_hashes(1)) == {}
+        assert len(fake.requests) == 1
+        assert state.authenticated is False
+
+    async def test_credentials_change_starts_new_session(self):
+        first = qbittorrent_session_registry.get_state("http://qbit:8080", "u", "p")
+        first.session, first.authenticated = _FakeSession({}), True
+
+        connector = _shared(password="changed")
+        assert connector._authenticated is False
+        assert len(qbittorrent_session_registry) == 1
+        # L'ancienne session est fermée en tâche de fond, référencée jusqu'à la fin
+        assert len(qbittorrent_session_registry._closing) == 1
+        await asyncio.gather(*qbittorrent_session_registry._closing)
+        await asyncio.sleep(0)
+        assert first.session.closed is True
+        assert not qbittorrent_session_registry._closing
+
+    async def test_failed_background_close_is_logged(self, caplog):
+        first = qbittorrent_session_registry.get_state("http://qbit:8080", "u", "p")
+        first.session = _FakeSession({})
+        first.session.close = AsyncMock(side_effect=RuntimeError("boom"))
+
+        _shared(password="changed")
+        await asyncio.gather(*qbittorrent_session_registry._closing, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert "boom" in caplog.text
+        assert not qbittorrent_session_registry._closing
+
+    async def test_unshared_connector_closes_its_session(self, connector):
+        connector.session = _FakeSession({})
+        await connector.close()
+        assert connector.session.closed is True
+        assert len(qbittorrent_session_registry) == 0
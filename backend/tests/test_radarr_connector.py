@@ -3,16 +3,18 @@ Unit tests for RadarrConnector.
 
 Covers:
 - test_connection: success and failure
-- get_movies: returns list, handles exception
+- get_movies: returns list, handles exception, streams and trims records when fields are given
+- get_movie_records: streams into slotted MovieRecord, empty list on error
 - get_calendar: date params, exception handling
 - get_recent_additions: date filtering, sorting, invalid dates ignored
 - get_history: returns records, handles exception
-- get_movie_history_map: builds {movieId: hash} map
+- get_movie_history_map: builds {movieId: newest hash} map, walks all history pages, stops at the high-water mark
 - _extract_hash: all formats and edge cases
 - get_quality_profiles: mapping, exception handling
 - get_statistics: correct counts, exception handling
 """
 
+import json
 import os
 from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock
@@ -29,6 +31,7 @@ os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!"
 os.environ.setdefault("API_KEY", "test-api-key")
 os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
 
+from app.services.arr_history import HistoryCursor  # noqa: E402
 from app.services.radarr_connector import RadarrConnector  # noqa: E402
 
 
@@ -40,6 +43,22 @@ def _make_response(data, status_code=200):
     return mock
 
 
+def _make_stream(text, chunk_size=64):
+    """client.stream() context manager whose response yields ``text`` in chunks."""
+    response = MagicMock()
+    response.raise_for_status = MagicMock()
+
+    async def _aiter_text():
+        for start in range(0, len(text), chunk_size):
+            yield text[start : start + chunk_size]
+
+    response.aiter_text = _aiter_text
+    stream = MagicMock()
+    stream.__aenter__ = AsyncMock(return_value=response)
+    stream.__aexit__ = AsyncMock(return_value=False)
+    return stream
+
+
 @pytest.fixture()
 def connector():
     return RadarrConnector(base_url="http://radarr", api_key="test-key", port=7878)
@@ -91,6 +110,48 @@ class TestGetMovies:
         result = await connector.get_movies()
         assert result == []
 
+    async def test_fields_stream_and_trim_records(self, connector):
+        payload = [
+            {
+                "id": 1,
+                "title": "Inception",
+                "images": [{"coverType": "poster", "remoteUrl": "http://p", "url": "/local"}],
+                "alternateTitles": [{"title": "Origine"}],
+            }
+        ]
+        connector.client.stream = MagicMock(return_value=_make_stream(json.dumps(payload), chunk_size=7))
+        result = await connector.get_movies(fields={"id": None, "title": None, "images": {"remoteUrl": None}})
+        assert result == [{"id": 1, "title": "Inception", "images": [{"remoteUrl": "http://p"}]}]
+        assert connector.client.stream.call_args.args[:2] == ("GET", "http://radarr:7878/api/v3/movie")
+
+    async def test_fields_stream_error_returns_empty_list(self, connector):
+        connector.client.stream = MagicMock(return_value=_make_stream('[{"id": 1}, {"id": '))
+        result = await connector.get_movies(fields={"id": None})
+        assert result == []
+
+
+class TestGetMovieRecords:
+    async def test_streams_into_slim_records(self, connector):
+        payload = [
+            {
+                "id": 1,
+                "title": "Inception",
+                "hasFile": True,
+                "movieFile": {"path": "/m/a.mkv", "quality": {"quality": {"name": "Bluray-1080p"}}},
+                "ratings": {"imdb": {"value": 8.8}},
+                "alternateTitles": [{"title": "Origine"}],
+            }
+        ]
+        connector.client.stream = MagicMock(return_value=_make_stream(json.dumps(payload), chunk_size=7))
+        [record] = await connector.get_movie_records()
+        assert (record.id, record.title, record.has_file) == (1, "Inception", True)
+        assert (record.file_path, record.file_quality, record.rating) == ("/m/a.mkv", "Bluray-1080p", "8.8")
+        assert not hasattr(record, "__dict__")
+
+    async def test_stream_error_returns_empty_list(self, connector):
+        connector.client.stream = MagicMock(return_value=_make_stream('[{"id": 1}, {"id": '))
+        assert await connector.get_movie_records() == []
+
 
 # ── get_calendar ──────────────────────────────────────────────────────────────
 
@@ -185,13 +246,32 @@ class TestGetHistory:
 # ── get_movie_history_map ─────────────────────────────────────────────────────
 
 
+def _paged_history(records, calls=None):
+    """client.get side effect serving ``records`` (newest first) as /api/v3/history pages."""
+
+    async def _get(url, headers=None, params=None):
+        if calls is not None:
+            calls.append(params)
+        page, size = params["page"], params["pageSize"]
+        chunk = records[(page - 1) * size : page * size]
+        return _make_response({"page": page, "pageSize": size, "totalRecords": len(records), "records": chunk})
+
+    return _get
+
+
+def _history_records(count, start_id=1):
+    """``count`` Downloaded records, newest (highest id) first, one movie each."""
+    ids = range(start_id + count - 1, start_id - 1, -1)
+    return [{"id": i, "movieId": i, "downloadId": f"{i:040x}", "date": f"2024-01-01T00:00:{i % 60:02d}Z"} for i in ids]
+
+
 class TestGetMovieHistoryMap:
     async def test_builds_movie_hash_map(self, connector):
         records = [
-            {"movieId": 1, "downloadId": "qBittorrent-" + "a" * 40},
-            {"movieId": 2, "downloadId": "b" * 40},
+            {"id": 2, "movieId": 1, "downloadId": "qBittorrent-" + "a" * 40},
+            {"id": 1, "movieId": 2, "downloadId": "b" * 40},
         ]
-        connector.get_history = AsyncMock(return_value=records)
+        connector.client.get = AsyncMock(side_effect=_paged_history(records))
         result = await connector.get_movie_history_map()
         assert 1 in result
         assert 2 in result
@@ -200,30 +280,87 @@ class TestGetMovieHistoryMap:
 
     async def test_skips_records_without_valid_hash(self, connector):
         records = [
-            {"movieId": 1, "downloadId": "invalid"},
-            {"movieId": 2, "downloadId": ""},
+            {"id": 2, "movieId": 1, "downloadId": "invalid"},
+            {"id": 1, "movieId": 2, "downloadId": ""},
         ]
-        connector.get_history = AsyncMock(return_value=records)
+        connector.client.get = AsyncMock(side_effect=_paged_history(records))
         result = await connector.get_movie_history_map()
         assert result == {}
 
     async def test_skips_records_without_movie_id(self, connector):
-        records = [{"downloadId": "a" * 40}]
-        connector.get_history = AsyncMock(return_value=records)
+        records = [{"id": 1, "downloadId": "a" * 40}]
+        connector.client.get = AsyncMock(side_effect=_paged_history(records))
         result = await connector.get_movie_history_map()
         assert result == {}
 
-    async def test_later_record_overwrites_earlier_for_same_movie(self, connector):
-        hash1 = "a" * 40
-        hash2 = "b" * 40
+    async def test_newest_download_wins_for_same_movie(self, connector, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "ARR_HISTORY_PAGE_SIZE", 1)
+        newest = "a" * 40
+        replaced = "b" * 40
         records = [
-            {"movieId": 1, "downloadId": hash1},
-            {"movieId": 1, "downloadId": hash2},
+            {"id": 2, "movieId": 1, "downloadId": newest},
+            {"id": 1, "movieId": 1, "downloadId": replaced},
         ]
-        connector.get_history = AsyncMock(return_value=records)
+        connector.client.get = AsyncMock(side_effect=_paged_history(records))
         result = await connector.get_movie_history_map()
-        # Last one wins
-        assert result[1] == hash2.upper()
+        # Historique lu du plus récent au plus ancien, sur deux pages : le premier vu gagne
+        assert result == {1: newest.upper()}
+
+    async def test_walks_every_page_of_history(self, connector, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "ARR_HISTORY_PAGE_SIZE", 100)
+        calls = []
+        connector.client.get = AsyncMock(side_effect=_paged_history(_history_records(450), calls))
+        cursor = HistoryCursor()
+        result = await connector.get_movie_history_map(cursor=cursor)
+        assert len(result) == 450
+        assert [c["page"] for c in calls] == [1, 2, 3, 4, 5]
+        assert all(c["eventType"] == 1 and c["sortDirection"] == "descending" for c in calls)
+        assert cursor.complete is True
+        assert cursor.last_id == 450
+        assert cursor.records == 450
+
+    async def test_stops_at_high_water_mark(self, connector, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "ARR_HISTORY_PAGE_SIZE", 100)
+        calls = []
+        connector.client.get = AsyncMock(side_effect=_paged_history(_history_records(450), calls))
+        cursor = HistoryCursor()
+        result = await connector.get_movie_history_map(after_id=320, cursor=cursor)
+        # 130 newer records span pages 1-2; page 3 is never requested
+        assert sorted(result) == list(range(321, 451))
+        assert [c["page"] for c in calls] == [1, 2]
+        assert cursor.complete is True
+        assert cursor.last_id == 450
+
+    async def test_nothing_new_leaves_cursor_empty(self, connector):
+        connector.client.get = AsyncMock(side_effect=_paged_history(_history_records(10)))
+        cursor = HistoryCursor()
+        result = await connector.get_movie_history_map(after_id=10, cursor=cursor)
+        assert result == {}
+        assert cursor.last_id is None
+        assert cursor.complete is True
+
+    async def test_error_mid_walk_marks_cursor_incomplete(self, connector, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "ARR_HISTORY_PAGE_SIZE", 100)
+        serve = _paged_history(_history_records(300))
+
+        async def _get(url, headers=None, params=None):
+            if params["page"] == 2:
+                raise httpx.ConnectError("refused")
+            return await serve(url, headers=headers, params=params)
+
+        connector.client.get = AsyncMock(side_effect=_get)
+        cursor = HistoryCursor()
+        result = await connector.get_movie_history_map(cursor=cursor)
+        assert len(result) == 100
+        assert cursor.complete is False
 
 
 # ── _extract_hash ─────────────────────────────────────────────────────────────
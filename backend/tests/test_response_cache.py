@@ -0,0 +1,174 @@
+"""
+Unit tests for the connector response cache.
+
+Covers:
+- ResponseCache: LRU eviction, TTL expiry, invalidation by service / endpoint prefix, snapshot counters
+- BaseConnector._get_cached: hit, miss, ETag revalidation (304), params in the key, disabled cache
+- Cached connector calls: quality profiles, Prowlarr indexers (invalidated on toggle), Jellyseerr details
+"""
+
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+import pytest  # noqa: E402
+
+from app.services.jellyseerr_connector import JellyseerrConnector  # noqa: E402
+from app.services.prowlarr_connector import ProwlarrConnector  # noqa: E402
+from app.services.radarr_connector import RadarrConnector  # noqa: E402
+from app.services.response_cache import ResponseCache, response_cache  # noqa: E402
+
+
+def _make_response(data, status_code=200, headers=None):
+    mock = MagicMock()
+    mock.status_code = status_code
+    mock.json.return_value = data
+    mock.headers = headers or {}
+    mock.raise_for_status = MagicMock()
+    return mock
+
+
+@pytest.fixture()
+def radarr():
+    return RadarrConnector(base_url="http://radarr", api_key="key", port=7878)
+
+
+# ── ResponseCache ─────────────────────────────────────────────────────────────
+
+
+class TestResponseCache:
+    def test_lru_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2)
+        a, b, c = (cache.make_key("http://svc", f"/{name}") for name in "abc")
+        cache.set(a, 1, ttl=60)
+        cache.set(b, 2, ttl=60)
+        cache.get(a)  # a becomes most recent
+        cache.set(c, 3, ttl=60)
+        assert cache.get(b) is None
+        assert cache.get(a).value == 1
+        assert cache.stats.evictions == 1
+
+    def test_expired_entry_is_not_fresh(self):
+        cache = ResponseCache()
+        key = cache.make_key("http://svc", "/x")
+        entry = cache.set(key, 1, ttl=0)
+        assert entry.is_fresh(entry.expires_at) is False
+
+    def test_key_ignores_param_order(self):
+        assert ResponseCache.make_key("u", "/e", {"a": 1, "b": 2}) == ResponseCache.make_key(
+            "u", "/e", {"b": 2, "a": 1}
+        )
+
+    def test_invalidate_by_service_and_prefix(self):
+        cache = ResponseCache()
+        cache.set(cache.make_key("http://p", "/api/v1/indexer"), [], ttl=60)
+        cache.set(cache.make_key("http://p", "/api/v1/system/status"), {}, ttl=60)
+        cache.set(cache.make_key("http://other", "/api/v1/indexer"), [], ttl=60)
+        assert cache.invalidate("http://p", "/api/v1/indexer") == 1
+        assert cache.snapshot()["entries"] == 2
+
+
+# ── BaseConnector._get_cached ─────────────────────────────────────────────────
+
+
+class TestGetCached:
+    async def test_second_call_is_a_hit(self, radarr):
+        radarr.client.get = AsyncMock(return_value=_make_response([{"id": 1}]))
+        assert await radarr._get_cached("/api/v3/qualityprofile") == [{"id": 1}]
+        assert await radarr._get_cached("/api/v3/qualityprofile") == [{"id": 1}]
+        assert radarr.client.get.await_count == 1
+        stats = response_cache.snapshot()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    async def test_returned_value_is_a_copy(self, radarr):
+        radarr.client.get = AsyncMock(return_value=_make_response({"name": "HD"}))
+        first = await radarr._get_cached("/x")
+        first["name"] = "mutated"
+        assert (await radarr._get_cached("/x"))["name"] == "HD"
+
+    async def test_params_are_part_of_the_key(self, radarr):
+        radarr.client.get = AsyncMock(return_value=_make_response([]))
+        await radarr._get_cached("/x", params={"page": 1})
+        await radarr._get_cached("/x", params={"page": 2})
+        assert radarr.client.get.await_count == 2
+
+    async def test_stale_entry_revalidated_with_etag(self, radarr):
+        radarr.client.get = AsyncMock(return_value=_make_response([{"id": 1}], headers={"ETag": '"v1"'}))
+        await radarr._get_cached("/x", ttl=0)
+
+        radarr.client.get = AsyncMock(return_value=_make_response(None, status_code=304))
+        assert await radarr._get_cached("/x", ttl=60) == [{"id": 1}]
+        assert radarr.client.get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+        assert response_cache.snapshot()["revalidated"] == 1
+
+        # Entry was extended by the 304: next call is a plain hit
+        assert await radarr._get_cached("/x") == [{"id": 1}]
+        assert radarr.client.get.await_count == 1
+
+    async def test_disabled_cache_always_fetches(self, radarr):
+        radarr.client.get = AsyncMock(return_value=_make_response([]))
+        with patch("app.services.base_connector.settings.RESPONSE_CACHE_ENABLED", False):
+            await radarr._get_cached("/x")
+            await radarr._get_cached("/x")
+        assert radarr.client.get.await_count == 2
+
+    async def test_stats_group_numeric_ids(self):
+        connector = JellyseerrConnector(base_url="http://seerr", api_key="key")
+        connector.client.get = AsyncMock(return_value=_make_response({"title": "A"}))
+        await connector.get_media_details(1, "movie")
+        await connector.get_media_details(2, "movie")
+        await connector.get_media_details(1, "movie")
+        assert response_cache.snapshot()["by_endpoint"]["/api/v1/movie/{id}"] == {
+            "hits": 1,
+            "misses": 2,
+            "revalidated": 0,
+        }
+
+
+# ── Cached connector calls ────────────────────────────────────────────────────
+
+
+class TestCachedConnectorCalls:
+    async def test_quality_profiles_fetched_once(self, radarr):
+        radarr.client.get = AsyncMock(return_value=_make_response([{"id": 1, "name": "HD-1080p"}]))
+        assert await radarr.get_quality_profiles() == {1: "HD-1080p"}
+        assert await radarr.get_quality_profiles() == {1: "HD-1080p"}
+        assert radarr.client.get.await_count == 1
+
+    async def test_toggle_indexer_invalidates_indexer_cache(self):
+        connector = ProwlarrConnector(base_url="http://prowlarr", api_key="key", port=9696)
+        indexer = {"id": 1, "name": "A", "enable": True}
+
+        async def fake_get(url, **kwargs):
+            return _make_response(dict(indexer) if url.endswith("/indexer/1") else [indexer])
+
+        connector.client.get = AsyncMock(side_effect=fake_get)
+        connector.client.put = AsyncMock(return_value=_make_response({}))
+        await connector.get_indexers()
+        assert await connector.toggle_indexer(1, False) is True
+        await connector.get_indexers()
+        indexer_list_calls = [c for c in connector.client.get.await_args_list if c.args[0].endswith("/api/v1/indexer")]
+        assert len(indexer_list_calls) == 2
+
+
+# ── /api/sync/response-cache ──────────────────────────────────────────────────
+
+
+class TestResponseCacheRoutes:
+    def test_stats_route(self, auth_client):
+        resp = auth_client.get("/api/sync/response-cache")
+        assert resp.status_code == 200
+        assert {"hits", "misses", "revalidated", "entries", "hit_ratio"} <= resp.json().keys()
+
+    def test_clear_route(self, auth_client):
+        response_cache.set(response_cache.make_key("http://svc", "/x"), 1, ttl=60)
+        resp = auth_client.delete("/api/sync/response-cache")
+        assert resp.json() == {"cleared": 1}
@@ -57,6 +57,17 @@ class TestUpdateService:
         assert resp.status_code == 200
         assert resp.json()["url"] == "http://new-url"
 
+    def test_update_invalidates_shared_http_clients(self, auth_client, make_service_config):
+        make_service_config(service_name=ServiceType.SONARR, url="http://old-url", port=8989)
+        with patch("app.api.routes.services.http_client_registry.invalidate", new=AsyncMock()) as invalidate:
+            resp = auth_client.put(
+                "/api/services/sonarr",
+                json={"url": "http://new-url", "api_key": "new-key", "is_active": True},
+            )
+        assert resp.status_code == 200
+        invalidated = [call.args[0] for call in invalidate.await_args_list]
+        assert invalidated == ["http://old-url:8989", "http://new-url:8989"]
+
     def test_upsert_creates_if_missing(self, auth_client):
         """PUT should create the record if it doesn't exist yet."""
         resp = auth_client.put(
@@ -4,6 +4,7 @@ Unit tests for pure business logic — no DB, no HTTP.
 Covers:
 - auth_service: password hashing, JWT encode/decode
 - SonarrConnector._extract_hash
+- SonarrConnector.get_series_torrents_map: folds history pages, season packs spanning pages
 - QBittorrentConnector._unix_to_iso
 """
 
@@ -120,6 +121,52 @@ class TestExtractHash:
         assert result == raw.upper()
 
 
+# ── SonarrConnector.get_series_torrents_map ──────────────────────────────────
+
+
+class TestSeriesTorrentsMap:
+    """History pages are served by a stubbed iter_history_pages (no HTTP)."""
+
+    @staticmethod
+    def _connector(pages):
+        connector = SonarrConnector(base_url="http://localhost", api_key="key")
+        received = {}
+
+        async def _pages(after_id=None, page_size=None):
+            received["after_id"] = after_id
+            for page in pages:
+                yield page
+
+        connector.iter_history_pages = _pages
+        return connector, received
+
+    async def test_season_pack_detected_across_pages(self):
+        pack = "a" * 40
+        pages = [
+            [{"id": 3, "seriesId": 1, "episodeId": 11, "seasonNumber": 1, "downloadId": pack}],
+            [
+                {"id": 2, "seriesId": 1, "episodeId": 12, "seasonNumber": 1, "downloadId": pack},
+                {"id": 1, "seriesId": 2, "episodeId": 21, "seasonNumber": 1, "downloadId": "b" * 40},
+            ],
+        ]
+        connector, _ = self._connector(pages)
+        result = await connector.get_series_torrents_map()
+        assert result[1] == [{"hash": pack.upper(), "episode_id": None, "season_number": 1, "is_season_pack": True}]
+        assert result[2][0]["is_season_pack"] is False
+        assert result[2][0]["episode_id"] == 21
+
+    async def test_forwards_watermark_and_fills_cursor(self):
+        from app.services.arr_history import HistoryCursor
+
+        pages = [[{"id": 42, "date": "2024-05-01T10:00:00Z", "seriesId": 1, "episodeId": 1, "downloadId": "c" * 40}]]
+        connector, received = self._connector(pages)
+        cursor = HistoryCursor()
+        await connector.get_series_torrents_map(after_id=41, cursor=cursor)
+        assert received["after_id"] == 41
+        assert cursor.complete is True
+        assert (cursor.last_id, cursor.last_date, cursor.records) == (42, "2024-05-01T10:00:00Z", 1)
+
+
 # ── QBittorrentConnector._unix_to_iso ────────────────────────────────────────
 
 
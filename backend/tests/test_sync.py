@@ -56,8 +56,10 @@ class TestTriggerSync:
         instance = MagicMock()
         calls = []
 
-        async def strict_sync_sonarr_episodes(full_sync: bool = True, batch_size: int = 20):
-            calls.append((full_sync, batch_size))
+        async def strict_sync_sonarr_episodes(
+            full_sync: bool = True, batch_size: int = 20, concurrency: int = 5, incremental: bool = False
+        ):
+            calls.append((full_sync, batch_size, concurrency, incremental))
             return {"success": True}
 
         instance.sync_sonarr_episodes = strict_sync_sonarr_episodes
@@ -70,7 +72,30 @@ class TestTriggerSync:
 
         assert resp.status_code == 200
         assert resp.json()["status"] == "started"
-        assert calls == [(True, 7)]
+        assert calls == [(True, 7, 5, False)]
+
+    def test_trigger_sonarr_episodes_forwards_concurrency(self, auth_client):
+        instance = MagicMock()
+        instance.sync_sonarr_episodes = AsyncMock(return_value={"success": True})
+
+        with (
+            patch("app.api.routes.sync.SessionLocal", return_value=MagicMock()),
+            patch("app.api.routes.sync.SyncService", return_value=instance),
+        ):
+            resp = auth_client.post("/api/sync/trigger/sonarr-episodes?concurrency=3&incremental=true")
+
+        assert resp.status_code == 200
+        instance.sync_sonarr_episodes.assert_awaited_once_with(
+            full_sync=False, batch_size=5, concurrency=3, incremental=True
+        )
+
+    def test_trigger_sonarr_episodes_rejects_zero_concurrency(self, auth_client):
+        resp = auth_client.post("/api/sync/trigger/sonarr-episodes?concurrency=0")
+        assert resp.status_code == 422
+
+    def test_trigger_sonarr_episodes_rejects_zero_batch_size(self, auth_client):
+        resp = auth_client.post("/api/sync/trigger/sonarr-episodes?batch_size=0")
+        assert resp.status_code == 422
 
     def test_trigger_sonarr_episodes_fails_fast_on_invalid_task_signature(self, auth_client):
         async def broken_sync_sonarr_episodes(self, full_sync: bool = True):
@@ -6,18 +6,26 @@ Covers:
 - _upsert_torrent: insert once, idempotent on duplicate
 - update_sync_metadata: create new entry, update existing
 - _format_time_ago: all time buckets (days, hours, minutes, just now)
-- sync_radarr: no service, new movie inserted, existing movie updated, calendar events
-- sync_sonarr: no service, new series inserted, existing updated, calendar events
+- sync_radarr: no service, new movie inserted, existing movie updated, calendar events, resolver cache warmed
+- sync_radarr bulk path: constant statement count, idempotent reruns, per-row diffs
+- Radarr/Sonarr history high-water mark: persisted after a full walk, forwarded next run, kept on failure
+- sync_sonarr: no service, new series inserted, existing updated, calendar events, persisted Sonarr id, resolver warmed
+- SonarrSeriesIndex: id-first lookup, case-insensitive (title, year), alternate titles
 - sync_sonarr_seasons: no service, seasons created and updated
-- sync_sonarr_episodes: no service, no series, episodes created and updated
+- sync_sonarr_episodes: no service, no series, episodes created and updated, slim episode_file_info, bounded concurrent fetching
+- sync_sonarr_episodes bulk path: constant statement count, no-op reruns, per-field diffs
+- sync_sonarr_episodes incremental: watermark recorded, unchanged series skipped, stats/history changes refetched
 - sync_monitored_items: aggregates Radarr+Sonarr stats into DashboardStatistic
 - sync_jellyfin: no service, creates user/movie/tv dashboard stats
 - sync_jellyseerr: no service, adds requests, updates existing, deletes stale
+- sync_jellyseerr media details: persisted cache reuse, expiry refetch, failures not cached, bounded fan-out
+- sync_all: sequential and concurrent fan-out, per-step sessions, concurrency cap
 """
 
+import asyncio
 import os
 from datetime import UTC, datetime, timedelta
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -31,21 +39,26 @@ os.environ.setdefault("API_KEY", "test-api-key")
 os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
 
 from app.models import (  # noqa: E402
+    ArrHistoryState,
     CalendarEvent,
     DashboardStatistic,
     Episode,
     JellyseerrRequest,
     LibraryItem,
     LibraryItemTorrent,
+    MediaDetailsCache,
     MediaType,
     Season,
     ServiceConfiguration,
     ServiceType,
+    SonarrSeriesSyncState,
     StatType,
     SyncMetadata,
     SyncStatus,
 )
-from app.schedulers.sync_service import SyncService  # noqa: E402
+from app.schedulers.sync_service import SonarrSeriesIndex, SyncService, _as_utc  # noqa: E402
+from app.services.arr_records import EpisodeFileRecord, EpisodeRecord, MovieRecord, SeriesRecord  # noqa: E402
+from app.services.library_resolver import library_item_resolver  # noqa: E402
 
 
 @pytest.fixture()
@@ -227,9 +240,13 @@ _RADARR_CALENDAR_EVENT = {
 }
 
 
+def _movie_records(movies):
+    return [MovieRecord.from_api(movie) for movie in movies]
+
+
 def _mock_radarr_connector(movies=None, calendar=None, quality_profiles=None, hash_map=None):
     m = AsyncMock()
-    m.get_movies = AsyncMock(return_value=movies if movies is not None else [_RADARR_MOVIE])
+    m.get_movie_records = AsyncMock(return_value=_movie_records(movies if movies is not None else [_RADARR_MOVIE]))
     m.get_quality_profiles = AsyncMock(return_value=quality_profiles or {1: "HD-1080p"})
     m.get_movie_history_map = AsyncMock(return_value=hash_map or {1: "a" * 40})
     m.get_calendar = AsyncMock(return_value=calendar if calendar is not None else [_RADARR_CALENDAR_EVENT])
@@ -256,6 +273,15 @@ class TestSyncRadarr:
         assert item.media_type == MediaType.MOVIE
         assert item.year == 2010
 
+    async def test_warms_library_item_resolver(self, sync, db):
+        _make_svc(db, ServiceType.RADARR)
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=_mock_radarr_connector()):
+            await sync.sync_radarr()
+        item = db.query(LibraryItem).filter_by(title="Inception").first()
+        assert library_item_resolver.is_warm(MediaType.MOVIE)
+        assert library_item_resolver.resolve(db, MediaType.MOVIE, None, "inception", 2010) is item
+        assert library_item_resolver.misses == 0
+
     async def test_resolves_quality_from_file(self, sync, db):
         _make_svc(db, ServiceType.RADARR)
         with patch("app.schedulers.sync_service.RadarrConnector", return_value=_mock_radarr_connector()):
@@ -317,7 +343,7 @@ class TestSyncRadarr:
     async def test_writes_sync_metadata_on_failure(self, sync, db):
         _make_svc(db, ServiceType.RADARR)
         mock = _mock_radarr_connector()
-        mock.get_movies = AsyncMock(side_effect=Exception("API down"))
+        mock.get_movie_records = AsyncMock(side_effect=Exception("API down"))
         with patch("app.schedulers.sync_service.RadarrConnector", return_value=mock):
             result = await sync.sync_radarr()
         assert result["success"] is False
@@ -340,6 +366,81 @@ class TestSyncRadarr:
         assert meta.sync_status == SyncStatus.FAILED
 
 
+class TestSyncRadarrBulk:
+    def _movie(self, movie_id, title, year=2020, has_file=True):
+        return {**_RADARR_MOVIE, "id": movie_id, "title": title, "year": year, "hasFile": has_file}
+
+    async def test_statement_count_independent_of_library_size(self, sync, db):
+        from sqlalchemy import event
+
+        _make_svc(db, ServiceType.RADARR)
+
+        def _prepare_run(n_movies):
+            movies = [self._movie(i, f"Movie {i}") for i in range(1, n_movies + 1)]
+            hashes = {i: f"{i:040X}" for i in range(1, n_movies + 1)}
+            mock = _mock_radarr_connector(movies=movies, calendar=[], hash_map=hashes)
+            statements = []
+
+            def _on_execute(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            return mock, statements, _on_execute
+
+        counts = []
+        for n in (3, 30):
+            db.query(LibraryItemTorrent).delete()
+            db.query(LibraryItem).delete()
+            db.commit()
+            mock, statements, listener = _prepare_run(n)
+            event.listen(db.get_bind(), "before_cursor_execute", listener)
+            try:
+                with patch("app.schedulers.sync_service.RadarrConnector", return_value=mock):
+                    result = await sync.sync_radarr()
+            finally:
+                event.remove(db.get_bind(), "before_cursor_execute", listener)
+            assert result["movies_added"] == n
+            counts.append(len(statements))
+
+        assert counts[0] == counts[1]
+        assert db.query(LibraryItemTorrent).count() == 30
+
+    async def test_second_run_does_not_duplicate_items_or_torrents(self, sync, db):
+        _make_svc(db, ServiceType.RADARR)
+        movies = [self._movie(1, "Alpha"), self._movie(2, "Beta")]
+        mock = _mock_radarr_connector(movies=movies, hash_map={1: "a" * 40, 2: "b" * 40})
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=mock):
+            await sync.sync_radarr()
+            result = await sync.sync_radarr()
+        assert result["movies_added"] == 0
+        assert db.query(LibraryItem).count() == 2
+        assert db.query(LibraryItemTorrent).count() == 2
+
+    async def test_updates_only_changed_fields_per_row(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.RADARR)
+        legacy = make_library_item(title="Alpha", year=2020, quality="4", size="0 GB", nb_media=0)
+        untouched = make_library_item(title="Beta", year=2020, quality="720p", size="4.0 GB", nb_media=1)
+        movies = [self._movie(1, "Alpha"), self._movie(2, "Beta")]
+        mock = _mock_radarr_connector(movies=movies, hash_map={1: "c" * 40})
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=mock):
+            await sync.sync_radarr()
+        db.refresh(legacy)
+        db.refresh(untouched)
+        assert legacy.quality == "Bluray-1080p"
+        assert legacy.nb_media == 1
+        assert legacy.torrent_hash == "c" * 40
+        assert legacy.size == "4.0 GB"
+        assert untouched.quality == "720p"
+        assert untouched.torrent_hash is None
+
+    async def test_title_match_is_case_insensitive(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.RADARR)
+        make_library_item(title="inception", year=2010, media_type=MediaType.MOVIE)
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=_mock_radarr_connector()):
+            result = await sync.sync_radarr()
+        assert result["movies_added"] == 0
+        assert db.query(LibraryItem).count() == 1
+
+
 # ── sync_sonarr ───────────────────────────────────────────────────────────────
 
 _SONARR_SERIES = {
@@ -374,21 +475,100 @@ _SONARR_CALENDAR_EVENT = {
 }
 
 
+def _series_records(series):
+    return [SeriesRecord.from_api(data) for data in series]
+
+
+def _episode_records(episodes):
+    return [EpisodeRecord.from_api(data) for data in episodes]
+
+
+def _episode_file_records(episode_files):
+    return [EpisodeFileRecord.from_api(data) for data in episode_files]
+
+
 def _mock_sonarr_connector(series=None, calendar=None, quality_profiles=None, torrents_map=None):
     m = AsyncMock()
-    m.get_series = AsyncMock(return_value=series if series is not None else [_SONARR_SERIES])
+    m.get_series_records = AsyncMock(return_value=_series_records(series if series is not None else [_SONARR_SERIES]))
     m.get_quality_profiles = AsyncMock(return_value=quality_profiles or {1: "HD-1080p"})
     m.get_series_torrents_map = AsyncMock(return_value=torrents_map if torrents_map is not None else {})
     m.get_calendar = AsyncMock(return_value=calendar if calendar is not None else [_SONARR_CALENDAR_EVENT])
     m.get_statistics = AsyncMock(
         return_value={"monitored_series": 3, "total_series": 5, "downloaded_episodes": 100, "missing_episodes": 10}
     )
-    m.get_episodes_by_series = AsyncMock(return_value=[])
-    m.get_episode_files_by_series = AsyncMock(return_value=[])
+    m.get_episode_records = AsyncMock(return_value=[])
+    m.get_episode_file_records = AsyncMock(return_value=[])
+    m.get_history_since = AsyncMock(return_value=[])
     m.close = AsyncMock()
     return m
 
 
+def _harvest(hash_map, last_id, complete=True):
+    """get_*_map side effect filling the HistoryCursor like a real history walk."""
+
+    async def _map(after_id=None, cursor=None):
+        if cursor is not None:
+            cursor.last_id, cursor.last_date, cursor.records = last_id, "2024-03-01T12:00:00Z", len(hash_map)
+            cursor.complete = complete
+        return hash_map
+
+    return _map
+
+
+class TestArrHistoryWatermark:
+    async def test_radarr_records_watermark_and_resumes_from_it(self, sync, db):
+        _make_svc(db, ServiceType.RADARR)
+        first = _mock_radarr_connector()
+        first.get_movie_history_map = AsyncMock(side_effect=_harvest({1: "a" * 40}, last_id=900))
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=first):
+            await sync.sync_radarr()
+        assert first.get_movie_history_map.await_args.kwargs["after_id"] is None
+        state = db.query(ArrHistoryState).filter_by(service_name="radarr").one()
+        assert state.last_history_id == 900
+        assert state.records_harvested == 1
+
+        second = _mock_radarr_connector()
+        second.get_movie_history_map = AsyncMock(side_effect=_harvest({}, last_id=None))
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=second):
+            await sync.sync_radarr()
+        assert second.get_movie_history_map.await_args.kwargs["after_id"] == 900
+        db.refresh(state)
+        assert state.last_history_id == 900
+
+    async def test_incomplete_walk_keeps_previous_watermark(self, sync, db):
+        _make_svc(db, ServiceType.RADARR)
+        db.add(ArrHistoryState(service_name="radarr", last_history_id=100, records_harvested=10))
+        db.commit()
+        mock = _mock_radarr_connector()
+        mock.get_movie_history_map = AsyncMock(side_effect=_harvest({1: "a" * 40}, last_id=250, complete=False))
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=mock):
+            result = await sync.sync_radarr()
+        assert result["success"] is True
+        assert db.query(ArrHistoryState).filter_by(service_name="radarr").one().last_history_id == 100
+        # Hashes harvested before the interruption are still written
+        assert db.query(LibraryItem).one().torrent_hash == "a" * 40
+
+    async def test_failed_sync_does_not_advance_watermark(self, sync, db):
+        _make_svc(db, ServiceType.RADARR)
+        mock = _mock_radarr_connector()
+        mock.get_movie_history_map = AsyncMock(side_effect=_harvest({1: "a" * 40}, last_id=900))
+        mock.get_calendar = AsyncMock(side_effect=RuntimeError("boom"))
+        with patch("app.schedulers.sync_service.RadarrConnector", return_value=mock):
+            result = await sync.sync_radarr()
+        assert result["success"] is False
+        assert db.query(ArrHistoryState).count() == 0
+
+    async def test_sonarr_records_watermark(self, sync, db):
+        _make_svc(db, ServiceType.SONARR)
+        mock = _mock_sonarr_connector()
+        mock.get_series_torrents_map = AsyncMock(side_effect=_harvest({}, last_id=77))
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
+            await sync.sync_sonarr()
+        state = db.query(ArrHistoryState).filter_by(service_name="sonarr").one()
+        assert state.last_history_id == 77
+        assert state.last_history_date is not None
+
+
 class TestSyncSonarr:
     async def test_no_service_returns_failure(self, sync):
         result = await sync.sync_sonarr()
@@ -407,6 +587,14 @@ class TestSyncSonarr:
         assert item.media_type == MediaType.TV
         assert item.year == 2008
 
+    async def test_warms_library_item_resolver(self, sync, db):
+        _make_svc(db, ServiceType.SONARR)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector()):
+            await sync.sync_sonarr()
+        assert library_item_resolver.is_warm(MediaType.TV)
+        assert library_item_resolver.resolve(db, MediaType.TV, None, "Breaking Bad", use_year=False) is not None
+        assert library_item_resolver.misses == 0
+
     async def test_does_not_duplicate_existing_series(self, sync, db, make_library_item):
         _make_svc(db, ServiceType.SONARR)
         make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
@@ -443,6 +631,84 @@ class TestSyncSonarr:
         meta = db.query(SyncMetadata).filter_by(service_name=ServiceType.SONARR).first()
         assert meta.sync_status == SyncStatus.SUCCESS
 
+    async def test_persists_sonarr_series_id(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        item = make_library_item(title="breaking bad", year=2008, media_type=MediaType.TV)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector()):
+            result = await sync.sync_sonarr()
+        assert result["series_added"] == 0
+        db.refresh(item)
+        assert item.sonarr_series_id == 10
+
+    async def test_matches_renamed_series_by_persisted_id(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        item = make_library_item(title="Old Title", year=2008, media_type=MediaType.TV)
+        item.sonarr_series_id = 10
+        db.commit()
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector()):
+            result = await sync.sync_sonarr()
+        assert result["series_added"] == 0
+        assert db.query(LibraryItem).filter_by(media_type=MediaType.TV).count() == 1
+
+    async def test_readded_series_updates_existing_item(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        item = make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        item.sonarr_series_id = 10
+        db.commit()
+        readded = {**_SONARR_SERIES, "id": 99}
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector([readded])):
+            result = await sync.sync_sonarr()
+        assert result["series_added"] == 0
+        rows = db.query(LibraryItem.title, LibraryItem.sonarr_series_id).filter_by(media_type=MediaType.TV).all()
+        assert [tuple(row) for row in rows] == [("Breaking Bad", 99)]
+
+    async def test_homonym_linked_to_live_series_is_not_rebound(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        item = make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        item.sonarr_series_id = 10
+        db.commit()
+        homonym = {**_SONARR_SERIES, "id": 99}
+        with patch(
+            "app.schedulers.sync_service.SonarrConnector",
+            return_value=_mock_sonarr_connector([_SONARR_SERIES, homonym]),
+        ):
+            result = await sync.sync_sonarr()
+        assert result["series_added"] == 1
+        db.refresh(item)
+        assert item.sonarr_series_id == 10
+
+
+class TestSonarrSeriesIndex:
+    _SERIES = [
+        {"id": 1, "title": "The Office", "year": 2005, "alternateTitles": [{"title": "The Office (US)"}]},
+        {"id": 2, "title": "The Office", "year": 2001},
+    ]
+
+    def test_matches_by_persisted_id_first(self):
+        item = LibraryItem(title="Anything", year=1999, sonarr_series_id=2)
+        assert SonarrSeriesIndex(_series_records(self._SERIES)).match(item).id == 2
+
+    def test_falls_back_to_title_and_year_case_insensitively(self):
+        item = LibraryItem(title="  the office ", year=2001)
+        assert SonarrSeriesIndex(_series_records(self._SERIES)).match(item).id == 2
+
+    def test_matches_alternate_title(self):
+        item = LibraryItem(title="The Office (US)", year=2005)
+        assert SonarrSeriesIndex(_series_records(self._SERIES)).match(item).id == 1
+
+    def test_does_not_rebind_item_linked_to_another_live_series(self):
+        item = LibraryItem(title="The Office", year=2005, sonarr_series_id=2)
+        assert SonarrSeriesIndex(_series_records(self._SERIES)).match(item).id == 2
+
+    def test_stale_persisted_id_falls_back_to_title_and_year(self):
+        # Série supprimée puis rajoutée dans Sonarr : l'id 99 n'existe plus
+        item = LibraryItem(title="The Office", year=2005, sonarr_series_id=99)
+        assert SonarrSeriesIndex(_series_records(self._SERIES)).match(item).id == 1
+
+    def test_unknown_series_returns_none(self):
+        item = LibraryItem(title="Missing", year=2020)
+        assert SonarrSeriesIndex(_series_records(self._SERIES)).match(item) is None
+
 
 # ── sync_sonarr_seasons ───────────────────────────────────────────────────────
 
@@ -463,6 +729,12 @@ class TestSyncSonarrSeasons:
         season = db.query(Season).first()
         assert season is not None
         assert season.season_number == 1
+        assert season.statistics == {
+            "episodeCount": 7,
+            "episodeFileCount": 7,
+            "totalEpisodeCount": 7,
+            "sizeOnDisk": 0,
+        }
 
     async def test_updates_existing_season(self, sync, db, make_library_item):
         _make_svc(db, ServiceType.SONARR)
@@ -534,18 +806,40 @@ class TestSyncSonarrEpisodes:
         _make_svc(db, ServiceType.SONARR)
         make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
         mock = _mock_sonarr_connector()
-        mock.get_episodes_by_series = AsyncMock(return_value=[_SONARR_EPISODE])
-        mock.get_episode_files_by_series = AsyncMock(return_value=[_SONARR_EPISODE_FILE])
+        mock.get_episode_records = AsyncMock(return_value=_episode_records([_SONARR_EPISODE]))
+        mock.get_episode_file_records = AsyncMock(return_value=_episode_file_records([_SONARR_EPISODE_FILE]))
         with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
             result = await sync.sync_sonarr_episodes()
         assert result["success"] is True
         assert result["episodes_synced"] == 1
+        assert db.query(LibraryItem).filter_by(title="Breaking Bad").first().sonarr_series_id == 10
         ep = db.query(Episode).filter_by(sonarr_episode_id=101).first()
         assert ep is not None
         assert ep.title == "Pilot"
         assert ep.has_file is True
         assert ep.quality_profile == "Bluray-1080p"
 
+    async def test_stores_only_slim_episode_file_info(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        episode_file = {
+            **_SONARR_EPISODE_FILE,
+            "mediaInfo": {"audioCodec": "DTS", "videoCodec": "x264"},
+            "languages": [{"id": 1, "name": "English"}],
+        }
+        mock = _mock_sonarr_connector()
+        mock.get_episode_records = AsyncMock(return_value=_episode_records([_SONARR_EPISODE]))
+        mock.get_episode_file_records = AsyncMock(return_value=_episode_file_records([episode_file]))
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
+            await sync.sync_sonarr_episodes()
+        ep = db.query(Episode).filter_by(sonarr_episode_id=101).one()
+        assert ep.episode_file_info == {
+            "id": 5,
+            "size": 1_073_741_824,
+            "relativePath": "Season 01/bb.s01e01.mkv",
+            "quality": {"quality": {"name": "Bluray-1080p"}},
+        }
+
     async def test_updates_existing_episode(self, sync, db, make_library_item):
         _make_svc(db, ServiceType.SONARR)
         item = make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
@@ -567,8 +861,8 @@ class TestSyncSonarrEpisodes:
         db.add(existing_ep)
         db.commit()
         mock = _mock_sonarr_connector()
-        mock.get_episodes_by_series = AsyncMock(return_value=[_SONARR_EPISODE])
-        mock.get_episode_files_by_series = AsyncMock(return_value=[_SONARR_EPISODE_FILE])
+        mock.get_episode_records = AsyncMock(return_value=_episode_records([_SONARR_EPISODE]))
+        mock.get_episode_file_records = AsyncMock(return_value=_episode_file_records([_SONARR_EPISODE_FILE]))
         with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
             result = await sync.sync_sonarr_episodes()
         assert result["episodes_updated"] == 1
@@ -581,12 +875,314 @@ class TestSyncSonarrEpisodes:
         make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
         bad_episode = {**_SONARR_EPISODE, "seasonNumber": None}
         mock = _mock_sonarr_connector()
-        mock.get_episodes_by_series = AsyncMock(return_value=[bad_episode])
-        mock.get_episode_files_by_series = AsyncMock(return_value=[])
+        mock.get_episode_records = AsyncMock(return_value=_episode_records([bad_episode]))
+        mock.get_episode_file_records = AsyncMock(return_value=[])
         with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
             result = await sync.sync_sonarr_episodes()
         assert result["episodes_synced"] == 0
 
+    def _multi_series_mock(self, db, make_library_item, count, tracker, delay=0.01):
+        _make_svc(db, ServiceType.SONARR)
+        series = []
+        for i in range(count):
+            make_library_item(title=f"Show {i}", year=2000 + i, media_type=MediaType.TV)
+            series.append({"id": 100 + i, "title": f"Show {i}", "year": 2000 + i})
+
+        async def fetch_episodes(series_id):
+            tracker["current"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["current"])
+            await asyncio.sleep(delay)
+            tracker["current"] -= 1
+            return _episode_records([{**_SONARR_EPISODE, "id": series_id * 10, "episodeFileId": None}])
+
+        mock = _mock_sonarr_connector()
+        mock.get_series_records = AsyncMock(return_value=_series_records(series))
+        mock.get_episode_records = AsyncMock(side_effect=fetch_episodes)
+        mock.get_episode_file_records = AsyncMock(return_value=[])
+        return mock
+
+    async def test_series_fetched_concurrently(self, sync, db, make_library_item):
+        tracker = {"current": 0, "peak": 0}
+        mock = self._multi_series_mock(db, make_library_item, 6, tracker)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
+            result = await sync.sync_sonarr_episodes(batch_size=6, concurrency=3)
+        assert result["series_processed"] == 6
+        assert result["episodes_synced"] == 6
+        assert tracker["peak"] == 3
+        assert db.query(Episode).count() == 6
+
+    async def test_concurrency_one_is_sequential(self, sync, db, make_library_item):
+        tracker = {"current": 0, "peak": 0}
+        mock = self._multi_series_mock(db, make_library_item, 4, tracker)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
+            result = await sync.sync_sonarr_episodes(batch_size=2, concurrency=1)
+        assert result["series_processed"] == 4
+        assert tracker["peak"] == 1
+
+    async def test_concurrency_not_capped_by_batch_size(self, sync, db, make_library_item):
+        tracker = {"current": 0, "peak": 0}
+        mock = self._multi_series_mock(db, make_library_item, 8, tracker)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
+            result = await sync.sync_sonarr_episodes(batch_size=2, concurrency=4)
+        assert result["series_processed"] == 8
+        assert result["episodes_synced"] == 8
+        # Les fetches continuent pendant l'écriture des lots de 2 : fenêtre pleine
+        assert tracker["peak"] == 4
+        assert db.query(Episode).count() == 8
+
+    async def test_fetch_error_fails_sync_without_leaking_tasks(self, sync, db, make_library_item):
+        tracker = {"current": 0, "peak": 0}
+        mock = self._multi_series_mock(db, make_library_item, 3, tracker)
+        mock.get_episode_file_records = AsyncMock(side_effect=RuntimeError("boom"))
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=mock):
+            result = await sync.sync_sonarr_episodes(concurrency=2)
+        await asyncio.sleep(0.05)
+        assert result["success"] is False
+        assert "boom" in result["error"]
+        mock.close.assert_awaited_once()
+
+
+class TestSyncSonarrEpisodesBulk:
+    def _episodes(self, count, seasons=2):
+        return [
+            {**_SONARR_EPISODE, "id": 1000 + i, "seasonNumber": i % seasons + 1, "episodeNumber": i, "episodeFileId": 5}
+            for i in range(1, count + 1)
+        ]
+
+    def _mock(self, episodes):
+        mock = _mock_sonarr_connector()
+        mock.get_episode_records = AsyncMock(return_value=_episode_records(episodes))
+        mock.get_episode_file_records = AsyncMock(return_value=_episode_file_records([_SONARR_EPISODE_FILE]))
+        return mock
+
+    async def test_statement_count_independent_of_episode_count(self, sync, db, make_library_item):
+        from sqlalchemy import event
+
+        _make_svc(db, ServiceType.SONARR)
+        item = make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        item.sonarr_series_id = 10  # already linked: no one-off UPDATE on the first run
+        db.commit()
+
+        counts = []
+        for n in (3, 30):
+            db.query(Episode).delete()
+            db.query(Season).delete()
+            db.commit()
+            statements = []
+
+            def _on_execute(conn, cursor, statement, parameters, context, executemany, statements=statements):
+                statements.append(statement)
+
+            event.listen(db.get_bind(), "before_cursor_execute", _on_execute)
+            try:
+                with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(self._episodes(n))):
+                    result = await sync.sync_sonarr_episodes()
+            finally:
+                event.remove(db.get_bind(), "before_cursor_execute", _on_execute)
+            assert result["episodes_synced"] == n
+            counts.append(len(statements))
+
+        assert counts[0] == counts[1]
+        assert db.query(Season).count() == 2
+
+    async def test_unchanged_rerun_writes_nothing(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        episodes = self._episodes(4)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(episodes)):
+            await sync.sync_sonarr_episodes()
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(episodes)):
+            result = await sync.sync_sonarr_episodes()
+        assert result["episodes_synced"] == 0
+        assert result["episodes_updated"] == 0
+        assert db.query(Episode).count() == 4
+
+    async def test_episode_linked_to_another_item_is_updated_not_inserted(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        other = make_library_item(title="Breaking Bad (old)", year=1999, media_type=MediaType.TV)
+        season = Season(library_item_id=other.id, sonarr_series_id=55, season_number=2)
+        db.add(season)
+        db.flush()
+        db.add(
+            Episode(
+                season_id=season.id,
+                library_item_id=other.id,
+                sonarr_episode_id=1001,
+                sonarr_series_id=55,
+                season_number=2,
+                episode_number=1,
+                title="Old Title",
+            )
+        )
+        db.commit()
+
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(self._episodes(3))):
+            result = await sync.sync_sonarr_episodes()
+
+        assert result["success"] is True
+        assert (result["episodes_synced"], result["episodes_updated"]) == (2, 1)
+        assert db.query(Episode).filter_by(sonarr_episode_id=1001).one().title == "Pilot"
+        assert db.query(Episode).count() == 3
+
+    async def test_existing_episodes_looked_up_in_chunks(self, sync, db, make_library_item, monkeypatch):
+        monkeypatch.setattr(SyncService, "EPISODE_LOOKUP_CHUNK_SIZE", 2)
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        episodes = self._episodes(5)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(episodes)):
+            await sync.sync_sonarr_episodes()
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(episodes)):
+            result = await sync.sync_sonarr_episodes()
+        assert (result["episodes_synced"], result["episodes_updated"]) == (0, 0)
+        assert db.query(Episode).count() == 5
+
+    async def test_only_changed_fields_are_updated(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        episodes = self._episodes(3)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(episodes)):
+            await sync.sync_sonarr_episodes()
+        db.query(Episode).filter_by(sonarr_episode_id=1001).update({"watched": True})
+        db.commit()
+        episodes[0] = {**episodes[0], "title": "Renamed"}
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=self._mock(episodes)):
+            result = await sync.sync_sonarr_episodes()
+        assert result["episodes_updated"] == 1
+        ep = db.query(Episode).filter_by(sonarr_episode_id=1001).one()
+        db.refresh(ep)
+        assert ep.title == "Renamed"
+        assert ep.watched is True
+        assert ep.quality_profile == "Bluray-1080p"
+
+
+class TestSyncSonarrEpisodesIncremental:
+    async def _run_twice(self, sync, second_mock):
+        first_mock = _mock_sonarr_connector()
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=first_mock):
+            await sync.sync_sonarr_episodes(incremental=True)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=second_mock):
+            return await sync.sync_sonarr_episodes(incremental=True)
+
+    async def test_first_run_records_watermark(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        item = make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector()):
+            result = await sync.sync_sonarr_episodes(incremental=True)
+        assert result["series_processed"] == 1
+        state = db.query(SonarrSeriesSyncState).filter_by(sonarr_series_id=10).one()
+        assert state.library_item_id == item.id
+        assert state.fingerprint
+
+    async def test_unchanged_series_is_skipped(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        second = _mock_sonarr_connector()
+        result = await self._run_twice(sync, second)
+        assert result["series_processed"] == 0
+        assert result["series_skipped"] == 1
+        second.get_episode_records.assert_not_awaited()
+
+    async def test_changed_statistics_trigger_refetch(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        grown = {**_SONARR_SERIES, "statistics": {**_SONARR_SERIES["statistics"], "sizeOnDisk": 123}}
+        second = _mock_sonarr_connector(series=[grown])
+        result = await self._run_twice(sync, second)
+        assert result["series_processed"] == 1
+        second.get_episode_records.assert_awaited_once_with(10)
+
+    async def test_history_event_after_watermark_triggers_refetch(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        second = _mock_sonarr_connector()
+        future = (datetime.now(UTC) + timedelta(minutes=5)).isoformat()
+        second.get_history_since = AsyncMock(return_value=[{"seriesId": 10, "date": future}])
+        result = await self._run_twice(sync, second)
+        assert result["series_processed"] == 1
+        second.get_history_since.assert_awaited_once()
+
+    async def test_skipped_series_watermark_advances(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector()):
+            await sync.sync_sonarr_episodes(incremental=True)
+        state = db.query(SonarrSeriesSyncState).filter_by(sonarr_series_id=10).one()
+        first_watermark = _as_utc(state.last_synced_at)
+        fingerprint = state.fingerprint
+
+        second = _mock_sonarr_connector()
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=second):
+            result = await sync.sync_sonarr_episodes(incremental=True)
+
+        assert result["series_skipped"] == 1
+        db.refresh(state)
+        assert _as_utc(state.last_synced_at) > first_watermark
+        assert state.fingerprint == fingerprint
+        # L'historique part du watermark du premier run, le suivant partira du second
+        assert second.get_history_since.await_args.args[0] == first_watermark
+
+    async def test_history_failure_refetches_all_series(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        second = _mock_sonarr_connector()
+        second.get_history_since = AsyncMock(return_value=None)
+        result = await self._run_twice(sync, second)
+        assert result["series_processed"] == 1
+        assert result["series_skipped"] == 0
+        second.get_episode_records.assert_awaited_once_with(10)
+
+    async def test_failed_fetch_is_not_recorded_and_retried(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        first = _mock_sonarr_connector()
+        first.get_episode_records = AsyncMock(return_value=None)  # timeout / 5xx côté connecteur
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=first):
+            result = await sync.sync_sonarr_episodes(incremental=True)
+        assert result["series_failed"] == 1
+        assert result["series_processed"] == 0
+        assert db.query(SonarrSeriesSyncState).count() == 0
+
+        second = _mock_sonarr_connector()
+        second.get_episode_records = AsyncMock(return_value=_episode_records([_SONARR_EPISODE]))
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=second):
+            result = await sync.sync_sonarr_episodes(incremental=True)
+        assert result["series_skipped"] == 0
+        assert result["series_processed"] == 1
+        second.get_episode_records.assert_awaited_once_with(10)
+        assert db.query(Episode).count() == 1
+
+    async def test_readded_series_is_fetched_under_its_new_id(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        item = make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector()):
+            await sync.sync_sonarr_episodes(incremental=True)
+        old_watermark = db.query(SonarrSeriesSyncState).filter_by(sonarr_series_id=10).one().last_synced_at
+
+        second = _mock_sonarr_connector(series=[{**_SONARR_SERIES, "id": 99}])
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=second):
+            result = await sync.sync_sonarr_episodes(incremental=True)
+
+        assert result["series_processed"] == 1
+        second.get_episode_records.assert_awaited_once_with(99)
+        db.refresh(item)
+        assert item.sonarr_series_id == 99
+        # Le watermark de l'ancien id n'est plus pris en compte pour /history/since
+        state = db.query(SonarrSeriesSyncState).filter_by(sonarr_series_id=99).one()
+        assert _as_utc(state.last_synced_at) > _as_utc(old_watermark)
+        second.get_history_since.assert_not_awaited()
+
+    async def test_full_mode_ignores_watermark(self, sync, db, make_library_item):
+        _make_svc(db, ServiceType.SONARR)
+        make_library_item(title="Breaking Bad", year=2008, media_type=MediaType.TV)
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=_mock_sonarr_connector()):
+            await sync.sync_sonarr_episodes()
+        second = _mock_sonarr_connector()
+        with patch("app.schedulers.sync_service.SonarrConnector", return_value=second):
+            result = await sync.sync_sonarr_episodes()
+        assert result["series_processed"] == 1
+        second.get_history_since.assert_not_awaited()
+
 
 # ── sync_monitored_items ──────────────────────────────────────────────────────
 
@@ -839,3 +1435,176 @@ class TestSyncJellyseerr:
         assert result["success"] is False
         meta = db.query(SyncMetadata).filter_by(service_name=ServiceType.JELLYSEERR).first()
         assert meta.sync_status == SyncStatus.FAILED
+
+
+def _js_request(jellyseerr_id, tmdb_id, media_type="movie"):
+    return {**_JS_REQUEST, "id": jellyseerr_id, "type": media_type, "media": {"tmdbId": tmdb_id}}
+
+
+class TestSyncJellyseerrMediaDetailsCache:
+    async def test_second_run_served_from_persisted_cache(self, sync, db):
+        _make_svc(db, ServiceType.JELLYSEERR)
+        first = _mock_jellyseerr_connector()
+        with patch("app.schedulers.sync_service.JellyseerrConnector", return_value=first):
+            await sync.sync_jellyseerr()
+        assert first.get_media_details.await_count == 1
+        cached = db.query(MediaDetailsCache).one()
+        assert cached.details == _JS_MEDIA_DETAILS
+
+        second = _mock_jellyseerr_connector()
+        with patch("app.schedulers.sync_service.JellyseerrConnector", return_value=second):
+            result = await sync.sync_jellyseerr()
+        assert result["success"] is True
+        second.get_media_details.assert_not_awaited()
+        assert db.query(JellyseerrRequest).filter_by(jellyseerr_id=1).one().title == "Inception"
+
+    async def test_expired_entry_is_refetched(self, sync, db):
+        _make_svc(db, ServiceType.JELLYSEERR)
+        tmdb_id = _JS_REQUEST["media"]["tmdbId"]
+        past = datetime.now(UTC) - timedelta(days=30)
+        db.add(
+            MediaDetailsCache(
+                tmdb_id=tmdb_id,
+                media_type="movie",
+                details={"title": "Old"},
+                fetched_at=past,
+                expires_at=past + timedelta(days=7),
+            )
+        )
+        db.commit()
+        mock = _mock_jellyseerr_connector()
+        with patch("app.schedulers.sync_service.JellyseerrConnector", return_value=mock):
+            await sync.sync_jellyseerr()
+        mock.get_media_details.assert_awaited_once_with(tmdb_id, "movie")
+        row = db.query(MediaDetailsCache).one()
+        assert row.details["title"] == "Inception"
+        assert row.expires_at.replace(tzinfo=UTC) > datetime.now(UTC)
+
+    async def test_failed_fetch_is_not_cached(self, sync, db):
+        _make_svc(db, ServiceType.JELLYSEERR)
+        mock = _mock_jellyseerr_connector()
+        mock.get_media_details = AsyncMock(return_value={})
+        with patch("app.schedulers.sync_service.JellyseerrConnector", return_value=mock):
+            result = await sync.sync_jellyseerr()
+        assert result["requests_added"] == 1
+        assert db.query(MediaDetailsCache).count() == 0
+
+    async def test_duplicate_media_fetched_once(self, sync, db):
+        _make_svc(db, ServiceType.JELLYSEERR)
+        requests = [_js_request(1, 100), _js_request(2, 100), _js_request(3, 100, "tv")]
+        mock = _mock_jellyseerr_connector(requests=requests)
+        with patch("app.schedulers.sync_service.JellyseerrConnector", return_value=mock):
+            await sync.sync_jellyseerr()
+        assert mock.get_media_details.await_count == 2
+        assert db.query(MediaDetailsCache).count() == 2
+
+    async def test_concurrent_fetches_are_bounded(self, sync, db, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "JELLYSEERR_DETAILS_CONCURRENCY", 3)
+        _make_svc(db, ServiceType.JELLYSEERR)
+        state = {"running": 0, "max_running": 0}
+
+        async def _details(tmdb_id, media_type):
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+            await asyncio.sleep(0.01)
+            state["running"] -= 1
+            return {"title": f"Movie {tmdb_id}", "releaseDate": "2020-01-01"}
+
+        mock = _mock_jellyseerr_connector(requests=[_js_request(i, 1000 + i) for i in range(1, 11)])
+        mock.get_media_details = AsyncMock(side_effect=_details)
+        with patch("app.schedulers.sync_service.JellyseerrConnector", return_value=mock):
+            result = await sync.sync_jellyseerr()
+        assert result["requests_added"] == 10
+        assert mock.get_media_details.await_count == 10
+        assert state["max_running"] == 3
+        assert db.query(JellyseerrRequest).filter_by(jellyseerr_id=4).one().title == "Movie 1004"
+
+
+# ── sync_all ──────────────────────────────────────────────────────────────────
+
+
+def _patch_sync_steps(recorder, delay=0.01):
+    """Patch every sync_all step with a coroutine recording its session and overlap."""
+    state = {"running": 0, "max_running": 0}
+
+    def _make_step(key):
+        async def _step(self):
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+            recorder.append((key, self.db))
+            await asyncio.sleep(delay)
+            state["running"] -= 1
+            return {"success": True, "step": key}
+
+        return _step
+
+    patches = [patch.object(SyncService, method, _make_step(key)) for key, method in SyncService.SYNC_ALL_STEPS]
+    return patches, state
+
+
+class TestSyncAll:
+    async def test_sequential_merges_results_on_shared_session(self, db):
+        recorder = []
+        patches, state = _patch_sync_steps(recorder)
+        for p in patches:
+            p.start()
+        try:
+            results = await SyncService(db=db).sync_all(concurrent=False)
+        finally:
+            for p in patches:
+                p.stop()
+        assert set(results) == {"radarr", "sonarr", "jellyfin", "jellyseerr", "monitored_items"}
+        assert all(r["success"] for r in results.values())
+        assert state["max_running"] == 1
+        assert all(session is db for _, session in recorder)
+
+    async def test_concurrent_runs_steps_in_parallel_with_own_sessions(self, db):
+        recorder = []
+        factory = MagicMock(side_effect=lambda: MagicMock())
+        patches, state = _patch_sync_steps(recorder)
+        for p in patches:
+            p.start()
+        try:
+            results = await SyncService(db=db, session_factory=factory).sync_all(concurrent=True, max_concurrency=5)
+        finally:
+            for p in patches:
+                p.stop()
+        assert results["jellyfin"] == {"success": True, "step": "jellyfin"}
+        assert state["max_running"] == 5
+        sessions = [session for _, session in recorder]
+        assert len({id(s) for s in sessions}) == 5
+        assert all(s is not db for s in sessions)
+        assert all(s.close.called for s in sessions)
+
+    async def test_concurrency_cap_is_respected(self, db):
+        recorder = []
+        patches, state = _patch_sync_steps(recorder)
+        for p in patches:
+            p.start()
+        try:
+            await SyncService(db=db, session_factory=MagicMock).sync_all(concurrent=True, max_concurrency=2)
+        finally:
+            for p in patches:
+                p.stop()
+        assert state["max_running"] == 2
+        assert len(recorder) == 5
+
+    async def test_concurrent_step_exception_is_isolated(self, db):
+        recorder = []
+        patches, _ = _patch_sync_steps(recorder)
+
+        async def _boom(self):
+            raise RuntimeError("jellyfin down")
+
+        patches.append(patch.object(SyncService, "sync_jellyfin", _boom))
+        for p in patches:
+            p.start()
+        try:
+            results = await SyncService(db=db, session_factory=MagicMock).sync_all(concurrent=True)
+        finally:
+            for p in reversed(patches):
+                p.stop()
+        assert results["jellyfin"] == {"success": False, "error": "jellyfin down"}
+        assert results["radarr"]["success"] is True
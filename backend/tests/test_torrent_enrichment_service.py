@@ -0,0 +1,178 @@
+"""
+Unit tests for TorrentEnrichmentService.
+
+Covers:
+- _aggregate_infos: mean ratio, summed size, status/progress rules, single-name vs "N torrents"
+- enrich_all_items: Phase A refreshes every row, Phase B writes aggregated LibraryItem.torrent_info
+- Phase B: constant statement count regardless of the number of items (one grouped load, one bulk update)
+- change detection: unchanged rows/items are skipped (no UPDATE, updated_at kept), written vs skipped counts
+- enrich_recent_items: only aggregates items whose torrent rows are recent
+"""
+
+import os
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "3306")
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_NAME", "test")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-for-pilotarr-testing-only!")
+os.environ.setdefault("API_KEY", "test-api-key")
+os.environ.setdefault("WEBHOOK_SECRET", "test-webhook-secret")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.models.models import LibraryItem, LibraryItemTorrent  # noqa: E402
+from app.services.torrent_enrichment_service import TorrentEnrichmentService  # noqa: E402
+
+
+def _info(h, ratio=1.0, status="seeding", size=100, progress=100.0, name=None):
+    return {
+        "hash": h,
+        "name": name or f"T-{h}",
+        "status": status,
+        "ratio": ratio,
+        "seeding_time": 60,
+        "download_date": 1_700_000_000,
+        "size": size,
+        "progress": progress,
+    }
+
+
+def _service(db, torrents_data):
+    service = TorrentEnrichmentService(db)
+    connector = AsyncMock()
+    connector.get_torrents_info = AsyncMock(return_value=torrents_data)
+    service.qbt_connector = connector
+    return service
+
+
+def _add_rows(db, make_library_item, n_items, per_item=2):
+    """n_items movies with per_item torrent rows each; returns {hash: info} as qBittorrent would."""
+    data = {}
+    for i in range(n_items):
+        item = make_library_item(title=f"Movie {i}")
+        for j in range(per_item):
+            h = f"{i:020X}{j:020X}"
+            db.add(LibraryItemTorrent(library_item_id=item.id, torrent_hash=h.lower()))
+            data[h] = _info(h, ratio=float(j + 1))
+    db.commit()
+    return data
+
+
+class TestAggregateInfos:
+    def test_aggregates_multiple_torrents(self):
+        infos = [_info("A", ratio=1.0, size=100), _info("B", ratio=2.0, size=300, status="downloading", progress=50.0)]
+        result = TorrentEnrichmentService._aggregate_infos(infos)
+        assert result["ratio"] == 1.5
+        assert result["size"] == 400
+        assert result["status"] == "downloading"
+        assert result["progress"] == 75.0
+        assert result["torrent_count"] == 2
+        assert result["name"] == "2 torrents"
+
+    def test_single_torrent_keeps_name(self):
+        result = TorrentEnrichmentService._aggregate_infos([_info("A", name="Dune.2021")])
+        assert result["name"] == "Dune.2021"
+        assert result["status"] == "seeding"
+        assert result["progress"] == 100.0
+
+    def test_empty_infos_are_counted_but_ignored(self):
+        result = TorrentEnrichmentService._aggregate_infos([_info("A", status="paused"), {}])
+        assert result["status"] == "mixed"
+        assert result["torrent_count"] == 2
+
+
+class TestEnrichAllItems:
+    async def test_refreshes_rows_and_aggregates_items(self, db, make_library_item):
+        data = _add_rows(db, make_library_item, 3)
+        stats = await _service(db, data).enrich_all_items()
+        assert (stats["total"], stats["success"], stats["failed"]) == (3, 3, 0)
+        assert db.query(LibraryItemTorrent).filter(LibraryItemTorrent.torrent_info.isnot(None)).count() == 6
+        for item in db.query(LibraryItem).all():
+            db.refresh(item)
+            assert item.torrent_info["torrent_count"] == 2
+            assert item.torrent_info["ratio"] == 1.5
+
+    async def test_phase_b_statement_count_is_constant(self, db, make_library_item):
+        counts = []
+        for n_items in (3, 30):
+            db.query(LibraryItemTorrent).delete()
+            db.query(LibraryItem).delete()
+            db.commit()
+            data = _add_rows(db, make_library_item, n_items)
+            await _service(db, data).enrich_all_items()
+            db.query(LibraryItem).update({LibraryItem.torrent_info: None})  # force every aggregate to be rewritten
+            db.commit()
+
+            service = _service(db, data)
+            statements = []
+
+            def _on_execute(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.get_bind(), "before_cursor_execute", _on_execute)
+            try:
+                _, stats = service._aggregate_items()
+                db.commit()
+            finally:
+                event.remove(db.get_bind(), "before_cursor_execute", _on_execute)
+            assert stats["items_written"] == n_items
+            counts.append(len([s for s in statements if s.lstrip().upper().startswith(("SELECT", "UPDATE"))]))
+
+        assert counts[0] == counts[1] == 2
+
+
+class TestChangeDetection:
+    async def test_unchanged_rerun_writes_nothing(self, db, make_library_item):
+        data = _add_rows(db, make_library_item, 3)
+        first = await _service(db, data).enrich_all_items()
+        assert (first["rows_written"], first["items_written"]) == (6, 3)
+
+        stamps = {row.id: row.updated_at for row in db.query(LibraryItemTorrent).all()}
+        second = await _service(db, data).enrich_all_items()
+        assert (second["rows_written"], second["rows_skipped"]) == (0, 6)
+        assert (second["items_written"], second["items_skipped"]) == (0, 3)
+        db.expire_all()
+        assert {row.id: row.updated_at for row in db.query(LibraryItemTorrent).all()} == stamps
+
+    async def test_only_changed_rows_and_items_are_written(self, db, make_library_item):
+        data = _add_rows(db, make_library_item, 3)
+        await _service(db, data).enrich_all_items()
+
+        changed_hash = next(iter(data))
+        data = {**data, changed_hash: {**data[changed_hash], "seeding_time": 999}}
+        stats = await _service(db, data).enrich_all_items()
+        assert (stats["rows_written"], stats["rows_skipped"]) == (1, 5)
+        assert (stats["items_written"], stats["items_skipped"]) == (1, 2)
+        row = db.query(LibraryItemTorrent).filter_by(torrent_hash=changed_hash.lower()).one()
+        db.refresh(row)
+        assert row.torrent_info["seeding_time"] == 999
+
+    async def test_legacy_item_written_only_when_changed(self, db, make_library_item):
+        item = make_library_item(title="Legacy")
+        item.torrent_hash = "c" * 40
+        db.commit()
+        data = {"C" * 40: _info("C" * 40)}
+
+        first = await _service(db, data).enrich_all_items()
+        second = await _service(db, data).enrich_all_items()
+        assert first["items_written"] == 1
+        assert (second["items_written"], second["items_skipped"]) == (0, 1)
+        db.refresh(item)
+        assert item.torrent_info["torrent_count"] == 1
+
+
+class TestEnrichRecentItems:
+    async def test_only_recent_rows_are_aggregated(self, db, make_library_item):
+        data = _add_rows(db, make_library_item, 2, per_item=1)
+        old_row = db.query(LibraryItemTorrent).first()
+        old_row.created_at = datetime.now(UTC) - timedelta(days=30)
+        db.commit()
+
+        stats = await _service(db, data).enrich_recent_items(days=7)
+        assert stats["total"] == 1
+        db.refresh(old_row)
+        assert old_row.torrent_info is None
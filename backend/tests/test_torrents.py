@@ -2,12 +2,17 @@
 Integration tests for /api/torrents routes.
 
 - GET /api/torrents/all
+- GET /api/torrents/all snapshot: generated_at, served from the snapshot, ETag / If-None-Match 304
+- snapshot refresh: an unreachable client keeps the previous snapshot (503 when there is none)
 - GET /api/torrents/item/{library_item_id}
 """
 
 from unittest.mock import AsyncMock, patch
 
+import pytest
+
 from app.models.enums import ServiceType
+from app.services.torrent_snapshot import TorrentClientUnavailableError, torrent_snapshot_poller
 
 MOCK_TORRENT = {
     "id": "abc123",
@@ -48,9 +53,9 @@ class TestGetAllTorrents:
             api_key=None,
         )
 
-        with patch("app.api.routes.torrents.create_connector") as mock_factory:
+        with patch("app.services.torrent_snapshot.create_connector") as mock_factory:
             mock_connector = AsyncMock()
-            mock_connector.login = AsyncMock(return_value=True)
+            mock_connector.ensure_authenticated = AsyncMock(return_value=True)
             mock_connector.get_all_torrents = AsyncMock(return_value=[MOCK_TORRENT])
             mock_connector.get_transfer_info = AsyncMock(return_value=MOCK_TRANSFER)
             mock_connector.close = AsyncMock()
@@ -68,9 +73,9 @@ class TestGetAllTorrents:
     def test_login_failure_returns_503(self, auth_client, make_service_config):
         make_service_config(service_name=ServiceType.QBITTORRENT)
 
-        with patch("app.api.routes.torrents.create_connector") as mock_factory:
+        with patch("app.services.torrent_snapshot.create_connector") as mock_factory:
             mock_connector = AsyncMock()
-            mock_connector.login = AsyncMock(return_value=False)
+            mock_connector.ensure_authenticated = AsyncMock(return_value=False)
             mock_connector.close = AsyncMock()
             mock_factory.return_value = mock_connector
 
@@ -81,9 +86,9 @@ class TestGetAllTorrents:
     def test_torrent_has_added_on_field(self, auth_client, make_service_config):
         make_service_config(service_name=ServiceType.QBITTORRENT)
 
-        with patch("app.api.routes.torrents.create_connector") as mock_factory:
+        with patch("app.services.torrent_snapshot.create_connector") as mock_factory:
             mock_connector = AsyncMock()
-            mock_connector.login = AsyncMock(return_value=True)
+            mock_connector.ensure_authenticated = AsyncMock(return_value=True)
             mock_connector.get_all_torrents = AsyncMock(return_value=[MOCK_TORRENT])
             mock_connector.get_transfer_info = AsyncMock(return_value=MOCK_TRANSFER)
             mock_connector.close = AsyncMock()
@@ -96,6 +101,88 @@ class TestGetAllTorrents:
         assert torrent["addedOn"] == "2024-01-01T00:00:00+00:00"
 
 
+def _mock_connector(torrents=None, transfer=None):
+    mock_connector = AsyncMock()
+    mock_connector.ensure_authenticated = AsyncMock(return_value=True)
+    mock_connector.get_all_torrents = AsyncMock(return_value=torrents if torrents is not None else [MOCK_TORRENT])
+    mock_connector.get_transfer_info = AsyncMock(return_value=transfer or MOCK_TRANSFER)
+    mock_connector.close = AsyncMock()
+    return mock_connector
+
+
+class TestTorrentsSnapshot:
+    def test_response_has_generated_at_and_etag(self, auth_client, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        with patch("app.services.torrent_snapshot.create_connector", return_value=_mock_connector()):
+            resp = auth_client.get("/api/torrents/all")
+        assert resp.status_code == 200
+        assert resp.json()["generated_at"]
+        assert resp.headers["etag"].startswith('"')
+
+    def test_repeated_requests_served_from_snapshot(self, auth_client, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        with patch("app.services.torrent_snapshot.create_connector", return_value=_mock_connector()) as factory:
+            first = auth_client.get("/api/torrents/all")
+            second = auth_client.get("/api/torrents/all")
+        assert factory.call_count == 1
+        assert first.json() == second.json()
+
+    def test_if_none_match_returns_304(self, auth_client, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        with patch("app.services.torrent_snapshot.create_connector", return_value=_mock_connector()):
+            etag = auth_client.get("/api/torrents/all").headers["etag"]
+            resp = auth_client.get("/api/torrents/all", headers={"If-None-Match": f'W/{etag}, "other"'})
+        assert resp.status_code == 304
+        assert resp.headers["etag"] == etag
+        assert resp.content == b""
+
+    async def test_unchanged_refresh_keeps_etag_and_changed_content_gets_new_one(self, db, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        with patch("app.services.torrent_snapshot.create_connector", return_value=_mock_connector()):
+            first = await torrent_snapshot_poller.refresh(db)
+            same = await torrent_snapshot_poller.refresh(db)
+        with patch(
+            "app.services.torrent_snapshot.create_connector",
+            return_value=_mock_connector([{**MOCK_TORRENT, "ratio": 2.0}]),
+        ):
+            changed = await torrent_snapshot_poller.refresh(db)
+        assert same is first
+        assert changed.etag != first.etag
+        assert changed.payload["torrents"][0]["ratio"] == 2.0
+
+    async def test_unreachable_client_keeps_previous_snapshot(self, db, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        with patch("app.services.torrent_snapshot.create_connector", return_value=_mock_connector()):
+            first = await torrent_snapshot_poller.refresh(db)
+        # Échec du connecteur : [] + transfert "disconnected", sans exception
+        down = _mock_connector([], {"dl_speed": 0, "ul_speed": 0, "connection_status": "disconnected"})
+        with patch("app.services.torrent_snapshot.create_connector", return_value=down):
+            with pytest.raises(TorrentClientUnavailableError):
+                await torrent_snapshot_poller.refresh(db)
+        assert torrent_snapshot_poller.snapshot is first
+        assert len(first.payload["torrents"]) == 1
+
+    def test_unreachable_client_without_snapshot_returns_503(self, auth_client, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        down = _mock_connector([], {"dl_speed": 0, "ul_speed": 0, "connection_status": "disconnected"})
+        with patch("app.services.torrent_snapshot.create_connector", return_value=down):
+            resp = auth_client.get("/api/torrents/all")
+        assert resp.status_code == 503
+
+    async def test_empty_connected_client_is_a_valid_snapshot(self, db, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        with patch("app.services.torrent_snapshot.create_connector", return_value=_mock_connector([])):
+            snapshot = await torrent_snapshot_poller.refresh(db)
+        assert snapshot.payload["torrents"] == []
+
+    def test_stale_etag_gets_full_response(self, auth_client, make_service_config):
+        make_service_config(service_name=ServiceType.QBITTORRENT)
+        with patch("app.services.torrent_snapshot.create_connector", return_value=_mock_connector()):
+            resp = auth_client.get("/api/torrents/all", headers={"If-None-Match": '"stale"'})
+        assert resp.status_code == 200
+        assert len(resp.json()["torrents"]) == 1
+
+
 class TestGetItemTorrents:
     def test_returns_empty_list_for_unknown_item(self, auth_client):
         resp = auth_client.get("/api/torrents/item/nonexistent-id")